@@ -0,0 +1,128 @@
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    url TEXT NOT NULL REFERENCES pages (url),
+    path TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    PRIMARY KEY (url, path)
+);
+"""
+
+
+class Ledger:
+    """
+    페이지별 다운로드 상태와 받은 파일을 SQLite에 기록합니다.
+
+    다시 실행하면 끝난 페이지는 건너뛰고, 실패했거나 도중에 멈춘 페이지만 다시
+    받습니다. 여러 브라우저 스레드가 같은 Ledger를 함께 쓸 수 있습니다.
+
+    Args:
+        path (str): SQLite 파일 경로.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def status_of(self, url: str) -> Optional[str]:
+        row = (
+            self._connect()
+            .execute("SELECT status FROM pages WHERE url = ?", (url,))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def pending(self, urls: Iterable[str]) -> List[str]:
+        """
+        아직 끝나지 않은 URL을 주어진 순서대로 반환하고, 처음 보는 URL은 기록합니다.
+        """
+
+        urls = list(dict.fromkeys(urls))
+        conn = self._connect()
+
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO pages (url, status, updated_at) VALUES (?, ?, ?)",
+                [(url, STATUS_PENDING, time.time()) for url in urls],
+            )
+
+        done = {
+            url
+            for (url,) in conn.execute(
+                "SELECT url FROM pages WHERE status = ?", (STATUS_DONE,)
+            )
+        }
+        return [url for url in urls if url not in done]
+
+    def start(self, url: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE pages SET status = ?, attempts = attempts + 1, updated_at = ?"
+                " WHERE url = ?",
+                (STATUS_RUNNING, time.time(), url),
+            )
+
+    def finish(self, url: str, files: List[Tuple[str, str]]):
+        """
+        페이지를 끝났다고 기록합니다.
+
+        Args:
+            url (str): 페이지 URL.
+            files (List[Tuple[str, str]]): 받은 (파일 경로, SHA-256) 목록.
+        """
+
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM files WHERE url = ?", (url,))
+            conn.executemany(
+                "INSERT INTO files (url, path, sha256) VALUES (?, ?, ?)",
+                [(url, path, sha256) for path, sha256 in files],
+            )
+            conn.execute(
+                "UPDATE pages SET status = ?, error = NULL, updated_at = ? WHERE url = ?",
+                (STATUS_DONE, time.time(), url),
+            )
+
+    def fail(self, url: str, error: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE pages SET status = ?, error = ?, updated_at = ? WHERE url = ?",
+                (STATUS_FAILED, error, time.time(), url),
+            )
+
+    def files_of(self, url: str) -> List[Tuple[str, str]]:
+        return (
+            self._connect()
+            .execute(
+                "SELECT path, sha256 FROM files WHERE url = ? ORDER BY path", (url,)
+            )
+            .fetchall()
+        )
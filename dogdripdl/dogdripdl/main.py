@@ -1,20 +1,77 @@
+import hashlib
 import logging
 import os
+import queue
 import shutil
+import threading
 import time
-from typing import Callable, Final, List, Tuple, TypedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Final, List, Optional, Tuple, TypedDict
+from urllib.parse import urljoin
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
-from utils import fs
+from selenium.common.exceptions import NoSuchElementException
+from utils import fs, hash
+
+import dogdripdl.media as media
+from dogdripdl.ledger import Ledger
+from dogdripdl.markdown import html_to_markdown
 
 TEMPORAL_BASE_PATH: Final = os.path.join(os.getcwd(), "tmp")
 DOWNLOAD_BASE_PATH: Final = os.path.join(os.getcwd(), "downloads")
 
+# 페이지별 상태를 기록하여 다시 실행하면 끝난 페이지는 건너뜀
+LEDGER_PATH: Final = os.path.join(os.getcwd(), "ledger.sqlite3")
+
 LIMIT: Final = 200
 
+# 우클릭 메뉴로 저장하지 않고 브라우저 쿠키로 직접 받음. 창 없이 실행할 수 있음
+DIRECT_DOWNLOAD: Final = os.environ.get("DOGDRIPDL_DIRECT", "0") == "1"
+HEADLESS: Final = DIRECT_DOWNLOAD and os.environ.get("DOGDRIPDL_HEADLESS", "1") != "0"
+MEDIA_WORKERS: Final = int(os.environ.get("DOGDRIPDL_MEDIA_WORKERS", 8))
+
+# 본문을 한 번의 execute_script로 가져와 로컬에서 처리함. 직접 받을 때만 사용
+SNAPSHOT: Final = DIRECT_DOWNLOAD and os.environ.get("DOGDRIPDL_SNAPSHOT", "1") != "0"
+# 본문 텍스트를 받은 파일과 함께 마크다운으로 저장
+WRITE_MARKDOWN: Final = SNAPSHOT and os.environ.get("DOGDRIPDL_MARKDOWN", "1") != "0"
+
+# 요소마다 WebDriver를 호출하지 않도록 본문 HTML과 이미지/비디오의 크기, 위치,
+# 주소를 한 번에 모음. 삭제된 페이지면 null
+SNAPSHOT_SCRIPT: Final = """
+if (document.getElementById("access")) return null;
+const article = document.getElementById("article_1");
+if (!article) return {title: document.title, html: null, media: []};
+const media = [];
+for (const el of article.querySelectorAll("img, video")) {
+    const rect = el.getBoundingClientRect();
+    const source = el.querySelector("source");
+    media.push({
+        tag: el.tagName.toLowerCase(),
+        src: el.currentSrc || el.src || (source && source.src) || "",
+        srcset: el.getAttribute("srcset")
+            || (source && source.getAttribute("srcset")) || "",
+        dataSrc: el.getAttribute("data-src") || "",
+        // html_to_markdown()이 요소를 찾을 때 쓰는 속성 값
+        attr: el.getAttribute("src") || el.getAttribute("data-src")
+            || (source && source.getAttribute("src")) || "",
+        width: rect.width,
+        height: rect.height,
+        y: rect.top + window.scrollY,
+    });
+}
+return {title: document.title, html: article.outerHTML, media: media};
+"""
+
+# 동시에 띄울 브라우저 수. 우클릭 저장은 화면의 창에 키를 보내므로 하나만 사용
+BROWSERS: Final = (
+    int(os.environ.get("DOGDRIPDL_BROWSERS", min(4, os.cpu_count() or 1)))
+    if DIRECT_DOWNLOAD
+    else 1
+)
+
 
 # https://stackoverflow.com/questions/7406102
 def to_path_safe_string(s: str) -> str:
@@ -26,7 +83,9 @@ def to_path_safe_string(s: str) -> str:
 
 
 def load_list_of_urls(url_list_file: str) -> List[str]:
-    return open(url_list_file).readlines()
+    with open(url_list_file) as file:
+        lines = [line.strip() for line in file]
+    return [line for line in lines if line and not line.startswith("#")]
 
 
 class Option(TypedDict):
@@ -43,16 +102,29 @@ logging.basicConfig(
 log = logging.getLogger()
 log.setLevel(logging.INFO)
 
+# 브라우저들이 지금 받고 있는 페이지의 제목. 같은 제목의 페이지를 동시에 받으면
+# 같은 폴더에 섞여 쓰지 않도록 뒤에 번호를 붙임
+_titles_in_use: Dict[str, None] = {}
+_titles_lock = threading.Lock()
+
 
 class DogDripDownloader:
-    def __init__(self) -> None:
+    def __init__(self, temp_dir: str = TEMPORAL_BASE_PATH) -> None:
+        # 브라우저마다 다운로드 디렉토리를 따로 두어 받은 파일이 섞이지 않게 함
+        self.temp_dir = temp_dir
+        self.title: Optional[str] = None
+        # 직접 받으면서 계산한 파일별 SHA-256 (16진수). 페이지마다 비움
+        self.digests: Dict[str, str] = {}
+
         # Chrome 옵션 설정
         driver_options = Options()
         driver_options.add_argument("--disable-gpu")
+        if HEADLESS:
+            driver_options.add_argument("--headless=new")
         driver_options.add_experimental_option(
             "prefs",
             {
-                "download.default_directory": TEMPORAL_BASE_PATH,
+                "download.default_directory": temp_dir,
                 "download.prompt_for_download": False,
                 "download.directory_upgrade": True,
                 "plugins.always_open_pdf_externally": True,
@@ -71,32 +143,89 @@ class DogDripDownloader:
         # 다운로드 설정 적용
         params = {
             "cmd": "Page.setDownloadBehavior",
-            "params": {"behavior": "allow", "downloadPath": TEMPORAL_BASE_PATH},
+            "params": {"behavior": "allow", "downloadPath": temp_dir},
         }
         driver.execute("send_command", params)
 
         self.driver = driver
 
     def __del__(self):
-        # 드라이버 종료
-        self.driver.quit()
+        self.close()
 
-    def get_title(self) -> str:
-        return to_path_safe_string(self.driver.title.rstrip("DogDrip.Net 개드립")).replace(
-            ".", ""
-        )
+    def close(self):
+        # 드라이버 종료
+        if getattr(self, "driver", None):
+            self.driver.quit()
+            self.driver = None
+
+    def get_title(self, title: Optional[str] = None) -> str:
+        """
+        현재 페이지를 저장할 이름을 반환합니다.
+
+        다른 브라우저가 같은 제목의 페이지를 받고 있으면 `<제목>_2`처럼 번호를
+        붙이고, 페이지를 다 받을 때까지 같은 이름을 돌려줍니다.
+        """
+
+        if self.title is not None:
+            return self.title
+
+        if title is None:
+            title = self.driver.title
+        title = to_path_safe_string(title.rstrip("DogDrip.Net 개드립")).replace(".", "")
+
+        with _titles_lock:
+            name, n = title, 1
+            while name in _titles_in_use:
+                n += 1
+                name = f"{title}_{n}"
+            _titles_in_use[name] = None
+
+        self.title = name
+        return name
+
+    def release_title(self):
+        if self.title is not None:
+            with _titles_lock:
+                _titles_in_use.pop(self.title, None)
+            self.title = None
+
+    def sha256_of(self, path: str) -> str:
+        """
+        받은 파일의 SHA-256(16진수)을 반환합니다.
+
+        직접 받은 파일은 받으면서 계산한 값을 쓰고, 우클릭으로 저장한 파일만 다시
+        읽어 계산합니다.
+        """
+
+        if digest := self.digests.get(path):
+            return digest
+        return hash.calculate_sha256(path).hex()
+
+    def download(self, url: str) -> List[str]:
+        """
+        페이지의 이미지/비디오를 받아 저장한 파일 경로를 반환합니다.
+        """
+
+        self.digests = {}
+        try:
+            return self.download_page(url)
+        finally:
+            self.release_title()
 
-    def download(self, url: str):
+    def download_page(self, url: str) -> List[str]:
         log.info(f"download page: {url}")
 
         # 지정된 URL로 이동
         self.driver.get(url)
 
+        if SNAPSHOT:
+            return self.download_snapshot(url)
+
         # 이미지/비디오 요소 추출
         try:
             element = self.driver.find_element(By.ID, "access")
             log.warning(f"Can not download page: it seems to deleted")
-            return
+            return []
         except Exception as err:
             pass
 
@@ -113,6 +242,11 @@ class DogDripDownloader:
             f"\thas {len(elems)} elements, {len(img_elems)} images and {len(video_elems)} videos"
         )
 
+        if DIRECT_DOWNLOAD:
+            return self.download_direct(
+                [(elem.tag_name, self.get_source(elem)) for elem in elems]
+            )
+
         def save_as_win32(driver, element, delay: float = 0.2):
             import win32com.client as comclt
 
@@ -127,20 +261,22 @@ class DogDripDownloader:
             self.download_element(save_as_win32, elems[0])
             time.sleep(1)
 
-            origin_filename = os.listdir(TEMPORAL_BASE_PATH)[0]
+            origin_filename = os.listdir(self.temp_dir)[0]
             ext = origin_filename.split(".")[-1]
             new_filename = f"{self.get_title()}_.{ext}"
 
             shutil.move(
-                os.path.join(TEMPORAL_BASE_PATH, origin_filename),
+                os.path.join(self.temp_dir, origin_filename),
                 os.path.join(DOWNLOAD_BASE_PATH, new_filename),
             )
+            return [os.path.join(DOWNLOAD_BASE_PATH, new_filename)]
         else:  # 여러 파일 다운로드
             # 페이지 폴더 생성
             page_download_path = os.path.join(DOWNLOAD_BASE_PATH, self.get_title())
             fs.mkdir_if_not_exist(page_download_path)
 
             # 엘리먼트 다운로드
+            paths = []
             for index, elem in enumerate(elems):
                 log.info(f"\tdownload element: {elem}")
 
@@ -155,9 +291,146 @@ class DogDripDownloader:
                 seq_filename = f"{elem.tag_name}_{index}.{ext}"
 
                 shutil.move(
-                    os.path.join(TEMPORAL_BASE_PATH, origin_filename),
+                    os.path.join(self.temp_dir, origin_filename),
                     os.path.join(page_download_path, seq_filename),
                 )
+                paths.append(os.path.join(page_download_path, seq_filename))
+
+            return paths
+
+    def download_snapshot(self, url: str) -> List[str]:
+        """
+        본문을 SNAPSHOT_SCRIPT로 한 번에 가져와 이미지/비디오를 받고, 켜져 있으면
+        본문을 마크다운으로 저장합니다.
+
+        이미지 크기 필터(LIMIT)와 위치 순 정렬은 가져온 값으로 로컬에서 합니다.
+
+        Returns:
+            List[str]: 저장한 파일 경로. 마크다운 파일은 마지막에 옵니다.
+        """
+
+        snapshot = self.driver.execute_script(SNAPSHOT_SCRIPT)
+        if snapshot is None:
+            log.warning(f"Can not download page: it seems to deleted")
+            return []
+        if snapshot["html"] is None:
+            raise NoSuchElementException("can not find #article_1")
+
+        # 이미지는 가로와 세로가 최소 200 이상이어야 함
+        items = [
+            item
+            for item in snapshot["media"]
+            if item["tag"] == "video"
+            or (item["height"] > LIMIT and item["width"] > LIMIT)
+        ]
+        items.sort(key=lambda item: item["y"])
+
+        images = sum(1 for item in items if item["tag"] == "img")
+        log.info(
+            f"\thas {len(items)} elements, {images} images and {len(items) - images} videos"
+        )
+
+        page_url = self.driver.current_url
+        return self.download_direct(
+            [
+                (
+                    item["tag"],
+                    media.resolve_source(
+                        page_url, item["src"], item["srcset"], item["dataSrc"]
+                    )
+                    or "",
+                )
+                for item in items
+            ],
+            title=snapshot["title"],
+            html=snapshot["html"] if WRITE_MARKDOWN else None,
+            attrs=[item["attr"] for item in items],
+        )
+
+    def download_direct(
+        self,
+        sources: List[Tuple[str, str]],
+        title: Optional[str] = None,
+        html: Optional[str] = None,
+        attrs: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        요소의 src를 모아 브라우저의 쿠키로 동시에 받습니다.
+
+        저장하는 이름은 우클릭 저장과 같습니다. 파일이 하나면 `<제목>_.<확장자>`,
+        여러 개면 `<제목>/<태그>_<순번>.<확장자>`.
+
+        Args:
+            sources (List[Tuple[str, str]]): 페이지 순서대로의 (태그, src).
+            title (str or None): 페이지 제목. 없으면 브라우저에서 읽습니다.
+            html (str or None): 본문 HTML. 있으면 받은 파일을 가리키는 마크다운을
+                파일 옆에 `<제목>_.md` 또는 `<제목>/<제목>.md`로 저장합니다.
+            attrs (List[str] or None): sources마다 html 안 요소의 src(또는
+                data-src) 속성 값. 마크다운에서 받은 파일을 찾을 때 씁니다.
+                없으면 sources의 src를 씁니다.
+
+        Returns:
+            List[str]: 저장한 파일 경로.
+
+        Raises:
+            media.PartialDownload: 받지 못한 파일이 있는 경우. 받은 파일과
+                마크다운은 저장한 뒤 발생합니다.
+        """
+
+        page_url = self.driver.current_url
+        title = self.get_title(title)
+
+        if len(sources) == 1:
+            page_download_path = DOWNLOAD_BASE_PATH
+            paths = [os.path.join(DOWNLOAD_BASE_PATH, f"{title}_")]
+            markdown_path = os.path.join(DOWNLOAD_BASE_PATH, f"{title}_.md")
+        else:
+            page_download_path = os.path.join(DOWNLOAD_BASE_PATH, title)
+            fs.mkdir_if_not_exist(page_download_path)
+            paths = [
+                os.path.join(page_download_path, f"{tag}_{index}")
+                for index, (tag, _) in enumerate(sources)
+            ]
+            markdown_path = os.path.join(page_download_path, f"{title}.md")
+
+        # currentSrc와 속성 값이 다를 수 있으므로 마크다운은 속성 값으로 찾음
+        attrs = attrs or [src for _, src in sources]
+
+        medias = []
+        html_urls: Dict[str, str] = {}
+        for (tag, src), attr, path in zip(sources, attrs, paths):
+            if url := media.resolve_source(page_url, src):
+                medias.append(media.Media(tag, url, path))
+                html_urls[path] = urljoin(page_url, attr)
+            else:
+                log.warning(f"can not download element directly: {tag} {src!r}")
+
+        session = media.session_from_driver(self.driver, MEDIA_WORKERS)
+        fetched = media.MediaFetcher(session, MEDIA_WORKERS).fetch_all(medias)
+        files = [f.path for f in fetched if f.path]
+        failed = [f for f in fetched if f.error]
+        self.digests.update({f.path: f.sha256 for f in fetched if f.path})
+
+        if html is not None:
+            # 마크다운 옆에 있는 받은 파일을 상대 경로로 가리킴. 받지 못한 파일은
+            # 원래 주소를 그대로 둠
+            local_paths: Dict[str, str] = {
+                html_urls[f.media.path]: os.path.relpath(f.path, page_download_path)
+                for f in fetched
+                if f.path
+            }
+            text = f"# {title}\n\n<{page_url}>\n\n"
+            text += html_to_markdown(html, page_url, local_paths)
+            data = text.encode("utf-8")
+            fs.save(markdown_path, data)
+            self.digests[markdown_path] = hashlib.sha256(data).hexdigest()
+            log.info(f"\tmarkdown saved → {markdown_path}")
+            files.append(markdown_path)
+
+        if failed:
+            raise media.PartialDownload(files, failed)
+
+        return files
 
     def filter_exclude_htm_file(self, files: list[str]) -> list[str]:
         return [
@@ -172,7 +445,7 @@ class DogDripDownloader:
 
     def download_element(self, save_as_win32: Callable, elem: WebElement) -> str:
         def check_is_downloaded() -> Tuple[str, bool]:
-            files = os.listdir(TEMPORAL_BASE_PATH)
+            files = os.listdir(self.temp_dir)
             if not files:
                 return ("", False)
 
@@ -226,20 +499,139 @@ class DogDripDownloader:
         """ """
         if s := elem.get_attribute("src"):
             return s
-        elif s := elem.find_element(By.TAG_NAME, "source"):
-            return s.get_attribute("src")
-        return ""
 
+        try:
+            return elem.find_element(By.TAG_NAME, "source").get_attribute("src") or ""
+        except NoSuchElementException:
+            return ""
+
+
+@dataclass
+class PageResult:
+    url: str
+    files: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+    error: Optional[str] = None
+    attempted: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.attempted and self.error is None
+
+
+def run_workers(
+    urls: List[str], browsers: int, ledger: Optional[Ledger] = None
+) -> List[PageResult]:
+    """
+    브라우저 여러 개가 공유하는 큐에서 페이지를 하나씩 가져가 받습니다.
+
+    브라우저마다 TEMPORAL_BASE_PATH 아래에 다운로드 디렉토리를 따로 둡니다.
+    한 페이지가 실패해도 다른 페이지는 계속 받습니다. ledger가 있으면 페이지마다
+    상태와 받은 파일의 SHA-256을 기록합니다. 브라우저를 띄우지 못한 작업자는
+    페이지를 가져가지 않으므로 다른 작업자가 받고, 모든 작업자가 실패하여 남은
+    페이지는 실패로 반환합니다.
+
+    Returns:
+        List[PageResult]: urls와 같은 순서의 페이지별 결과.
+    """
+
+    jobs: "queue.Queue[int]" = queue.Queue()
+    for index in range(len(urls)):
+        jobs.put(index)
+
+    results = [PageResult(url) for url in urls]
+    startup_errors: List[str] = []
+
+    def work(worker: int):
+        temp_dir = os.path.join(TEMPORAL_BASE_PATH, f"worker{worker}")
+
+        try:
+            fs.makedirs(temp_dir)
+            ddd = DogDripDownloader(temp_dir)
+        except Exception as err:
+            log.error(f"can not start browser {worker}: {err}")
+            startup_errors.append(str(err))
+            return
+
+        try:
+            while True:
+                try:
+                    index = jobs.get_nowait()
+                except queue.Empty:
+                    return
+
+                result = results[index]
+                result.attempted = True
+                started = time.monotonic()
+                if ledger:
+                    ledger.start(result.url)
+                try:
+                    result.files = ddd.download(result.url)
+                    if ledger:
+                        ledger.finish(
+                            result.url, [(p, ddd.sha256_of(p)) for p in result.files]
+                        )
+                except Exception as err:
+                    log.error(f"can not download page {result.url}: {err}")
+                    # 일부만 받은 경우에도 저장한 파일은 알림
+                    if isinstance(err, media.PartialDownload):
+                        result.files = err.files
+                    result.error = str(err)
+                    if ledger:
+                        ledger.fail(result.url, result.error)
+                result.seconds = time.monotonic() - started
+
+                status = "ok" if result.ok else "failed"
+                log.info(
+                    f"{status}\t{len(result.files)} files\t{result.seconds:.1f}s\t{result.url}"
+                )
+        finally:
+            ddd.close()
+
+    workers = max(1, min(browsers, len(urls)))
+    if workers == 1:
+        # 우클릭 저장은 COM(WScript.Shell)을 쓰므로, 초기화되어 있는 메인 스레드에서
+        # 실행함
+        work(0)
+    else:
+        threads = [
+            threading.Thread(target=work, args=(worker,), name=f"browser{worker}")
+            for worker in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    for result in results:
+        if not result.attempted:
+            reason = startup_errors[-1] if startup_errors else "worker stopped"
+            result.error = f"not attempted: {reason}"
+
+    return results
+
+
+def main():
+    fs.mkdir_if_not_exist(TEMPORAL_BASE_PATH)
+    fs.mkdir_if_not_exist(DOWNLOAD_BASE_PATH)
+
+    fs.clear_dir(TEMPORAL_BASE_PATH)
 
-fs.mkdir_if_not_exist(TEMPORAL_BASE_PATH)
-fs.mkdir_if_not_exist(DOWNLOAD_BASE_PATH)
+    ledger = Ledger(LEDGER_PATH)
 
-fs.clear_dir(TEMPORAL_BASE_PATH)
+    urls = load_list_of_urls("lists.txt")
+    pending = ledger.pending(urls)
+    # lists.txt에 같은 URL이 여러 번 있어도 한 번만 셈
+    if skipped := len(dict.fromkeys(urls)) - len(pending):
+        log.info(f"skipping {skipped} pages already downloaded")
 
+    results = run_workers(pending, BROWSERS, ledger)
 
-urls = load_list_of_urls("lists.txt")
+    failed = [result for result in results if not result.ok]
+    log.info(f"{len(results) - len(failed)} pages succeeded, {len(failed)} failed")
+    for result in failed:
+        log.info(f"\tfailed: {result.url} ({result.error})")
 
-ddd = DogDripDownloader()
 
-for url in urls:
-    ddd.download(url)
+if __name__ == "__main__":
+    main()
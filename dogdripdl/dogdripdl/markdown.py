@@ -0,0 +1,159 @@
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+_BLOCK_TAGS = {"p", "div", "section", "article", "figure", "ul", "ol", "table", "tr"}
+_SKIP_TAGS = {"script", "style", "noscript", "button", "iframe"}
+
+
+class _MarkdownParser(HTMLParser):
+    def __init__(self, page_url: str, local_paths: Dict[str, str]) -> None:
+        super().__init__(convert_charrefs=True)
+        self.page_url = page_url
+        self.local_paths = local_paths
+
+        self.out: List[str] = []
+        self.links: List[Optional[str]] = []
+        self.skip = 0
+        self.quote = 0
+
+    def _write(self, text: str):
+        self.out.append(text)
+
+    def _newline(self, count: int = 1):
+        # 인용 안의 빈 줄에도 '>'를 붙여 여러 문단이 한 인용으로 이어지게 함
+        prefix = "> " * self.quote
+        self._write("\n" + (prefix + "\n") * (count - 1) + prefix)
+
+    def _media(self, src: Optional[str]) -> Optional[str]:
+        if not src or src.startswith(("blob:", "data:")):
+            return None
+        url = urljoin(self.page_url, src)
+        return self.local_paths.get(url, url)
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        attr = dict(attrs)
+
+        if tag in _SKIP_TAGS:
+            self.skip += 1
+            return
+        if self.skip:
+            return
+
+        if tag in _BLOCK_TAGS:
+            self._newline(2)
+        elif tag == "br":
+            self._write("  ")
+            self._newline()
+        elif re.fullmatch(r"h[1-6]", tag):
+            self._newline(2)
+            self._write("#" * int(tag[1]) + " ")
+        elif tag == "li":
+            self._newline()
+            self._write("- ")
+        elif tag == "blockquote":
+            self._newline(2)
+            self.quote += 1
+            self._write("> ")
+        elif tag in ("strong", "b"):
+            self._write("**")
+        elif tag in ("em", "i"):
+            self._write("*")
+        elif tag == "a":
+            href = attr.get("href")
+            self.links.append(urljoin(self.page_url, href) if href else None)
+            if href:
+                self._write("[")
+        elif tag == "img":
+            if path := self._media(attr.get("src") or attr.get("data-src")):
+                alt = (attr.get("alt") or "").replace("]", "")
+                self._write(f"![{alt}]({path})")
+        elif tag in ("video", "source"):
+            if path := self._media(attr.get("src")):
+                self._newline(2)
+                self._write(f"[video]({path})")
+                self._newline(2)
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        self.handle_starttag(tag, attrs)
+        if tag not in ("br", "img", "source"):
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str):
+        if tag in _SKIP_TAGS:
+            self.skip = max(0, self.skip - 1)
+            return
+        if self.skip:
+            return
+
+        if tag in _BLOCK_TAGS or re.fullmatch(r"h[1-6]", tag):
+            self._newline(2)
+        elif tag == "blockquote":
+            self.quote = max(0, self.quote - 1)
+            self._newline(2)
+        elif tag in ("strong", "b"):
+            self._write("**")
+        elif tag in ("em", "i"):
+            self._write("*")
+        elif tag == "a" and self.links:
+            if href := self.links.pop():
+                self._write(f"]({href})")
+
+    def handle_data(self, data: str):
+        if self.skip:
+            return
+        text = re.sub(r"\s+", " ", data)
+        if text.strip():
+            self._write(text)
+        elif text and self.out and not self.out[-1].endswith((" ", "\n")):
+            # 태그 사이의 공백은 한 칸으로
+            self._write(" ")
+
+
+def html_to_markdown(
+    html: str, page_url: str = "", local_paths: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    게시글 HTML을 마크다운으로 변환합니다.
+
+    문단, 줄바꿈, 제목, 목록, 인용, 굵게/기울임, 링크, 이미지, 비디오를 옮기고
+    스크립트와 버튼 등은 버립니다.
+
+    Args:
+        html (str): 변환할 HTML.
+        page_url (str): 상대 주소를 풀 때 기준이 되는 페이지 URL.
+        local_paths (Dict[str, str] or None): 받은 파일의 원래 URL과 마크다운에서
+            가리킬 로컬 경로. 없는 이미지는 원래 URL을 그대로 씁니다.
+
+    Returns:
+        str: 마크다운 문자열.
+
+    Example:
+        >>> html_to_markdown('<p>hi <b>there</b></p><img src="a.jpg">', "https://x/", {"https://x/a.jpg": "img_0.jpg"})
+        "hi **there**\\n\\n![](img_0.jpg)\\n"
+    """
+
+    parser = _MarkdownParser(page_url, local_paths or {})
+    parser.feed(html)
+    parser.close()
+
+    lines: List[str] = []
+    for line in "".join(parser.out).split("\n"):
+        line = line.lstrip(" ")
+        if line.strip(" >"):
+            # 줄바꿈을 뜻하는 끝의 공백 두 칸은 남김
+            if not line.endswith("  "):
+                line = line.rstrip()
+            lines.append(line)
+            continue
+
+        # 빈 줄. 인용 안이면 '>'만 남기고, 연달아 나오면 가장 얕은 것 하나만 둠
+        line = ("> " * line.count(">")).rstrip()
+        if lines and not lines[-1].strip(" >"):
+            lines[-1] = min(lines[-1], line, key=len)
+        else:
+            lines.append(line)
+
+    text = "\n".join(lines).strip()
+    return text + "\n" if text else ""
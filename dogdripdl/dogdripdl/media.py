@@ -0,0 +1,208 @@
+import hashlib
+import logging
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator, List, Optional
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from utils import fs
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+log = logging.getLogger()
+
+TIMEOUT = (10, 60)
+CHUNK_SIZE = 256 * 1024
+
+
+@dataclass
+class Media:
+    """
+    페이지에서 찾은 이미지/비디오 하나.
+
+    Args:
+        tag (str): "img" 또는 "video".
+        src (str): 절대 URL.
+        path (str): 확장자를 뺀 저장 경로. 확장자는 받을 때 정합니다.
+    """
+
+    tag: str
+    src: str
+    path: str
+
+
+@dataclass
+class Fetched:
+    """
+    파일 하나를 받은 결과. 저장했으면 path와 받으면서 계산한 sha256(16진수),
+    실패했으면 error가 있습니다.
+    """
+
+    media: Media
+    path: Optional[str] = None
+    sha256: Optional[str] = None
+    error: Optional[str] = None
+
+
+class PartialDownload(Exception):
+    """
+    페이지의 파일 중 일부를 받지 못했을 때 발생합니다.
+
+    Args:
+        files (List[str]): 그래도 저장한 파일 경로.
+        failed (List[Fetched]): 받지 못한 파일.
+    """
+
+    def __init__(self, files: List[str], failed: List[Fetched]) -> None:
+        self.files = files
+        self.failed = failed
+
+        total = len(files) + len(failed)
+        reasons = "; ".join(f"{f.media.src}: {f.error}" for f in failed[:3])
+        super().__init__(f"{len(failed)}/{total} files failed ({reasons})")
+
+
+def resolve_source(
+    page_url: str, src: str, srcset: str = "", data_src: str = ""
+) -> Optional[str]:
+    """
+    요소의 주소를 직접 받을 수 있는 절대 URL로 바꿉니다.
+
+    srcset이 있으면 가장 큰 후보를, 없으면 src를 씁니다. 지연 로딩으로 src가
+    비어 있거나 `data:` 자리 표시 이미지이면 data-src를 씁니다. `blob:`이나
+    `data:`처럼 브라우저 안에서만 의미가 있는 주소뿐이면 None.
+
+    Example:
+        >>> resolve_source("https://www.dogdrip.net/123", "//img.dogdrip.net/a.jpg")
+        'https://img.dogdrip.net/a.jpg'
+        >>> resolve_source("https://www.dogdrip.net/123", "", "a.jpg 1x, b.jpg 2x")
+        'https://www.dogdrip.net/b.jpg'
+    """
+
+    for candidate in (largest_candidate(srcset), src, data_src):
+        if candidate and not candidate.startswith(("blob:", "data:")):
+            return urljoin(page_url, candidate)
+    return None
+
+
+def largest_candidate(srcset: str) -> str:
+    """
+    srcset에서 너비(`640w`)나 배율(`2x`)이 가장 큰 URL을 반환합니다. 없으면 "".
+    """
+
+    best, best_size = "", 0.0
+    for candidate in srcset.split(","):
+        parts = candidate.split()
+        if not parts:
+            continue
+
+        # 설명이 없으면 1x
+        descriptor = parts[1] if len(parts) > 1 else "1x"
+        try:
+            size = float(descriptor[:-1])
+        except ValueError:
+            continue
+        if size > best_size:
+            best, best_size = parts[0], size
+    return best
+
+
+def extension_of(url: str, content_type: str) -> str:
+    """
+    URL 경로의 확장자를, 없으면 Content-Type에 맞는 확장자를 반환합니다.
+    """
+
+    _, ext = os.path.splitext(urlparse(url).path)
+    if ext:
+        return ext.lstrip(".").lower()
+
+    mime = content_type.split(";")[0].strip()
+    ext = mimetypes.guess_extension(mime) or ".bin"
+    return ext.lstrip(".")
+
+
+def session_from_driver(driver: "webdriver.Chrome", pool_size: int) -> requests.Session:
+    """
+    브라우저의 쿠키와 User-Agent를 그대로 쓰는 세션을 만듭니다.
+
+    로그인이 필요하거나 봇을 막는 페이지도 브라우저와 같은 요청으로 보입니다.
+    """
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+    session.headers["Referer"] = driver.current_url
+
+    for cookie in driver.get_cookies():
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+        )
+
+    return session
+
+
+class MediaFetcher:
+    """
+    이미지/비디오를 브라우저를 거치지 않고 HTTP로 동시에 받습니다.
+
+    Args:
+        session (requests.Session): 브라우저 쿠키를 담은 세션.
+        workers (int): 동시에 받을 파일 수.
+    """
+
+    def __init__(self, session: requests.Session, workers: int) -> None:
+        self.session = session
+        self.workers = workers
+
+    def fetch(self, media: Media) -> Fetched:
+        """
+        파일 하나를 받아 저장하고, 저장한 경로와 SHA-256을 반환합니다.
+
+        SHA-256은 받는 동안 계산하므로 파일을 다시 읽지 않습니다.
+        """
+
+        digest = hashlib.sha256()
+
+        def chunks(resp: requests.Response) -> Iterator[bytes]:
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                digest.update(chunk)
+                yield chunk
+
+        with self.session.get(media.src, timeout=TIMEOUT, stream=True) as resp:
+            resp.raise_for_status()
+
+            ext = extension_of(media.src, resp.headers.get("Content-Type", ""))
+            path = f"{media.path}.{ext}"
+            size_hint = int(resp.headers.get("Content-Length", 0))
+            fs.save(path, chunks(resp), size_hint=size_hint)
+
+        log.info(f"\t{media.src} downloaded → {path}")
+        return Fetched(media, path=path, sha256=digest.hexdigest())
+
+    def try_fetch(self, media: Media) -> Fetched:
+        try:
+            return self.fetch(media)
+        except Exception as err:
+            log.error(f"\tcan not download {media.src}: {err}")
+            return Fetched(media, error=str(err))
+
+    def fetch_all(self, medias: List[Media]) -> List[Fetched]:
+        """
+        모든 파일을 받아 medias와 같은 순서로 결과를 반환합니다.
+
+        한 파일이 실패해도 나머지는 계속 받으며, 실패한 파일은 error로 알립니다.
+        """
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(self.try_fetch, medias))
@@ -1,3 +1,3 @@
 .venv\Scripts\activate
 poetry install
-poetry run poetry run dogdripdl\main.py
\ No newline at end of file
+poetry run dogdripdl
\ No newline at end of file
@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from dogdripdl.ledger import (
+    STATUS_DONE,
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_RUNNING,
+    Ledger,
+)
+
+
+class LedgerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "ledger.sqlite3")
+        self.ledger = Ledger(self.path)
+
+    def attempts_of(self, url: str) -> int:
+        with sqlite3.connect(self.path) as conn:
+            (attempts,) = conn.execute(
+                "SELECT attempts FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        return attempts
+
+    def test_pending_keeps_order_and_removes_duplicates(self):
+        urls = ["https://a/3", "https://a/1", "https://a/3", "https://a/2"]
+
+        self.assertEqual(
+            ["https://a/3", "https://a/1", "https://a/2"], self.ledger.pending(urls)
+        )
+        self.assertEqual(STATUS_PENDING, self.ledger.status_of("https://a/1"))
+        self.assertIsNone(self.ledger.status_of("https://a/4"))
+
+    def test_failed_page_is_retried_and_finished_page_is_skipped(self):
+        url = "https://a/1"
+        self.assertEqual([url], self.ledger.pending([url]))
+
+        self.ledger.start(url)
+        self.assertEqual(STATUS_RUNNING, self.ledger.status_of(url))
+        self.ledger.fail(url, "timeout")
+        self.assertEqual(STATUS_FAILED, self.ledger.status_of(url))
+
+        # 다시 열어도 실패한 페이지는 다시 받음
+        ledger = Ledger(self.path)
+        self.assertEqual([url], ledger.pending([url]))
+
+        ledger.start(url)
+        ledger.finish(url, [("a/0.jpg", "00")])
+        self.assertEqual(STATUS_DONE, ledger.status_of(url))
+        self.assertEqual(2, self.attempts_of(url))
+
+        self.assertEqual([], Ledger(self.path).pending([url]))
+
+    def test_files_of(self):
+        url = "https://a/1"
+        self.ledger.pending([url])
+        self.ledger.start(url)
+        self.ledger.finish(url, [("a/1.jpg", "11"), ("a/0.jpg", "00")])
+
+        self.assertEqual(
+            [("a/0.jpg", "00"), ("a/1.jpg", "11")], self.ledger.files_of(url)
+        )
+
+        # 다시 끝내면 이전 파일 목록을 바꿈
+        self.ledger.finish(url, [("a/2.jpg", "22")])
+        self.assertEqual([("a/2.jpg", "22")], self.ledger.files_of(url))
+        self.assertEqual([], self.ledger.files_of("https://a/2"))
+
+    def test_concurrent_start_and_finish(self):
+        urls = [f"https://a/{n}" for n in range(40)]
+        self.ledger.pending(urls)
+
+        def work(urls):
+            for url in urls:
+                self.ledger.start(url)
+                if url.endswith("0"):
+                    self.ledger.fail(url, "error")
+                else:
+                    self.ledger.finish(url, [(f"{url}.jpg", "00")])
+
+        threads = [threading.Thread(target=work, args=(urls[n::4],)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        failed = [url for url in urls if url.endswith("0")]
+        self.assertEqual(failed, self.ledger.pending(urls))
+        for url in urls:
+            self.assertEqual(1, self.attempts_of(url))
+            if url not in failed:
+                self.assertEqual([(f"{url}.jpg", "00")], self.ledger.files_of(url))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+from dogdripdl.markdown import html_to_markdown
+
+PAGE_URL = "https://www.dogdrip.net/123"
+
+
+class HtmlToMarkdownTests(unittest.TestCase):
+    def test_paragraphs_and_inline(self):
+        html = (
+            "<p>hi <b>there</b> <em>you</em></p>"
+            '<p>see <a href="/456">this</a><br>next line</p>'
+        )
+
+        self.assertEqual(
+            "hi **there** *you*\n\n"
+            "see [this](https://www.dogdrip.net/456)  \nnext line\n",
+            html_to_markdown(html, PAGE_URL),
+        )
+
+    def test_headings_and_lists(self):
+        html = "<h2>title</h2><ul><li>one</li><li>two</li></ul>"
+
+        self.assertEqual("## title\n\n- one\n- two\n", html_to_markdown(html))
+
+    def test_blockquote_keeps_paragraphs_together(self):
+        html = (
+            "<p>before</p>"
+            "<blockquote><p>one</p><p>two</p></blockquote>"
+            "<p>after</p>"
+        )
+
+        self.assertEqual("before\n\n> one\n>\n> two\n\nafter\n", html_to_markdown(html))
+
+    def test_nested_blockquote(self):
+        html = "<blockquote><p>a</p><blockquote><p>b</p></blockquote></blockquote>"
+
+        self.assertEqual("> a\n>\n> > b\n", html_to_markdown(html))
+
+    def test_media_points_to_local_files(self):
+        html = (
+            '<img src="//img.dogdrip.net/a.jpg" alt="cat">'
+            '<img data-src="/b.png">'
+            '<img src="https://img.dogdrip.net/missing.jpg">'
+            '<video><source src="/c.mp4"></video>'
+            '<img src="blob:https://www.dogdrip.net/x">'
+        )
+        local_paths = {
+            "https://img.dogdrip.net/a.jpg": "img_0.jpg",
+            "https://www.dogdrip.net/b.png": "img_1.png",
+            "https://www.dogdrip.net/c.mp4": "video_2.mp4",
+        }
+
+        markdown = html_to_markdown(html, PAGE_URL, local_paths)
+
+        self.assertIn("![cat](img_0.jpg)", markdown)
+        self.assertIn("![](img_1.png)", markdown)
+        # 받지 못한 파일은 원래 주소를 가리킴
+        self.assertIn("![](https://img.dogdrip.net/missing.jpg)", markdown)
+        self.assertIn("[video](video_2.mp4)", markdown)
+        self.assertNotIn("blob:", markdown)
+
+    def test_scripts_and_buttons_are_dropped(self):
+        html = "<p>text<script>alert(1)</script><button>like</button></p>"
+
+        self.assertEqual("text\n", html_to_markdown(html))
+        self.assertEqual("", html_to_markdown(""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from dogdripdl import media
+
+PAGE_URL = "https://www.dogdrip.net/123"
+
+IMAGE = os.urandom(1000)
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/missing.jpg":
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(IMAGE)))
+        self.end_headers()
+        self.wfile.write(IMAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ResolveSourceTests(unittest.TestCase):
+    def test_relative_url(self):
+        self.assertEqual(
+            "https://img.dogdrip.net/a.jpg",
+            media.resolve_source(PAGE_URL, "//img.dogdrip.net/a.jpg"),
+        )
+        self.assertEqual(
+            "https://www.dogdrip.net/files/a.jpg",
+            media.resolve_source(PAGE_URL, "/files/a.jpg"),
+        )
+
+    def test_largest_srcset_candidate(self):
+        self.assertEqual(
+            "https://www.dogdrip.net/large.jpg",
+            media.resolve_source(
+                PAGE_URL, "small.jpg", "small.jpg 320w, large.jpg 1280w, mid.jpg 640w"
+            ),
+        )
+        self.assertEqual(
+            "https://www.dogdrip.net/b.jpg",
+            media.resolve_source(PAGE_URL, "", "a.jpg, b.jpg 2x"),
+        )
+
+    def test_data_src_for_lazy_images(self):
+        self.assertEqual(
+            "https://www.dogdrip.net/real.jpg",
+            media.resolve_source(
+                PAGE_URL, "data:image/gif;base64,R0lG", "", "/real.jpg"
+            ),
+        )
+        self.assertEqual(
+            "https://www.dogdrip.net/real.jpg",
+            media.resolve_source(PAGE_URL, "", "", "/real.jpg"),
+        )
+
+    def test_browser_only_sources(self):
+        self.assertIsNone(media.resolve_source(PAGE_URL, "blob:https://a/b"))
+        self.assertIsNone(media.resolve_source(PAGE_URL, "data:image/gif;base64,R0lG"))
+        self.assertIsNone(media.resolve_source(PAGE_URL, ""))
+
+
+class ExtensionOfTests(unittest.TestCase):
+    def test_url_suffix_wins(self):
+        self.assertEqual(
+            "jpg", media.extension_of("https://a/b/c.JPG?x=1", "image/png")
+        )
+
+    def test_content_type_without_suffix(self):
+        self.assertEqual("png", media.extension_of("https://a/b/c", "image/png"))
+        self.assertEqual(
+            "mp4", media.extension_of("https://a/video", "video/mp4; charset=binary")
+        )
+
+    def test_unknown_content_type(self):
+        self.assertEqual("bin", media.extension_of("https://a/b/c", ""))
+
+
+class MediaFetcherTests(unittest.TestCase):
+    def setUp(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), MediaHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.base_url = f"http://127.0.0.1:{server.server_port}"
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        session = requests.Session()
+        self.addCleanup(session.close)
+        self.fetcher = media.MediaFetcher(session, workers=2)
+
+    def test_one_failure_does_not_stop_others(self):
+        medias = [
+            media.Media(
+                "img", f"{self.base_url}/{name}", os.path.join(self.tmp.name, tag)
+            )
+            for name, tag in [("a", "img_0"), ("missing.jpg", "img_1"), ("c", "img_2")]
+        ]
+
+        fetched = self.fetcher.fetch_all(medias)
+
+        self.assertEqual(medias, [f.media for f in fetched])
+        ok = [fetched[0], fetched[2]]
+        for f in ok:
+            self.assertIsNone(f.error)
+            self.assertTrue(f.path.endswith(".png"))
+            with open(f.path, "rb") as file:
+                self.assertEqual(IMAGE, file.read())
+            self.assertEqual(hashlib.sha256(IMAGE).hexdigest(), f.sha256)
+
+        self.assertIsNone(fetched[1].path)
+        self.assertIn("404", fetched[1].error)
+        self.assertEqual(["img_0.png", "img_2.png"], sorted(os.listdir(self.tmp.name)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,238 @@
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 동시에 보내는 요청 수와 호스트마다 동시에 보내는 요청 수
+WORKERS = int(os.environ.get("GET_TITLES_WORKERS", 32))
+PER_HOST = int(os.environ.get("GET_TITLES_PER_HOST", 4))
+
+TIMEOUT = (10, 20)
+CHUNK_SIZE = 4096
+
+# '</title>'이 이만큼 읽을 때까지 나오지 않으면 제목이 없는 것으로 봄
+MAX_BYTES = 256 * 1024
+
+CACHE_FILENAME = "titles.jsonl"
+
+_TITLE_PATTERN = re.compile(rb"<title[^>]*>(.*?)</title\s*>", re.IGNORECASE | re.DOTALL)
+_TITLE_END = re.compile(rb"</title\s*>", re.IGNORECASE)
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+
+def extract_title(head: bytes, encoding: Optional[str] = None) -> Optional[str]:
+    """
+    HTML 앞부분에서 `<title>` 내용을 꺼냅니다.
+
+    Args:
+        head (bytes): 응답 본문의 앞부분.
+        encoding (str or None): Content-Type 헤더의 charset. 없으면
+            `<meta charset>`을 찾고, 그것도 없으면 UTF-8로 봅니다.
+
+    Returns:
+        str or None: HTML 엔티티를 풀고 공백을 정리한 제목. 없으면 None.
+
+    Example:
+        >>> extract_title(b"<html><title>Tom &amp; Jerry</title>")
+        "Tom & Jerry"
+    """
+
+    match = _TITLE_PATTERN.search(head)
+    if not match:
+        return None
+
+    if not encoding and (meta := _META_CHARSET.search(head)):
+        encoding = meta.group(1).decode("ascii")
+
+    try:
+        title = match.group(1).decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        title = match.group(1).decode("utf-8", errors="replace")
+
+    return " ".join(html.unescape(title).split())
+
+
+def read_head(resp: requests.Response) -> bytes:
+    """
+    '</title>'이 나올 때까지만 본문을 읽습니다.
+    """
+
+    head = b""
+    for chunk in resp.iter_content(CHUNK_SIZE):
+        # 태그가 청크 경계에 걸친 경우를 위해 앞 청크의 끝부분부터 찾음
+        start = max(0, len(head) - 16)
+        head += chunk
+        if _TITLE_END.search(head, start) or len(head) >= MAX_BYTES:
+            break
+    return head
+
+
+class HostLimiter:
+    """
+    호스트마다 동시에 보내는 요청 수를 제한합니다.
+    """
+
+    def __init__(self, per_host: int) -> None:
+        self.per_host = per_host
+
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+    def semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+
+class TitleCache:
+    """
+    제목을 찾은 URL을 JSON 줄로 기록하여 다음 실행에서 다시 요청하지 않습니다.
+    """
+
+    def __init__(self, path: Optional[str]) -> None:
+        self.path = path
+        self.titles: Dict[str, str] = {}
+
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.titles[entry["url"]] = entry["title"]
+
+    def get(self, url: str) -> Optional[str]:
+        return self.titles.get(url)
+
+    def put(self, url: str, title: str):
+        if not self.path:
+            return
+
+        with self._lock:
+            self.titles[url] = title
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps({"url": url, "title": title}, ensure_ascii=False))
+                file.write("\n")
+
+
+class TitleFetcher:
+    """
+    여러 URL의 제목을 스레드 풀에서 동시에 가져옵니다.
+
+    Args:
+        workers (int): 동시에 보내는 요청 수.
+        per_host (int): 호스트마다 동시에 보내는 요청 수.
+        cache (TitleCache): 이미 찾은 제목.
+    """
+
+    def __init__(self, workers: int, per_host: int, cache: TitleCache) -> None:
+        self.workers = workers
+        self.hosts = HostLimiter(per_host)
+        self.cache = cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=per_host)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, url: str) -> str:
+        """
+        URL의 제목을 반환합니다. 가져오지 못하면 빈 문자열.
+        """
+
+        if (title := self.cache.get(url)) is not None:
+            return title
+
+        try:
+            with self.hosts.semaphore(url):
+                with self.session.get(url, timeout=TIMEOUT, stream=True) as resp:
+                    charset = requests.utils.get_encoding_from_headers(resp.headers)
+                    # 헤더에 charset이 없으면 requests는 ISO-8859-1로 보므로 쓰지 않음
+                    if "charset" not in resp.headers.get("Content-Type", ""):
+                        charset = None
+                    title = extract_title(read_head(resp), charset)
+                    ok = resp.ok
+        except requests.RequestException as err:
+            print(f"{url}: {err}", file=sys.stderr)
+            return ""
+
+        if title is None:
+            return ""
+
+        # 오류 페이지의 제목은 다음에 다시 확인
+        if ok:
+            self.cache.put(url, title)
+        return title
+
+    def fetch_all(
+        self, urls: Iterable[str], ordered: bool = True
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        (URL, 제목)을 입력 순서대로, 또는 ordered가 False이면 끝나는 대로 돌려줍니다.
+        """
+
+        urls = list(urls)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures: List[Future] = [executor.submit(self.fetch, url) for url in urls]
+            url_of = dict(zip(futures, urls))
+
+            if ordered:
+                for future in futures:
+                    yield url_of[future], future.result()
+                return
+
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield url_of[future], future.result()
+
+
+def load_urls(file_name: str) -> List[str]:
+    with open(file_name, "r") as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Print the title of every page in a list of URLs."
+    )
+    parser.add_argument("file", nargs="?", help="file with one URL per line")
+    parser.add_argument(
+        "--as-completed",
+        action="store_true",
+        help="print titles as they arrive instead of in input order",
+    )
+    parser.add_argument(
+        "--cache",
+        default=CACHE_FILENAME,
+        help=f"file to cache found titles in (default: {CACHE_FILENAME}, '' to disable)",
+    )
+    args = parser.parse_args()
+
+    file_name = args.file or input("Enter file name: ")
+
+    fetcher = TitleFetcher(WORKERS, PER_HOST, TitleCache(args.cache))
+    for url, title in fetcher.fetch_all(
+        load_urls(file_name), ordered=not args.as_completed
+    ):
+        print(f"{url} - {title}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import unittest
+from types import SimpleNamespace
+
+from get_titles.main import extract_title, read_head
+
+
+class TitleTests(unittest.TestCase):
+    def test_extract_title(self):
+        self.assertEqual(
+            "Tom & Jerry", extract_title(b"<html><TITLE>\n Tom &amp;\n Jerry </TITLE>")
+        )
+        self.assertEqual(
+            "제목",
+            extract_title(
+                '<meta charset="euc-kr"><title>제목</title>'.encode("euc-kr")
+            ),
+        )
+        self.assertIsNone(extract_title(b"<html><body>no title</body>"))
+
+    def test_read_head_stops_after_title(self):
+        read = []
+
+        def iter_content(size):
+            for chunk in [b"<html><title>a</ti", b"tle>", b"body" * 1000]:
+                read.append(chunk)
+                yield chunk
+
+        head = read_head(SimpleNamespace(iter_content=iter_content))
+
+        self.assertEqual(b"<html><title>a</title>", head)
+        self.assertEqual(2, len(read))
+
+
+if __name__ == "__main__":
+    unittest.main()
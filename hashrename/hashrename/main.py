@@ -0,0 +1,169 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from utils import hash
+from utils.index import ContentIndex
+
+# 이름을 바꾸는 단위. 한 묶음의 이름을 모두 바꾼 뒤 인덱스에 한 번에 기록함
+BATCH_SIZE = 256
+
+# 해시를 계산하는 스레드 수. None이면 CPU 수
+WORKERS: Optional[int] = None
+
+
+def expand(patterns: Iterable[str]) -> Iterator[str]:
+    """
+    인자로 받은 파일 이름과 glob 패턴을 파일 경로로 펼칩니다.
+
+    패턴에 맞는 파일이 없으면 셸처럼 패턴을 그대로 돌려줍니다.
+    """
+
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            yield from sorted(glob.glob(pattern)) or [pattern]
+        else:
+            yield pattern
+
+
+def hashed_name(file_path: str, sha256: bytes) -> str:
+    """
+    확장자를 유지한 채 파일 이름을 SHA-256으로 바꾼 경로를 반환합니다.
+
+    Example:
+        >>> hashed_name("videos/a.mp4", digest)
+        "videos/9f86d0....mp4"
+    """
+
+    file_dir, file_name = os.path.split(file_path)
+    _, dot, extension = file_name.rpartition(".")
+    new_name = sha256.hex() + (f".{extension}" if dot else "")
+    return os.path.join(file_dir or ".", new_name)
+
+
+def readable_files(paths: Iterable[str]) -> Iterator[str]:
+    for path in paths:
+        if not os.path.isfile(path):
+            print(f"File {path} does not exist.")
+            continue
+
+        if not os.access(path, os.R_OK):
+            print(f"File {path} cannot be read.")
+            continue
+
+        yield path
+
+
+def rename_batch(
+    batch: List[Tuple[str, str, str]], dry_run: bool, index: Optional[ContentIndex]
+):
+    """
+    (원래 경로, 새 경로, SHA-256) 묶음의 이름을 바꿉니다.
+    """
+
+    indexed = []
+
+    for file_path, new_path, sha256 in batch:
+        # 같은 내용의 파일이 앞에서 먼저 이 이름을 차지했을 수도 있으므로 바꾸기 직전에 확인
+        if os.path.exists(new_path):
+            print(f"File {new_path} already exists.")
+            if not dry_run:
+                indexed.append((sha256, new_path))
+            continue
+
+        if dry_run:
+            print(f"{file_path} -> {new_path}")
+            continue
+
+        try:
+            os.rename(file_path, new_path)
+        except OSError as err:
+            print(f"File {file_path} cannot be renamed: {err}")
+            continue
+        indexed.append((sha256, new_path))
+
+    if index and indexed:
+        index.add_many(indexed)
+
+
+def hashrename(
+    patterns: Iterable[str], dry_run: bool = False, index_path: Optional[str] = None
+) -> Tuple[int, int]:
+    """
+    파일 이름을 SHA-256으로 바꿉니다.
+
+    해시는 스레드 풀에서 동시에 계산하되 결과는 입력 순서대로 받아 오므로,
+    출력과 이름 바꾸기 순서는 항상 같습니다. 이름 바꾸기는 BATCH_SIZE개씩 묶어서
+    처리합니다. 도중에 읽거나 이름을 바꿀 수 없게 된
+    파일은 알리고 건너뜁니다.
+
+    Args:
+        patterns (Iterable[str]): 파일 이름 또는 glob 패턴.
+        dry_run (bool): 이름을 바꾸지 않고 바꿀 내용만 출력합니다.
+        index_path (str or None): 바꾼 파일을 기록할 콘텐츠 인덱스 경로.
+
+    Returns:
+        Tuple[int, int]: 해시를 계산한 파일 수와 전체 바이트 수.
+    """
+
+    index = ContentIndex(index_path) if index_path else None
+    paths = list(readable_files(expand(patterns)))
+
+    total_files = 0
+    total_bytes = 0
+    batch: List[Tuple[str, str, str]] = []
+
+    def skip(file_path: str, err: OSError):
+        print(f"File {file_path} cannot be read: {err}")
+
+    for file_path, digests in hash.calculate_many(
+        paths, workers=WORKERS, on_error=skip
+    ):
+        sha256 = digests["sha256"]
+        try:
+            total_bytes += os.path.getsize(file_path)
+        except OSError as err:
+            skip(file_path, err)
+            continue
+        total_files += 1
+
+        batch.append((file_path, hashed_name(file_path, sha256), sha256.hex()))
+        if len(batch) >= BATCH_SIZE:
+            rename_batch(batch, dry_run, index)
+            batch = []
+
+    rename_batch(batch, dry_run, index)
+
+    return total_files, total_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rename files to their SHA-256 hash, keeping the extension."
+    )
+    parser.add_argument("-d", action="store_true", help="dry run")
+    parser.add_argument("-i", metavar="index_file", help="content index to update")
+    parser.add_argument("patterns", nargs="*", metavar="file_or_glob_pattern")
+    args = parser.parse_args()
+
+    if not args.patterns:
+        print(f"Usage: {parser.prog} [-d] [-i index_file] file_or_glob_pattern ...")
+        sys.exit(1)
+
+    started = time.monotonic()
+    files, size = hashrename(args.patterns, dry_run=args.d, index_path=args.i)
+    elapsed = max(time.monotonic() - started, 1e-9)
+
+    mb = size / 1024 / 1024
+    print(
+        f"{files} files, {mb:.1f} MB in {elapsed:.2f}s"
+        f" ({files / elapsed:.1f} files/s, {mb / elapsed:.1f} MB/s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
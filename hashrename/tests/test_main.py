@@ -0,0 +1,89 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import hash
+from utils.index import ContentIndex
+
+from hashrename import main
+
+
+class HashRenameTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def save(self, name: str, content: bytes) -> str:
+        path = os.path.join(self.dir, name)
+        with open(path, "wb") as file:
+            file.write(content)
+        return path
+
+    def test_hashed_name_keeps_extension(self):
+        digest = bytes(32)
+        self.assertEqual(
+            os.path.join("a", digest.hex() + ".mp4"),
+            main.hashed_name(os.path.join("a", "b.c.mp4"), digest),
+        )
+        self.assertEqual(
+            os.path.join(".", digest.hex()), main.hashed_name("noext", digest)
+        )
+
+    def test_rename_and_duplicates(self):
+        self.save("a.ts", b"same")
+        self.save("b.ts", b"same")
+        self.save("c.txt", b"other")
+        index_path = os.path.join(self.dir, "index.jsonl")
+
+        with mock.patch.object(main, "BATCH_SIZE", 2):
+            files, size = main.hashrename(
+                [os.path.join(self.dir, "*.ts"), os.path.join(self.dir, "c.txt")],
+                index_path=index_path,
+            )
+
+        self.assertEqual((3, 13), (files, size))
+
+        same = hashlib.sha256(b"same").hexdigest()
+        other = hashlib.sha256(b"other").hexdigest()
+        self.assertEqual(
+            sorted([f"{same}.ts", f"{other}.txt", "b.ts", "index.jsonl"]),
+            sorted(os.listdir(self.dir)),
+        )
+        self.assertIsNotNone(ContentIndex(index_path).find_sha256(other))
+
+    def test_unreadable_file_is_skipped(self):
+        self.save("a.ts", b"content")
+        self.save("b.ts", b"broken")
+        broken = os.path.join(self.dir, "b.ts")
+
+        calculate_digests = hash.calculate_digests
+
+        def fail_for_broken(path, *args, **kwargs):
+            if path == broken:
+                raise PermissionError(13, "Permission denied", path)
+            return calculate_digests(path, *args, **kwargs)
+
+        with mock.patch.object(hash, "calculate_digests", fail_for_broken):
+            files, _ = main.hashrename([os.path.join(self.dir, "*.ts")])
+
+        self.assertEqual(1, files)
+        self.assertEqual(
+            sorted([hashlib.sha256(b"content").hexdigest() + ".ts", "b.ts"]),
+            sorted(os.listdir(self.dir)),
+        )
+
+    def test_dry_run_does_not_rename(self):
+        path = self.save("a.ts", b"content")
+
+        main.hashrename([path], dry_run=True)
+
+        self.assertEqual(["a.ts"], os.listdir(self.dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,273 @@
+"""
+벤치마크용으로 합성 HLS 재생 목록을 제공하는 로컬 HTTP 서버.
+
+    python benchmarks/hls_origin.py [--port 8700] [--segments 100] [--aes] ...
+
+`/index.m3u8`은 segments개의 세그먼트를 가진 VOD 재생 목록입니다. 세그먼트
+내용은 seed로 정해지므로 실행할 때마다 같고, --aes이면 AES-128로 암호화하여
+`/key.bin`의 키로 풀도록 합니다. 응답마다 지연을 넣거나, 서버 전체의 전송량을
+제한하거나, 세그먼트 요청의 일부를 503으로 실패시킬 수 있습니다.
+"""
+
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+
+AES_BLOCK_SIZE = 16
+CHUNK_SIZE = 64 * 1024
+TARGET_DURATION = 4
+
+
+class _Pacer:
+    """
+    여러 연결이 함께 지키는 초당 바이트 제한.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._available = time.monotonic()
+
+    def consume(self, nbytes: int):
+        if self.rate <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._available, now)
+            self._available = until = start + nbytes / self.rate
+        time.sleep(max(0.0, until - now))
+
+
+class HlsOrigin:
+    """
+    합성 HLS 재생 목록과 세그먼트를 제공합니다.
+
+    Args:
+        segments (int): 세그먼트 수.
+        segment_size (int): 세그먼트 하나의 평문 크기(바이트).
+        encrypted (bool): AES-128로 암호화할지 여부. cryptography 패키지가 필요합니다.
+        latency (float): 응답 헤더를 보내기 전에 기다리는 시간(초).
+        bandwidth (float): 서버 전체의 초당 바이트. 0이면 무제한.
+        error_rate (float): 세그먼트 요청을 503으로 실패시킬 확률.
+        seed (int): 세그먼트 내용과 오류를 정하는 난수 시드.
+        port (int): 들을 포트. 0이면 빈 포트.
+
+    Example:
+        >>> with HlsOrigin(segments=10, segment_size=512 * 1024) as origin:
+        ...     print(origin.url)
+        http://127.0.0.1:41234/index.m3u8
+    """
+
+    def __init__(
+        self,
+        segments: int = 100,
+        segment_size: int = 512 * 1024,
+        encrypted: bool = False,
+        latency: float = 0.0,
+        bandwidth: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        port: int = 0,
+    ) -> None:
+        self.segments = segments
+        self.segment_size = segment_size
+        self.encrypted = encrypted
+        self.latency = latency
+        self.error_rate = error_rate
+
+        rng = random.Random(seed)
+        # 세그먼트마다 앞 8바이트만 순번으로 바꿔 쓰므로 메모리에는 한 벌만 둠
+        self._body = rng.randbytes(segment_size)
+        self._key = rng.randbytes(AES_BLOCK_SIZE)
+        self._errors = random.Random(seed + 1)
+        self._lock = threading.Lock()
+        self._pacer = _Pacer(bandwidth)
+
+        self.requests = 0
+        self.failures = 0
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/index.m3u8"
+
+    def plain_segment(self, index: int) -> bytes:
+        return index.to_bytes(8, "big") + self._body[8:]
+
+    def segment(self, index: int) -> bytes:
+        plain = self.plain_segment(index)
+        if not self.encrypted:
+            return plain
+
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        # IV가 없으면 미디어 시퀀스 번호가 IV
+        iv = index.to_bytes(AES_BLOCK_SIZE, "big")
+        padder = padding.PKCS7(AES_BLOCK_SIZE * 8).padder()
+        encryptor = Cipher(algorithms.AES(self._key), modes.CBC(iv)).encryptor()
+        padded = padder.update(plain) + padder.finalize()
+        return encryptor.update(padded) + encryptor.finalize()
+
+    def playlist(self) -> bytes:
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{TARGET_DURATION}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        if self.encrypted:
+            lines.append('#EXT-X-KEY:METHOD=AES-128,URI="key.bin"')
+        for index in range(self.segments):
+            lines += [f"#EXTINF:{TARGET_DURATION}.0,", f"{index}.ts"]
+        lines.append("#EXT-X-ENDLIST")
+        return ("\n".join(lines) + "\n").encode()
+
+    def expected_sha256(self) -> str:
+        """
+        모든 세그먼트를 복호화하여 이어 붙인 파일의 SHA-256.
+        """
+
+        digest = hashlib.sha256()
+        for index in range(self.segments):
+            digest.update(self.plain_segment(index))
+        return digest.hexdigest()
+
+    def _count(self, failed: bool = False):
+        with self._lock:
+            self.requests += 1
+            self.failures += failed
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self._errors.random() < self.error_rate
+
+    def _handler(self):
+        origin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+
+                if origin.latency:
+                    time.sleep(origin.latency)
+
+                failed = False
+                if path == "/index.m3u8":
+                    self.respond(origin.playlist(), "application/vnd.apple.mpegurl")
+                elif path == "/key.bin" and origin.encrypted:
+                    self.respond(origin._key, "application/octet-stream")
+                elif path.endswith(".ts") and path[1:-3].isdigit():
+                    index = int(path[1:-3])
+                    if index >= origin.segments:
+                        self.send_error(404)
+                    elif origin._should_fail():
+                        failed = True
+                        self.send_error(503)
+                    else:
+                        self.respond(origin.segment(index), "video/mp2t")
+                else:
+                    self.send_error(404)
+                origin._count(failed)
+
+            def respond(self, body: bytes, content_type: str):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                for chunk in _chunks(body):
+                    origin._pacer.consume(len(chunk))
+                    self.wfile.write(chunk)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "HlsOrigin":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="hls-origin", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "HlsOrigin":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _chunks(body: bytes) -> Iterator[memoryview]:
+    view = memoryview(body)
+    for start in range(0, len(view), CHUNK_SIZE):
+        yield view[start : start + CHUNK_SIZE]
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--segments", type=int, default=100, help="segments per playlist"
+    )
+    parser.add_argument(
+        "--segment-size", type=int, default=512, help="plain segment size in KB"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="delay before every response in ms"
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=float,
+        default=0.0,
+        help="server-wide cap in MB/s, 0 is no limit",
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="share of segments answered 503"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def origin_from(args: argparse.Namespace, encrypted: bool, port: int = 0) -> HlsOrigin:
+    return HlsOrigin(
+        segments=args.segments,
+        segment_size=args.segment_size * 1024,
+        encrypted=encrypted,
+        latency=args.latency / 1000,
+        bandwidth=args.bandwidth * 1024 * 1024,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        port=port,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic HLS playlist.")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--aes", action="store_true", help="encrypt with AES-128")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with origin_from(args, args.aes, args.port) as origin:
+        print(f"{origin.url} (sha256 {origin.expected_sha256()})", flush=True)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
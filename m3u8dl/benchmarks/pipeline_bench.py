@@ -0,0 +1,239 @@
+"""
+m3u8dl 전체 과정을 로컬 HLS 서버(hls_origin.py)에 대해 실행하여 측정합니다.
+
+    python benchmarks/pipeline_bench.py [--mode plain|aes|both] [--segments 200]
+        [--segment-size 512] [--latency 20] [--bandwidth 50] [--error-rate 0.01]
+        [--repeat 3] [--json results.json] [--rate 1000] [--max-backoff 1]
+
+시나리오마다 빈 임시 디렉토리에서 `python -m m3u8dl.main`을 새 프로세스로 실행하고,
+최종 `<sha256>.ts` 파일이 생길 때까지의 시간, 초당 세그먼트 수, MB/s, 최대 RSS를
+출력합니다. 받은 파일의 SHA-256이 서버가 만든 평문과 같은지도 확인합니다.
+네트워크에 접근하지 않습니다.
+
+m3u8dl 설정(M3U8DL_WORKERS 등)은 이 스크립트를 실행한 환경 변수를 그대로
+물려받습니다. 다만 결과가 요청 속도 제한에 좌우되지 않도록 요청 속도는 --rate로,
+실패 후 백오프의 상한은 --max-backoff로 고정합니다(0이면 물려받음). 실제로 쓴
+제한 설정은 결과와 함께 출력하고 JSON에도 기록합니다. 이전 결과와 섞이지 않도록
+인덱스와 해시 캐시는 끕니다.
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+from hls_origin import HlsOrigin, add_arguments, origin_from
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 최종 파일이 생겼는지 확인하는 간격(초)
+POLL_INTERVAL = 0.01
+
+# 결과에 함께 남기는 m3u8dl의 제한 설정과 기본값
+LIMITER_SETTINGS = {
+    "M3U8DL_RATE": "2",
+    "M3U8DL_MIN_RATE": "0.2",
+    "M3U8DL_MAX_RATE": "50",
+    "M3U8DL_MAX_BACKOFF": "60",
+    "M3U8DL_BANDWIDTH": "0",
+    "M3U8DL_PER_HOST": "4",
+    "M3U8DL_MAX_CONNECTIONS": "16",
+    "M3U8DL_WORKERS": "4",
+}
+
+
+@dataclass
+class Result:
+    mode: str
+    segments: int
+    size: int
+    seconds: float
+    peak_rss: int
+    requests: int
+    failures: int
+    ok: bool
+
+    @property
+    def segments_per_sec(self) -> float:
+        return self.segments / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.size / 1024 / 1024 / self.seconds if self.seconds else 0.0
+
+
+def limiter_settings(rate: float, max_backoff: float) -> Dict[str, str]:
+    """
+    m3u8dl에 넘길 제한 설정을 반환합니다. 환경 변수에 없는 값은 기본값입니다.
+
+    rate가 0보다 크면 요청 속도를 조절하지 않도록 처음, 최소, 최대 속도를 모두
+    rate로 고정하고, max_backoff가 0보다 크면 백오프의 상한을 고정합니다.
+    """
+
+    settings = {
+        name: os.environ.get(name, default)
+        for name, default in LIMITER_SETTINGS.items()
+    }
+    if rate > 0:
+        for name in ("M3U8DL_RATE", "M3U8DL_MIN_RATE", "M3U8DL_MAX_RATE"):
+            settings[name] = f"{rate:g}"
+    if max_backoff > 0:
+        settings["M3U8DL_MAX_BACKOFF"] = f"{max_backoff:g}"
+    return settings
+
+
+def run_pipeline(origin: HlsOrigin, mode: str, settings: Dict[str, str]) -> Result:
+    """
+    origin의 재생 목록 하나를 settings로 m3u8dl로 받고 결과를 측정합니다.
+    """
+
+    with tempfile.TemporaryDirectory(prefix="m3u8dl-bench-") as work_dir:
+        with open(os.path.join(work_dir, "m3u8_list.txt"), "w") as file:
+            file.write(origin.url + "\n")
+
+        # 임시 디렉토리에서 실행하므로 상대 경로는 절대 경로로 바꿈
+        python_path = [PROJECT_DIR] + [
+            os.path.abspath(path)
+            for path in os.environ.get("PYTHONPATH", "").split(os.pathsep)
+            if path
+        ]
+        env = {
+            **os.environ,
+            **settings,
+            "PYTHONPATH": os.pathsep.join(python_path),
+            "M3U8DL_INDEX": "",
+            "UTILS_HASH_CACHE": "",
+        }
+
+        log_path = os.path.join(work_dir, "m3u8dl.log")
+        with open(log_path, "wb") as log:
+            started = time.monotonic()
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "m3u8dl.main"],
+                cwd=work_dir,
+                env=env,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+
+            # 최종 파일이 생긴 시각을 재기 위해 프로세스가 끝날 때까지 디렉토리를
+            # 확인하고, wait4()로 끝난 프로세스의 최대 RSS를 받음
+            finished = None
+            while True:
+                pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+                if finished is None and glob.glob(os.path.join(work_dir, "*.ts")):
+                    finished = time.monotonic()
+                if pid:
+                    break
+                time.sleep(POLL_INTERVAL)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+
+        if finished is None:
+            finished = time.monotonic()
+
+        outputs = glob.glob(os.path.join(work_dir, "*.ts"))
+        expected = f"{origin.expected_sha256()}.ts"
+        ok = [os.path.basename(path) for path in outputs] == [expected]
+        if not ok:
+            with open(log_path, "rb") as log:
+                print(log.read()[-2000:].decode(errors="replace"), file=sys.stderr)
+
+        size = os.path.getsize(outputs[0]) if outputs else 0
+
+    return Result(
+        mode=mode,
+        segments=origin.segments,
+        size=size,
+        seconds=finished - started,
+        # 리눅스에서 ru_maxrss는 KB 단위
+        peak_rss=rusage.ru_maxrss * 1024,
+        requests=origin.requests,
+        failures=origin.failures,
+        ok=ok,
+    )
+
+
+def print_results(results: List[Result]):
+    print(
+        f"{'mode':<6}{'segs':>6}{'MB':>9}{'seconds':>10}{'seg/s':>9}"
+        f"{'MB/s':>9}{'RSS MB':>9}{'reqs':>7}{'503s':>6}  ok"
+    )
+    for r in results:
+        print(
+            f"{r.mode:<6}{r.segments:>6}{r.size / 1024 / 1024:>9.1f}{r.seconds:>10.2f}"
+            f"{r.segments_per_sec:>9.1f}{r.mb_per_sec:>9.1f}"
+            f"{r.peak_rss / 1024 / 1024:>9.1f}{r.requests:>7}{r.failures:>6}  {r.ok}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the m3u8dl pipeline against a local HLS origin."
+    )
+    parser.add_argument("--mode", choices=["plain", "aes", "both"], default="both")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=1000,
+        help="pin requests per second per host, 0 to inherit M3U8DL_*RATE",
+    )
+    parser.add_argument(
+        "--max-backoff",
+        type=float,
+        default=1,
+        help="pin the retry backoff cap in seconds, 0 to inherit",
+    )
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    modes = ["plain", "aes"] if args.mode == "both" else [args.mode]
+    settings = limiter_settings(args.rate, args.max_backoff)
+
+    results: List[Result] = []
+    for mode in modes:
+        for _ in range(args.repeat):
+            with origin_from(args, encrypted=mode == "aes") as origin:
+                results.append(run_pipeline(origin, mode, settings))
+
+    print(" ".join(f"{name}={value}" for name, value in settings.items()))
+    print_results(results)
+
+    if args.repeat > 1:
+        for mode in modes:
+            seconds = [r.seconds for r in results if r.mode == mode]
+            print(f"{mode}: median {statistics.median(seconds):.2f}s")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(
+                {
+                    "options": vars(args),
+                    "settings": settings,
+                    "results": [
+                        {
+                            **asdict(r),
+                            "segments_per_sec": r.segments_per_sec,
+                            "mb_per_sec": r.mb_per_sec,
+                        }
+                        for r in results
+                    ],
+                },
+                file,
+                indent=2,
+            )
+
+    if not all(r.ok for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
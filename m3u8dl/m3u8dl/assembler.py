@@ -0,0 +1,205 @@
+import hashlib
+import os
+import queue
+import threading
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+CHUNK_SIZE = 64 * 1024
+AES_BLOCK_SIZE = 16
+
+# 단계 사이에 쌓아둘 수 있는 최대 항목 수
+QUEUE_SIZE = 16
+
+
+def is_native_available() -> bool:
+    """
+    ffmpeg 없이 AES-128 세그먼트를 복호화할 수 있는지 확인합니다.
+    """
+
+    try:
+        import cryptography.hazmat.primitives.ciphers  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def segment_iv(iv: Optional[str], sequence: int) -> bytes:
+    """
+    세그먼트를 복호화할 IV를 반환합니다.
+
+    '#EXT-X-KEY'에 IV가 없으면 명세에 따라 세그먼트의 미디어 시퀀스 번호를
+    16바이트 빅 엔디언 정수로 사용합니다.
+
+    Args:
+        iv (str or None): '#EXT-X-KEY'의 IV 속성 값 (예: "0x0000...01").
+        sequence (int): 세그먼트의 미디어 시퀀스 번호.
+
+    Returns:
+        bytes: 16바이트 IV.
+
+    Example:
+        >>> segment_iv(None, 1)
+        b"\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x01"
+    """
+
+    if iv is None:
+        return sequence.to_bytes(AES_BLOCK_SIZE, "big")
+
+    hex_iv = iv[2:] if iv.lower().startswith("0x") else iv
+    return bytes.fromhex(hex_iv.rjust(AES_BLOCK_SIZE * 2, "0"))
+
+
+def decrypt_chunks(src: BinaryIO, key: bytes, iv: bytes) -> Iterator[bytes]:
+    """
+    AES-128-CBC로 암호화된 세그먼트를 청크 단위로 복호화합니다.
+    """
+
+    from cryptography.hazmat.primitives import padding
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+    decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+    unpadder = padding.PKCS7(AES_BLOCK_SIZE * 8).unpadder()
+
+    for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+        yield unpadder.update(decryptor.update(chunk))
+    yield unpadder.update(decryptor.finalize()) + unpadder.finalize()
+
+
+class Assembler:
+    """
+    받은 세그먼트를 순서대로 복호화하여 하나의 TS 파일에 이어 붙입니다.
+
+    세그먼트 도착, 복호화, 파일 쓰기는 크기가 제한된 큐로 연결된 별도의
+    스레드에서 동시에 진행됩니다. 세그먼트는 어떤 순서로 도착해도 되며, 앞선
+    세그먼트가 모두 도착한 구간부터 바로 복호화하여 덧붙입니다. 출력 파일의
+    SHA-256은 쓰는 동안 함께 계산합니다.
+
+    Args:
+        out_path (str): 출력 TS 파일 경로.
+        ciphers (List[Optional[Tuple[bytes, bytes]]]): 세그먼트마다 복호화에
+            쓸 (AES-128 키, IV). 암호화되지 않은 세그먼트는 None. 라이브
+            재생 목록처럼 나중에 늘어나는 경우 extend()로 추가합니다.
+        queue_size (int): 단계 사이 큐의 최대 길이.
+        remove_segments (bool): 이어 붙인 세그먼트 파일을 바로 지웁니다.
+    """
+
+    def __init__(
+        self,
+        out_path: str,
+        ciphers: List[Optional[Tuple[bytes, bytes]]],
+        queue_size: int = QUEUE_SIZE,
+        remove_segments: bool = False,
+    ) -> None:
+        self.out_path = out_path
+        self.ciphers = list(ciphers)
+        self.remove_segments = remove_segments
+
+        self._arrived: "queue.Queue[Optional[Tuple[int, str]]]" = queue.Queue(
+            queue_size
+        )
+        self._decrypted: "queue.Queue[Optional[bytes]]" = queue.Queue(queue_size)
+        self._error: Optional[BaseException] = None
+        self._next = 0
+        self._digest = hashlib.sha256()
+        self._out = open(out_path, "wb")
+
+        self._decrypt_thread = threading.Thread(target=self._decrypt_loop, daemon=True)
+        self._write_thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._decrypt_thread.start()
+        self._write_thread.start()
+
+    def extend(self, ciphers: List[Optional[Tuple[bytes, bytes]]]):
+        """
+        뒤에 이어질 세그먼트들의 복호화 정보를 추가합니다.
+        """
+
+        self.ciphers.extend(ciphers)
+
+    def add(self, index: int, seg_path: str):
+        """
+        index번째 세그먼트가 seg_path에 저장되었음을 알립니다.
+        """
+
+        if self._error:
+            raise self._error
+
+        self._arrived.put((index, seg_path))
+
+    def _decrypt_loop(self):
+        pending: Dict[int, str] = {}
+
+        while (item := self._arrived.get()) is not None:
+            # 오류가 난 뒤에도 add()가 막히지 않도록 큐는 계속 비움
+            if self._error:
+                continue
+
+            index, seg_path = item
+            pending[index] = seg_path
+
+            try:
+                while self._next in pending:
+                    for chunk in self._read(self._next, pending.pop(self._next)):
+                        self._decrypted.put(chunk)
+                    self._next += 1
+            except BaseException as err:
+                self._error = err
+
+        self._decrypted.put(None)
+
+    def _read(self, index: int, seg_path: str) -> Iterator[bytes]:
+        with open(seg_path, "rb") as src:
+            if cipher := self.ciphers[index]:
+                yield from decrypt_chunks(src, *cipher)
+            else:
+                yield from iter(lambda: src.read(CHUNK_SIZE), b"")
+
+        if self.remove_segments:
+            os.remove(seg_path)
+
+    def _write_loop(self):
+        while (chunk := self._decrypted.get()) is not None:
+            if self._error:
+                continue
+
+            try:
+                self._out.write(chunk)
+                self._digest.update(chunk)
+            except BaseException as err:
+                self._error = err
+
+    def sha256(self) -> bytes:
+        """
+        출력 파일의 SHA-256 해시 값을 반환합니다. close() 후에 호출해야 합니다.
+        """
+
+        return self._digest.digest()
+
+    def _stop(self):
+        self._arrived.put(None)
+        self._decrypt_thread.join()
+        self._write_thread.join()
+        self._out.close()
+
+    def abort(self):
+        """
+        스레드를 멈추고 출력 파일을 닫습니다. 세그먼트를 받다가 실패했을 때
+        그 오류를 가리지 않도록 빠진 세그먼트나 쓰기 오류는 확인하지 않습니다.
+        """
+
+        self._stop()
+
+    def close(self):
+        """
+        남은 세그먼트를 모두 쓰고 출력 파일을 닫습니다.
+        오류가 있었거나 빠진 세그먼트가 있으면 예외를 발생시킵니다.
+        """
+
+        self._stop()
+
+        if self._error:
+            raise self._error
+
+        if self._next != len(self.ciphers):
+            raise Exception(
+                f"세그먼트 누락: {self._next}/{len(self.ciphers)}개만 이어 붙였습니다"
+            )
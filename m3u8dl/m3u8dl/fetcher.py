@@ -0,0 +1,115 @@
+import logging
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Tuple
+from urllib.parse import urlparse
+
+log = logging.getLogger()
+
+
+@dataclass
+class Fetched:
+    size: int
+    sha256: bytes
+
+
+class HostLimiter:
+    """
+    호스트별, 그리고 전체 동시 연결 수를 제한합니다.
+
+    여러 작업이 하나의 HostLimiter를 공유하면 작업 수와 관계없이 제한이
+    지켜집니다.
+
+    Args:
+        per_host (int): 한 호스트에 동시에 열 수 있는 최대 연결 수.
+        total (int): 모든 호스트를 합친 최대 연결 수. 0이면 제한하지 않습니다.
+    """
+
+    def __init__(self, per_host: int, total: int = 0) -> None:
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._total = threading.BoundedSemaphore(total) if total > 0 else None
+
+    def _semaphore_of(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        semaphore = self._semaphore_of(urlparse(url).netloc)
+        with semaphore:
+            if self._total is None:
+                yield
+            else:
+                with self._total:
+                    yield
+
+
+class SegmentFetcher:
+    """
+    세그먼트를 스레드 풀에서 동시에 다운로드하여 각자의 경로에 저장합니다.
+
+    Args:
+        fetch (Callable[[str, str], Fetched]): URL의 내용을 경로에 저장하는 함수.
+        workers (int): 동시에 실행할 작업자 수.
+        hosts (HostLimiter): 연결 수 제한. 여러 작업이 공유할 수 있습니다.
+        label (str): 진행 상황 로그 앞에 붙일 이름.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, str], Fetched],
+        workers: int,
+        hosts: HostLimiter,
+        label: str = "",
+    ) -> None:
+        self.fetch = fetch
+        self.workers = max(1, workers)
+        self.hosts = hosts
+        self.label = f"[{label}] " if label else ""
+
+        self._lock = threading.Lock()
+        self._done = 0
+        self._total = 0
+
+    def fetch_all(self, segments: List[Tuple[str, str]]) -> None:
+        """
+        주어진 (URL, 저장 경로) 목록을 모두 다운로드합니다.
+
+        하나라도 실패하면 남은 작업을 취소하고 그 예외를 다시 발생시킵니다.
+        """
+
+        self._done = 0
+        self._total = len(segments)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(self._fetch_one, seg_url, seg_path)
+                for seg_url, seg_path in segments
+            ]
+            done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+
+            for future in not_done:
+                future.cancel()
+
+            for future in done:
+                if err := future.exception():
+                    raise err
+
+    def _fetch_one(self, seg_url: str, seg_path: str) -> None:
+        with self.hosts.slot(seg_url):
+            fetched = self.fetch(seg_url, seg_path)
+
+        with self._lock:
+            self._done += 1
+            done = self._done
+
+        seg_size_in_mb = fetched.size / 1024 / 1024
+        log.info(
+            f"{self.label}다운로드 완료({done}/{self._total}), {seg_size_in_mb:.3} MB"
+        )
@@ -0,0 +1,74 @@
+import logging
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from m3u8dl import m3u8
+
+if TYPE_CHECKING:
+    import requests
+
+log = logging.getLogger()
+
+
+class LivePlaylist:
+    """
+    라이브/이벤트 재생 목록을 다시 받아 새로 추가된 세그먼트만 돌려줍니다.
+
+    이전 응답의 `ETag`와 `Last-Modified`로 조건부 요청을 보내므로, 재생 목록이
+    바뀌지 않았으면 서버는 본문 없이 304로 응답합니다. 이미 본 세그먼트는
+    미디어 시퀀스 번호로 걸러냅니다.
+
+    Args:
+        get (Callable): 추가 요청 헤더를 받아 재생 목록 응답을 반환하는 함수.
+            응답은 `status_code`, `headers`, `content`를 가져야 합니다.
+    """
+
+    def __init__(self, get: Callable[[Dict[str, str]], "requests.Response"]) -> None:
+        self.get = get
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+
+        self.last_sequence = -1
+        self.target_duration: Optional[int] = None
+        self.ended = False
+
+    def poll(self) -> List[m3u8.Segment]:
+        """
+        재생 목록을 다시 받아 새 세그먼트를 반환합니다. 바뀌지 않았으면 빈 목록.
+        """
+
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        resp = self.get(headers)
+        if resp.status_code == 304:
+            return []
+
+        self.etag = resp.headers.get("ETag")
+        self.last_modified = resp.headers.get("Last-Modified")
+
+        return self.update(m3u8.parse(resp.content))
+
+    def update(self, playlist: m3u8.Playlist) -> List[m3u8.Segment]:
+        """
+        받은 재생 목록에서 아직 보지 못한 세그먼트를 반환합니다.
+        """
+
+        self.ended = playlist.ended
+        if playlist.target_duration:
+            self.target_duration = playlist.target_duration
+
+        new_segments = [s for s in playlist.segments if s.sequence > self.last_sequence]
+        if not new_segments:
+            return []
+
+        first = new_segments[0].sequence
+        if self.last_sequence >= 0 and first > self.last_sequence + 1:
+            log.warning(
+                f"세그먼트 {self.last_sequence + 1}~{first - 1}이 재생 목록에서 사라져 받지 못했습니다"
+            )
+
+        self.last_sequence = new_segments[-1].sequence
+        return new_segments
@@ -1,8 +1,8 @@
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import timedelta
 from enum import Enum
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 
 class EncryptionMethod(Enum):
@@ -10,16 +10,126 @@ class EncryptionMethod(Enum):
     > The methods defined are: NONE, AES-128, and SAMPLE-AES.
     """
 
-    NONE = "None"
+    NONE = "NONE"
     AES = "AES-128"
     SAMPLE = "SAMPLE-AES"
 
 
-@dataclass
+@dataclass(frozen=True)
 class ExtXKeyInfo:
     method: EncryptionMethod
+    uri: Optional[str]
+    iv: Optional[str]
+    keyformat: str = "identity"
+
+
+@dataclass
+class ByteRange:
+    length: int
+    offset: int
+
+    def header(self) -> str:
+        """
+        HTTP `Range` 헤더 값을 반환합니다.
+
+        Example:
+            >>> ByteRange(length=100, offset=200).header()
+            "bytes=200-299"
+        """
+
+        return f"bytes={self.offset}-{self.offset + self.length - 1}"
+
+
+@dataclass
+class Segment:
+    uri: str
+    duration: float
+    sequence: int
+    key: Optional[ExtXKeyInfo] = None
+    byte_range: Optional[ByteRange] = None
+    discontinuity: bool = False
+
+
+@dataclass
+class Variant:
+    """
+    마스터 재생 목록의 '#EXT-X-STREAM-INF' 하나.
+    """
+
     uri: str
-    iv: str
+    bandwidth: int
+    resolution: Optional[Tuple[int, int]] = None
+    codecs: Optional[str] = None
+
+    @property
+    def pixels(self) -> int:
+        if self.resolution is None:
+            return 0
+        width, height = self.resolution
+        return width * height
+
+
+@dataclass
+class Playlist:
+    target_duration: Optional[int] = None
+    media_sequence: int = 0
+    ended: bool = False
+    playlist_type: Optional[str] = None
+    segments: List[Segment] = field(default_factory=list)
+    variants: List[Variant] = field(default_factory=list)
+
+    @property
+    def is_master(self) -> bool:
+        return bool(self.variants)
+
+    @property
+    def keys(self) -> List[ExtXKeyInfo]:
+        """
+        세그먼트에 쓰인 키를 처음 나온 순서대로 중복 없이 반환합니다.
+        """
+
+        keys: Dict[ExtXKeyInfo, None] = {}
+        for segment in self.segments:
+            if segment.key:
+                keys[segment.key] = None
+        return list(keys)
+
+    @property
+    def is_encrypted(self) -> bool:
+        return bool(self.keys)
+
+    @property
+    def is_live(self) -> bool:
+        """
+        세그먼트가 계속 추가될 재생 목록인지 여부.
+        #EXT-X-ENDLIST가 없고 #EXT-X-PLAYLIST-TYPE이 VOD가 아니면 라이브입니다.
+        """
+
+        return not self.ended and self.playlist_type != "VOD"
+
+    @property
+    def playtime(self) -> timedelta:
+        return timedelta(seconds=int(sum(s.duration for s in self.segments)))
+
+
+_ATTRIBUTE_PATTERN = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+def parse_attributes(string: str) -> Dict[str, str]:
+    """
+    `NAME=VALUE,NAME="VALUE"` 형식의 속성 목록을 딕셔너리로 변환합니다.
+
+    따옴표로 감싼 값은 따옴표를 벗기며, 값 안의 쉼표는 구분자로 보지 않습니다.
+
+    Example:
+        >>> parse_attributes('METHOD=AES-128,URI="key?a=1,b=2"')
+        {"METHOD": "AES-128", "URI": "key?a=1,b=2"}
+    """
+
+    return {
+        name: value[1:-1] if value.startswith('"') else value
+        for name, value in _ATTRIBUTE_PATTERN.findall(string)
+    }
 
 
 def parse_ext_x_key_info(string: str) -> Optional[ExtXKeyInfo]:
@@ -33,73 +143,224 @@ def parse_ext_x_key_info(string: str) -> Optional[ExtXKeyInfo]:
         ExtXKeyInfo or None: 추출된 정보를 담은 ExtXKeyInfo 데이터 클래스 객체 또는 None.
     """
 
-    pattern = r'#EXT-X-KEY:METHOD=(\w+),URI="([^"]+)",IV=([^\s,]+)'
+    tag, _, value = string.strip().partition(":")
+    if tag != "#EXT-X-KEY":
+        return None
 
-    if match := re.match(pattern, string):
-        method = match.group(1)
-        uri = match.group(2)
-        iv = match.group(3)
+    attributes = parse_attributes(value)
 
-        return ExtXKeyInfo(method=EncryptionMethod(method), uri=uri, iv=iv)
-    else:
+    try:
+        method = EncryptionMethod(attributes.get("METHOD"))
+    except ValueError:
         return None
 
+    return ExtXKeyInfo(
+        method=method,
+        uri=attributes.get("URI"),
+        iv=attributes.get("IV"),
+        keyformat=attributes.get("KEYFORMAT", "identity"),
+    )
 
-def is_encrypted(file_path: str) -> bool:
+
+def parse_variant(string: str, uri: str) -> Variant:
     """
-    주어진 파일에 암호화 정보가 있는지 확인하고, 파일이 암호화되었는지 여부를 반환합니다.
+    '#EXT-X-STREAM-INF' 속성 목록과 그 다음 줄의 URI로 Variant를 만듭니다.
+
+    Example:
+        >>> parse_variant("BANDWIDTH=1280000,RESOLUTION=1280x720", "720p.m3u8")
+        Variant(uri="720p.m3u8", bandwidth=1280000, resolution=(1280, 720), codecs=None)
+    """
+
+    attributes = parse_attributes(string)
+
+    resolution = None
+    if value := attributes.get("RESOLUTION"):
+        width, _, height = value.lower().partition("x")
+        resolution = (int(width), int(height))
+
+    return Variant(
+        uri=uri,
+        bandwidth=int(attributes.get("BANDWIDTH", 0)),
+        resolution=resolution,
+        codecs=attributes.get("CODECS"),
+    )
+
+
+def parse(source: Union[bytes, str, Iterable[str]]) -> Playlist:
+    """
+    재생 목록을 한 번 훑어 Playlist 객체로 변환합니다.
 
     Args:
-        file_path (str): 암호화 정보를 확인할 파일 경로.
+        source (bytes or str or Iterable[str]): 재생 목록 내용, 또는 줄 단위로
+            읽히는 텍스트 스트림.
 
     Returns:
-        bool: 파일이 암호화되었으면 True, 그렇지 않으면 False.
+        Playlist: 세그먼트와 재생 목록 정보.
     """
 
+    if isinstance(source, bytes):
+        source = source.decode()
+    if isinstance(source, str):
+        source = source.splitlines()
+
+    playlist = Playlist()
+
+    # 다음 세그먼트 URI가 나올 때까지 쌓아두는 태그 정보
+    duration = 0.0
+    byte_range: Optional[ByteRange] = None
+    discontinuity = False
+    key: Optional[ExtXKeyInfo] = None
+    stream_inf: Optional[str] = None
+
+    # 오프셋이 생략된 EXT-X-BYTERANGE는 같은 URI의 이전 범위 끝에서 이어짐
+    previous_uri = ""
+    previous_end = 0
+
+    for line in source:
+        line = line.strip()
+        if not line:
+            continue
+
+        if not line.startswith("#") and stream_inf is not None:
+            playlist.variants.append(parse_variant(stream_inf, line))
+            stream_inf = None
+            continue
+
+        if not line.startswith("#"):
+            if byte_range and byte_range.offset < 0:
+                offset = previous_end if line == previous_uri else 0
+                byte_range = ByteRange(byte_range.length, offset)
+
+            playlist.segments.append(
+                Segment(
+                    uri=line,
+                    duration=duration,
+                    sequence=playlist.media_sequence + len(playlist.segments),
+                    key=key,
+                    byte_range=byte_range,
+                    discontinuity=discontinuity,
+                )
+            )
+
+            previous_uri = line
+            previous_end = byte_range.offset + byte_range.length if byte_range else 0
+            duration = 0.0
+            byte_range = None
+            discontinuity = False
+            continue
+
+        tag, _, value = line.partition(":")
+
+        if tag == "#EXTINF":
+            duration = float(value.split(",")[0])
+        elif tag == "#EXT-X-BYTERANGE":
+            length, _, offset = value.partition("@")
+            byte_range = ByteRange(int(length), int(offset) if offset else -1)
+        elif tag == "#EXT-X-DISCONTINUITY":
+            discontinuity = True
+        elif tag == "#EXT-X-KEY":
+            info = parse_ext_x_key_info(line)
+            # 같은 세그먼트에 DRM용 키(KEYFORMAT)가 함께 올 수 있으므로 키 파일로
+            # 직접 풀 수 있는 identity 키만 씀
+            if info and info.keyformat != "identity":
+                continue
+            key = info if info and info.method != EncryptionMethod.NONE else None
+        elif tag == "#EXT-X-MEDIA-SEQUENCE":
+            playlist.media_sequence = int(value)
+        elif tag == "#EXT-X-TARGETDURATION":
+            playlist.target_duration = int(float(value))
+        elif tag == "#EXT-X-ENDLIST":
+            playlist.ended = True
+        elif tag == "#EXT-X-PLAYLIST-TYPE":
+            playlist.playlist_type = value.strip()
+        elif tag == "#EXT-X-STREAM-INF":
+            stream_inf = value
+
+    return playlist
+
+
+def parse_file(file_path: str) -> Playlist:
     with open(file_path, "r") as file:
-        lines = file.readlines()
+        return parse(file)
 
-    for line in lines:
-        if line.startswith("#EXT-X-KEY"):
-            if info := parse_ext_x_key_info(line):
-                return info.method != EncryptionMethod.NONE
 
-    return False
+def dumps(playlist: Playlist, segment_uris: List[str], key_uris: Dict[str, str]) -> str:
+    """
+    세그먼트와 키의 URI를 바꾼 재생 목록을 문자열로 만듭니다.
 
+    바이트 범위로 나뉜 세그먼트는 각자 따로 저장된 파일이라고 보고
+    '#EXT-X-BYTERANGE'를 쓰지 않습니다.
 
-def extract_key_from_m3u8(file_path: str):
+    Args:
+        playlist (Playlist): 원본 재생 목록.
+        segment_uris (List[str]): 세그먼트마다 새로 쓸 URI.
+        key_uris (Dict[str, str]): 원본 키 URI와 새로 쓸 URI.
+
+    Returns:
+        str: M3U8 형식의 재생 목록.
     """
-    주어진 M3U8 파일에서 키 정보를 추출합니다.
+
+    lines = ["#EXTM3U"]
+    if playlist.target_duration is not None:
+        lines.append(f"#EXT-X-TARGETDURATION:{playlist.target_duration}")
+    lines.append(f"#EXT-X-MEDIA-SEQUENCE:{playlist.media_sequence}")
+
+    key: Optional[ExtXKeyInfo] = None
+    for segment, uri in zip(playlist.segments, segment_uris):
+        if segment.discontinuity:
+            lines.append("#EXT-X-DISCONTINUITY")
+
+        if segment.key != key:
+            key = segment.key
+            if key is None:
+                lines.append("#EXT-X-KEY:METHOD=NONE")
+            else:
+                attributes = f"METHOD={key.method.value}"
+                if key.uri is not None:
+                    attributes += f',URI="{key_uris.get(key.uri, key.uri)}"'
+                if key.iv is not None:
+                    attributes += f",IV={key.iv}"
+                lines.append(f"#EXT-X-KEY:{attributes}")
+
+        lines.append(f"#EXTINF:{segment.duration},")
+        lines.append(uri)
+
+    if playlist.ended:
+        lines.append("#EXT-X-ENDLIST")
+
+    return "\n".join(lines) + "\n"
+
+
+def is_encrypted(file_path: str) -> bool:
+    """
+    주어진 파일에 암호화 정보가 있는지 확인하고, 파일이 암호화되었는지 여부를 반환합니다.
 
     Args:
-        file_path (str): 키 정보를 추출할 M3U8 파일의 경로.
+        file_path (str): 암호화 정보를 확인할 파일 경로.
 
     Returns:
-        str or None: 추출된 키 정보의 URI 값 또는 None.
+        bool: 파일이 암호화되었으면 True, 그렇지 않으면 False.
     """
 
-    key_pattern = r'#EXT-X-KEY:METHOD=AES-128,URI="(.+?)",IV=0x\d+'
+    return parse_file(file_path).is_encrypted
 
-    with open(file_path, "r") as file:
-        content = file.read()
-        match = re.search(key_pattern, content)
-
-        if match:
-            return match.group(1)
-        else:
-            return None
 
+def extract_key_from_m3u8(file_path: str):
+    """
+    주어진 M3U8 파일에서 키 정보를 추출합니다.
 
-def replace_key_in_m3u8(file_path: str, new_key: str):
-    key_pattern = r'(#EXT-X-KEY:METHOD=AES-128,URI=")(.+?)(",IV=0x\d+)'
+    Args:
+        file_path (str): 키 정보를 추출할 M3U8 파일의 경로.
 
-    with open(file_path, "r") as file:
-        content = file.read()
+    Returns:
+        str or None: 추출된 키 정보의 URI 값 또는 None.
+    """
 
-    content = re.sub(key_pattern, rf"\1{new_key}\3", content)
+    for key in parse_file(file_path).keys:
+        if key.method == EncryptionMethod.AES:
+            return key.uri
 
-    with open(file_path, "w") as file:
-        file.write(content)
+    return None
 
 
 def extract_playtime(file_path: str) -> timedelta:
@@ -113,15 +374,4 @@ def extract_playtime(file_path: str) -> timedelta:
         timedelta: 총 재생 시간을 표현하는 timedelta 객체.
     """
 
-    total_duration = 0
-
-    with open(file_path, "r") as file:
-        lines = file.readlines()
-
-    for line in lines:
-        if line.startswith("#EXTINF:"):
-            # 재생 시간 정보를 추출하고 float로 변환하여 총 재생 시간에 더함
-            duration = float(line.split(":")[1].split(",")[0])
-            total_duration += duration
-
-    return timedelta(seconds=int(total_duration))
+    return parse_file(file_path).playtime
@@ -1,24 +1,88 @@
+import hashlib
 import logging
 import os
 import re
 import shutil
 import time
-from typing import List
+from typing import Dict, Iterator, Optional, Tuple
 from urllib.parse import urljoin
 
 from utils import fs, hash, url as liburl
+from utils.index import ContentIndex
+import m3u8dl.assembler as assembler
 import m3u8dl.ffmpeg as ffmpeg
+import m3u8dl.live as live
 import m3u8dl.m3u8 as m3u8
+import m3u8dl.metrics as metrics
+import m3u8dl.session as session
+import m3u8dl.variant as variant
+import m3u8dl.scheduler as scheduler
+from m3u8dl.fetcher import Fetched, HostLimiter, SegmentFetcher
+from m3u8dl.manifest import Manifest, job_id_of, segment_fingerprint
+from m3u8dl.ratelimit import BandwidthLimiter, HostRateLimiter, parse_retry_after
 
 import requests
+import urllib3
+
+# 동시에 받을 재생 목록 수와 재생 목록마다 세그먼트를 받을 작업자 수
+PARALLEL_JOBS = int(os.environ.get("M3U8DL_JOBS", 2))
+SEGMENT_WORKERS = int(os.environ.get("M3U8DL_WORKERS", 4))
+
+# 모든 작업이 함께 지키는 연결 수와 전송량(바이트/초, 0이면 무제한) 제한
+MAX_CONNECTIONS_PER_HOST = int(os.environ.get("M3U8DL_PER_HOST", 4))
+MAX_CONNECTIONS = int(os.environ.get("M3U8DL_MAX_CONNECTIONS", 16))
+HOST_LIMITER = HostLimiter(MAX_CONNECTIONS_PER_HOST, MAX_CONNECTIONS)
+BANDWIDTH_LIMITER = BandwidthLimiter(float(os.environ.get("M3U8DL_BANDWIDTH", 0)))
+
+# 호스트별 요청 속도. 서버 상태에 따라 MIN_RATE와 MAX_RATE 사이에서 조절됨
+RATE_LIMITER = HostRateLimiter(
+    rate=float(os.environ.get("M3U8DL_RATE", 2)),
+    min_rate=float(os.environ.get("M3U8DL_MIN_RATE", 0.2)),
+    max_rate=float(os.environ.get("M3U8DL_MAX_RATE", 50)),
+    max_backoff=float(os.environ.get("M3U8DL_MAX_BACKOFF", 60)),
+)
+MAX_RETRIES = 5
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# 단계별 소요 시간과 처리량. 끝나면 JSON으로, 설정하면 Prometheus 텍스트 파일로도
+# 저장하고, 포트를 주면 받는 동안 /metrics로 보여줌. 빈 문자열이면 저장하지 않음
+METRICS = metrics.Metrics()
+METRICS_FILENAME = os.environ.get("M3U8DL_METRICS", "metrics.json")
+METRICS_PROM_FILENAME = os.environ.get("M3U8DL_METRICS_PROM", "")
+METRICS_PORT = int(os.environ.get("M3U8DL_METRICS_PORT", 0))
+
+# 모든 요청이 공유하는 연결 풀
+POOL_SIZE = int(os.environ.get("M3U8DL_POOL_SIZE", max(SEGMENT_WORKERS, 10)))
+SESSION = session.create_session(POOL_SIZE, metrics=METRICS)
+TIMEOUT = (10, 60)
+
+# 세그먼트를 파일에 쓸 때 한 번에 읽는 크기
+CHUNK_SIZE = int(os.environ.get("M3U8DL_CHUNK_SIZE", 64 * 1024))
 
-DELAY_PER_SEGMENTS_RETRY = 5
-DELAY_PER_SEGMENTS = 5
-DELAY_PER_M3U8 = 10
+# 세그먼트 파일의 fsync 정책 (none, file, full). 어느 경우든 파일은 다 받은 뒤에야 생김
+FSYNC = os.environ.get("M3U8DL_FSYNC", fs.FSYNC_NONE)
+
+# 켜면 라이브 재생 목록(#EXT-X-ENDLIST가 없고 VOD가 아님)의 새 세그먼트를 계속 받음
+LIVE = os.environ.get("M3U8DL_LIVE", "0") == "1"
+LIVE_MAX_SECONDS = float(os.environ.get("M3U8DL_LIVE_MAX_SECONDS", 0))
+LIVE_IDLE_POLLS = 6
+LIVE_DEFAULT_INTERVAL = 5.0
+
+# 마스터 재생 목록에서 변형을 고르는 방법과 고를 수 있는 최대 대역폭(bps, 0이면 무제한)
+VARIANT_POLICY = os.environ.get("M3U8DL_VARIANT_POLICY", variant.POLICY_MAX_RESOLUTION)
+VARIANT_MAX_BANDWIDTH = int(os.environ.get("M3U8DL_VARIANT_MAX_BANDWIDTH", 0))
 
 M3U8_FILENAME = "index.m3u8"
 TS_FILENAME = "out.ts"
 TMP_DIR = "_tmp"
+REPORT_FILENAME = "report.json"
+
+# 받은 파일을 재생 목록 URL, 세그먼트 지문, SHA-256으로 찾는 인덱스. 빈 문자열이면 사용하지 않음
+INDEX_PATH = os.environ.get("M3U8DL_INDEX", "index.jsonl")
+CONTENT_INDEX = ContentIndex(INDEX_PATH) if INDEX_PATH else None
+
+# 실패한 재생 목록의 작업 디렉토리를 남겨두고 다음 실행에서 이어받음
+RESUME = os.environ.get("M3U8DL_RESUME", "1") != "0"
 
 
 logging.basicConfig(
@@ -32,137 +96,622 @@ log.setLevel(logging.INFO)
 
 
 def main():
-    if not ffmpeg.is_ffmpeg_installed():
-        raise Exception("ffmpeg가 설치되어 있지 않습니다")
+    if not ffmpeg.is_ffmpeg_installed() and not assembler.is_native_available():
+        raise Exception("ffmpeg 또는 cryptography 패키지가 설치되어 있지 않습니다")
+
+    # 잘못된 값이면 세그먼트를 받기 시작한 뒤가 아니라 바로 알림
+    if FSYNC not in fs.FSYNC_POLICIES:
+        raise Exception(
+            f"M3U8DL_FSYNC는 {', '.join(fs.FSYNC_POLICIES)} 중 하나여야 합니다: {FSYNC!r}"
+        )
 
-    # If nessesary, add http header it sould be read from env or config file.
-    header: dict[str, str] = {}
+    header = session.load_headers()
 
     fs.mkdir_if_not_exist(TMP_DIR)
 
+    if METRICS_PORT:
+        metrics.serve(METRICS, METRICS_PORT)
+        log.info(f"metrics: http://localhost:{METRICS_PORT}/metrics")
+
     m3u8_list = open("m3u8_list.txt", "r").read()
-    m3u8_urls = re.split(r"\r?\n", m3u8_list)
-    for url in m3u8_urls:
+    m3u8_urls = []
+    for url in re.split(r"\r?\n", m3u8_list):
         # skip comment line
         if url.startswith("#"):
             log.info(f"skipping comment: {url}")
             continue
 
-        try:
-            log.info(f"downloading {url}")
+        if not url.strip():
+            continue
 
-            # if not liburl.is_cloudflare(url):
-            #     log.warning(f"{url} is not hosted on CloudFlare")
-            #     continue
+        # if not liburl.is_cloudflare(url):
+        #     log.warning(f"{url} is not hosted on CloudFlare")
+        #     continue
 
-            download_from_m3u8(url, header)
-        finally:
-            time.sleep(DELAY_PER_M3U8)
-            fs.clear_dir(TMP_DIR)
+        # 같은 재생 목록은 작업 디렉토리를 공유하므로 한 번만 받음
+        if url not in m3u8_urls:
+            m3u8_urls.append(url)
 
+    results = scheduler.run_jobs(
+        m3u8_urls, lambda url: run_job(url, header), jobs=PARALLEL_JOBS
+    )
+    scheduler.write_report(results, REPORT_FILENAME)
+    write_metrics()
 
-def download_from_m3u8(url: str, header: "dict[str, str]"):
-    base_url, _ = liburl.extract_path_and_filename(url)
 
-    try:
-        # m3u8 다운로드
-        m3u8_content = download(url, header)
-        if not m3u8_content:
-            raise Exception(f"Failed to download file: {url}.")
+def write_metrics():
+    """
+    단계별 소요 시간을 로그로 남기고 METRICS_FILENAME, METRICS_PROM_FILENAME에
+    저장합니다.
+    """
 
-        m3u8_path = os.path.join(TMP_DIR, M3U8_FILENAME)
+    summary = METRICS.summary()
+    for stage, stat in summary["stages"].items():
+        log.info(
+            f"{stage}\t{stat['count']}\tp50 {stat['p50'] * 1000:.0f} ms"
+            f"\tp90 {stat['p90'] * 1000:.0f} ms\tmax {stat['max'] * 1000:.0f} ms"
+        )
+    log.info(
+        f"{summary['bytes'] / 1024 / 1024:.1f} MB, {summary['mb_per_sec']:.2f} MB/s"
+    )
 
-        fs.save(m3u8_path, m3u8_content)
+    if METRICS_FILENAME:
+        METRICS.write_json(METRICS_FILENAME)
+    if METRICS_PROM_FILENAME:
+        METRICS.write_prometheus(METRICS_PROM_FILENAME)
 
-        key_filename = m3u8.extract_key_from_m3u8(m3u8_path)
-        if not isinstance(key_filename, str):
-            raise Exception(f"{key_filename}는 문자열이 아닙니다.")
 
-        key_filename = key_filename.lstrip("/")  # 절대 경로를 상대 경로로 수정
+def run_job(url: str, header: "dict[str, str]") -> scheduler.JobResult:
+    # 재생 목록마다 작업 디렉토리를 따로 두어 동시에 받거나 이어받을 수 있게 함
+    work_dir = os.path.join(TMP_DIR, job_id_of(url))
+    fs.makedirs(work_dir)
 
-        m3u8.replace_key_in_m3u8(m3u8_path, key_filename)
+    started = time.monotonic()
+    output = None
+    try:
+        log.info(f"downloading {url}")
+
+        # 이 작업에서 잰 시간은 재생 목록 URL별로 집계
+        with METRICS.bind(url):
+            output = download_from_m3u8(url, header, work_dir)
+    finally:
+        if output or not RESUME:
+            # 세그먼트 파일 삭제는 다음 작업을 기다리게 하지 않도록 따로 진행
+            fs.remove_dir(work_dir, background=True)
+        else:
+            log.info(f"keeping {work_dir} to resume {url}")
 
-        # key 다운로드
-        key_url = urljoin(base_url, key_filename)
-        key_path = os.path.join(TMP_DIR, key_filename)
+    size = os.path.getsize(output) if output else 0
+    return scheduler.JobResult(url, output, size, time.monotonic() - started)
 
-        key_content = download(key_url, header)
 
-        fs.save(key_path, key_content)
+def download_from_m3u8(
+    url: str, header: "dict[str, str]", work_dir: str = TMP_DIR
+) -> Optional[str]:
+    """
+    재생 목록 하나를 받아 `<sha256>.ts` 파일로 저장합니다.
 
-        # 세그먼트 다운로드
-        segments = extract_segments(m3u8_content.decode())
+    Returns:
+        str or None: 저장한 파일 이름. 실패하면 None.
+    """
 
-        uid = liburl.extract_subdomain(base_url)
-        playtime = m3u8.extract_playtime(m3u8_path)
+    ts_path = os.path.join(work_dir, TS_FILENAME)
+    digest: Optional[bytes] = None
+    fingerprint: Optional[str] = None
+    is_live = False
 
-        log.info(
-            f"""
-            정보일람: {uid}
-            \t세그먼트: {len(segments)}
-            \t재생 시간: {playtime}
-            """
-        )
+    # 같은 재생 목록을 이미 받았다면 재생 목록도 받지 않음
+    if CONTENT_INDEX and (entry := CONTENT_INDEX.find_playlist(url)):
+        log.info(f"already downloaded {url} → {entry.path}")
+        return entry.path
+
+    try:
+        # m3u8 다운로드
+        media_url, playlist = load_media_playlist(url, header)
 
-        for i, segment in enumerate(segments):
-            seg_url = urljoin(base_url, segment)
-            seg_path = os.path.join(TMP_DIR, segment)
-            seg_data = download(seg_url, headers=header)
-            fs.save(seg_path, seg_data)
-
-            seg_size_in_mb = len(seg_data) / 1024 / 1024
-            log.info(f"다운로드 완료({i + 1}/{len(segments)}), {seg_size_in_mb:.3} MB")
-            time.sleep(DELAY_PER_SEGMENTS)
-
-        # ffmpeg
-        # ffmpeg -allowed_extensions 'ALL' -protocol_whitelist 'crypto,file' -i index.m3u8 -c copy out.ts
-
-        ffmpeg_command = [
-            "ffmpeg",
-            "-allowed_extensions",
-            "ALL",
-            "-protocol_whitelist",
-            "crypto,file",
-            "-i",
-            M3U8_FILENAME,
-            "-c",
-            "copy",
-            TS_FILENAME,
-        ]
-
-        proc = ffmpeg.run_command(ffmpeg_command, TMP_DIR)
-
-        if proc.returncode != 0:
-            print("Error:", proc.stderr)
+        if LIVE and playlist.is_live:
+            log.info(f"live playlist: {media_url}")
+            is_live = True
+            digest = record_live(media_url, playlist, header, work_dir, ts_path)
         else:
-            print("FFmpeg command executed successfully.")
+            # 다른 URL로 같은 세그먼트를 받은 적이 있으면 건너뜀
+            fingerprint = segment_fingerprint(
+                urljoin(media_url, segment.uri) for segment in playlist.segments
+            )
+            if CONTENT_INDEX and (entry := CONTENT_INDEX.find_fingerprint(fingerprint)):
+                log.info(f"already downloaded {url} → {entry.path}")
+                CONTENT_INDEX.add(entry.sha256, entry.path, url, fingerprint)
+                return entry.path
+
+            digest = download_vod(url, media_url, playlist, header, work_dir, ts_path)
 
     except Exception as e:
         log.error(f"something wrong: {e}")
 
-    m3u8_path = os.path.join(TMP_DIR, TS_FILENAME)
-    new_filename = f"{hash.calculate_sha256(m3u8_path).hex()}.ts"
+    if not digest or not os.path.exists(ts_path):
+        return None
+
+    new_filename = f"{digest.hex()}.ts"
+
+    # 같은 내용의 파일이 이미 있으면 새로 받은 파일은 버림
+    if CONTENT_INDEX and (entry := CONTENT_INDEX.find_sha256(digest.hex())):
+        log.info(f"download complete {url}, same as {entry.path}")
+        os.remove(ts_path)
+        new_filename = entry.path
+    else:
+        log.info(f"download complete {url} → {new_filename}")
+        shutil.move(ts_path, new_filename)
+
+        # 나중에 hashrename 등에서 다시 읽지 않도록 쓰면서 계산한 해시를 기록
+        hash.remember(new_filename, {"sha256": digest})
+
+    # 라이브 재생 목록은 같은 URL이라도 다음에 받으면 내용이 다름
+    if CONTENT_INDEX:
+        playlist_url = None if is_live else url
+        CONTENT_INDEX.add(digest.hex(), new_filename, playlist_url, fingerprint)
+
+    return new_filename
+
+
+def download_vod(
+    url: str,
+    media_url: str,
+    playlist: m3u8.Playlist,
+    header: "dict[str, str]",
+    work_dir: str,
+    ts_path: str,
+) -> Optional[bytes]:
+    """
+    끝이 정해진 재생 목록의 세그먼트를 모두 받아 ts_path에 이어 붙입니다.
+
+    Returns:
+        bytes or None: 출력 파일의 SHA-256. 실패하면 None.
+    """
+
+    base_url, _ = liburl.extract_path_and_filename(media_url)
+    segments = playlist.segments
+
+    # SAMPLE-AES 등 직접 복호화할 수 없는 경우에는 ffmpeg를 사용
+    use_native = is_native_supported(playlist)
+
+    # key 다운로드
+    key_contents: Dict[str, bytes] = {}
+    download_keys(playlist.keys, base_url, header, key_contents)
+
+    uid = liburl.extract_subdomain(base_url)
+
+    log.info(
+        f"""
+        정보일람: {uid}
+        \t세그먼트: {len(segments)}
+        \t재생 시간: {playlist.playtime}
+        """
+    )
+
+    # 세그먼트는 URI 대신 순번으로 저장하여 바이트 범위로 나뉜 경우에도 겹치지 않게 함
+    seg_jobs = [
+        (urljoin(base_url, segment.uri), os.path.join(work_dir, f"{i:05d}.ts"))
+        for i, segment in enumerate(segments)
+    ]
+    index_of = {seg_path: i for i, (_, seg_path) in enumerate(seg_jobs)}
+
+    out: Optional[assembler.Assembler] = None
+    if use_native:
+        out = assembler.Assembler(
+            ts_path,
+            [segment_cipher(segment, key_contents) for segment in segments],
+        )
+    else:
+        key_filenames = {uri: f"{n}.key" for n, uri in enumerate(key_contents)}
+        for key_uri, key_filename in key_filenames.items():
+            fs.save(os.path.join(work_dir, key_filename), key_contents[key_uri])
+
+        local_m3u8 = m3u8.dumps(
+            playlist,
+            [os.path.basename(seg_path) for _, seg_path in seg_jobs],
+            key_filenames,
+        )
+        fs.save(os.path.join(work_dir, M3U8_FILENAME), local_m3u8.encode())
+
+    manifest = Manifest(work_dir, url)
+    job = METRICS.current_job()
+
+    def fetch_segment(seg_url: str, seg_path: str) -> Fetched:
+        index = index_of[seg_path]
+        with METRICS.bind(job):
+            fetched = download_segment(seg_url, seg_path, segments[index], header)
+        manifest.record(seg_url, seg_path, fetched)
+        if out:
+            out.add(index, seg_path)
+        return fetched
+
+    # 이전 실행에서 이미 받아 검증된 세그먼트는 건너뜀
+    pending = []
+    for seg_url, seg_path in seg_jobs:
+        if not manifest.is_verified(seg_url, seg_path):
+            pending.append((seg_url, seg_path))
+        elif out:
+            out.add(index_of[seg_path], seg_path)
+
+    if skipped := len(seg_jobs) - len(pending):
+        log.info(f"이어받기: {skipped}개 세그먼트는 이미 받음")
+
+    fetcher = SegmentFetcher(
+        fetch_segment,
+        workers=SEGMENT_WORKERS,
+        hosts=HOST_LIMITER,
+        label=os.path.basename(work_dir),
+    )
+
+    try:
+        fetcher.fetch_all(pending)
+    except BaseException:
+        # 빠진 세그먼트 때문에 close()가 실패하여 원래 오류를 가리지 않도록 함
+        if out:
+            out.abort()
+        raise
+
+    if out:
+        out.close()
+
+    if out:
+        # 쓰는 동안 계산한 해시를 그대로 사용
+        return out.sha256()
+
+    if run_ffmpeg(work_dir):
+        with METRICS.timer("hash"):
+            return hash.calculate_sha256(ts_path)
+
+    return None
+
+
+def record_live(
+    media_url: str,
+    playlist: m3u8.Playlist,
+    header: "dict[str, str]",
+    work_dir: str,
+    ts_path: str,
+) -> bytes:
+    """
+    라이브/이벤트 재생 목록을 target duration 간격으로 다시 받으며 새 세그먼트만
+    받아 ts_path에 이어 붙입니다.
+
+    '#EXT-X-ENDLIST'가 나타나거나, LIVE_MAX_SECONDS가 지나거나, LIVE_IDLE_POLLS번
+    연속으로 새 세그먼트가 없으면 멈춥니다.
+
+    Returns:
+        bytes: 출력 파일의 SHA-256.
+    """
+
+    if not is_native_supported(playlist):
+        raise Exception("라이브 재생 목록은 cryptography 패키지로만 받을 수 있습니다")
+
+    base_url, _ = liburl.extract_path_and_filename(media_url)
+
+    follower = live.LivePlaylist(lambda extra: request(media_url, {**header, **extra}))
+    new_segments = follower.update(playlist)
+
+    key_contents: Dict[str, bytes] = {}
+    segment_of: Dict[str, Tuple[int, m3u8.Segment]] = {}
+
+    # 오래 녹화해도 작업 디렉토리가 커지지 않도록 이어 붙인 세그먼트는 지움
+    out = assembler.Assembler(ts_path, [], remove_segments=True)
+    job = METRICS.current_job()
+
+    def fetch_segment(seg_url: str, seg_path: str) -> Fetched:
+        index, segment = segment_of.pop(seg_path)
+        with METRICS.bind(job):
+            fetched = download_segment(seg_url, seg_path, segment, header)
+        out.add(index, seg_path)
+        return fetched
+
+    fetcher = SegmentFetcher(
+        fetch_segment,
+        workers=SEGMENT_WORKERS,
+        hosts=HOST_LIMITER,
+        label=os.path.basename(work_dir),
+    )
+
+    started = time.monotonic()
+    idle_polls = 0
+
+    try:
+        while True:
+            polled = time.monotonic()
+
+            if new_segments:
+                idle_polls = 0
+
+                keys = [s.key for s in new_segments if s.key]
+                download_keys(keys, base_url, header, key_contents)
+
+                seg_jobs = []
+                for segment in new_segments:
+                    seg_url = urljoin(base_url, segment.uri)
+                    seg_path = os.path.join(work_dir, f"{segment.sequence}.ts")
+                    segment_of[seg_path] = (len(out.ciphers), segment)
+                    out.extend([segment_cipher(segment, key_contents)])
+                    seg_jobs.append((seg_url, seg_path))
+
+                fetcher.fetch_all(seg_jobs)
+            else:
+                idle_polls += 1
+
+            if follower.ended:
+                log.info(f"live playlist ended: {media_url}")
+                break
 
-    log.info(f"download complete {url} → {new_filename}")
+            if LIVE_MAX_SECONDS and time.monotonic() - started > LIVE_MAX_SECONDS:
+                log.info(f"live recording reached {LIVE_MAX_SECONDS}s: {media_url}")
+                break
 
-    if os.path.exists(m3u8_path):
-        shutil.move(m3u8_path, new_filename)
+            if idle_polls >= LIVE_IDLE_POLLS:
+                log.info(f"no new segments for {idle_polls} polls: {media_url}")
+                break
 
+            # 바뀐 것이 없으면 target duration의 절반만 기다림
+            interval = follower.target_duration or LIVE_DEFAULT_INTERVAL
+            if not new_segments:
+                interval /= 2
+            time.sleep(max(0.0, interval - (time.monotonic() - polled)))
 
-def extract_segments(content: str) -> List[str]:
-    lines = re.split(r"\r?\n", content)
-    return list(filter(containsSegmentNo, lines))
+            new_segments = follower.poll()
+    except BaseException:
+        out.abort()
+        raise
 
+    out.close()
 
-def containsSegmentNo(s: str) -> bool:
-    return "segmentNo" in s
+    return out.sha256()
+
+
+def is_native_supported(playlist: m3u8.Playlist) -> bool:
+    if not playlist.keys:
+        return True
+
+    return assembler.is_native_available() and all(
+        key.method == m3u8.EncryptionMethod.AES for key in playlist.keys
+    )
+
+
+def download_keys(
+    keys: "list[m3u8.ExtXKeyInfo]",
+    base_url: str,
+    header: "dict[str, str]",
+    key_contents: "dict[str, bytes]",
+):
+    """
+    아직 받지 않은 키를 받아 key_contents에 URI별로 저장합니다.
+    """
+
+    for key in keys:
+        if not isinstance(key.uri, str):
+            raise Exception(f"{key.uri}는 문자열이 아닙니다.")
+
+        if key.uri in key_contents:
+            continue
+
+        # 절대 경로를 상대 경로로 수정
+        key_url = urljoin(base_url, key.uri.lstrip("/"))
+        key_contents[key.uri] = download(key_url, header)
+
+
+def download_segment(
+    seg_url: str, seg_path: str, segment: m3u8.Segment, header: "dict[str, str]"
+) -> Fetched:
+    if segment.byte_range:
+        header = {**header, "Range": segment.byte_range.header()}
+    return download_to(seg_url, seg_path, headers=header)
+
+
+def load_media_playlist(
+    url: str, header: "dict[str, str]"
+) -> Tuple[str, m3u8.Playlist]:
+    """
+    재생 목록을 받습니다. 마스터 재생 목록이면 VARIANT_POLICY에 따라 변형을
+    하나 골라 그 미디어 재생 목록을 받습니다.
+
+    Returns:
+        Tuple[str, m3u8.Playlist]: 미디어 재생 목록의 URL과 내용.
+    """
+
+    m3u8_content = download(url, header)
+    if not m3u8_content:
+        raise Exception(f"Failed to download file: {url}.")
+
+    playlist = m3u8.parse(m3u8_content)
+    if not playlist.is_master:
+        return url, playlist
+
+    base_url, _ = liburl.extract_path_and_filename(url)
+    selected = variant.select_variant(
+        playlist.variants,
+        policy=VARIANT_POLICY,
+        max_bandwidth=VARIANT_MAX_BANDWIDTH,
+        probe=lambda candidate: probe_variant(urljoin(base_url, candidate.uri), header),
+    )
+    log.info(
+        f"variant selected: {selected.resolution}, {selected.bandwidth} bps, {selected.uri}"
+    )
+
+    media_url = urljoin(base_url, selected.uri)
+    playlist = m3u8.parse(download(media_url, header))
+    if playlist.is_master:
+        raise Exception(f"변형이 다시 마스터 재생 목록입니다: {media_url}")
+
+    return media_url, playlist
+
+
+def probe_variant(url: str, header: "dict[str, str]") -> float:
+    """
+    변형의 재생 목록과 첫 세그먼트를 받는 데 걸린 시간(초)을 잽니다.
+    """
+
+    started = time.monotonic()
+
+    playlist = m3u8.parse(download(url, header))
+    if not playlist.segments:
+        raise Exception(f"세그먼트가 없는 재생 목록입니다: {url}")
+
+    segment = playlist.segments[0]
+    seg_header = header
+    if segment.byte_range:
+        seg_header = {**header, "Range": segment.byte_range.header()}
+
+    base_url, _ = liburl.extract_path_and_filename(url)
+    download(urljoin(base_url, segment.uri), seg_header)
+
+    return time.monotonic() - started
+
+
+def segment_cipher(
+    segment: m3u8.Segment, key_contents: "dict[str, bytes]"
+) -> Optional[Tuple[bytes, bytes]]:
+    if not segment.key or not segment.key.uri:
+        return None
+
+    iv = assembler.segment_iv(segment.key.iv, segment.sequence)
+    return (key_contents[segment.key.uri], iv)
+
+
+def run_ffmpeg(work_dir: str) -> bool:
+    # ffmpeg -allowed_extensions 'ALL' -protocol_whitelist 'crypto,file' -i index.m3u8 -c copy out.ts
+
+    ffmpeg_command = [
+        "ffmpeg",
+        "-y",
+        "-allowed_extensions",
+        "ALL",
+        "-protocol_whitelist",
+        "crypto,file",
+        "-i",
+        M3U8_FILENAME,
+        "-c",
+        "copy",
+        TS_FILENAME,
+    ]
+
+    with METRICS.timer("ffmpeg"):
+        proc = ffmpeg.run_command(ffmpeg_command, work_dir)
+
+    if proc.returncode != 0:
+        print("Error:", proc.stderr)
+        return False
+
+    print("FFmpeg command executed successfully.")
+    return True
+
+
+def request(
+    url: str, headers: "dict[str, str]", stream: bool = False
+) -> requests.Response:
+    for attempt in range(MAX_RETRIES + 1):
+        with METRICS.timer("rate_limit", url):
+            RATE_LIMITER.acquire(url)
+
+        try:
+            resp = SESSION.get(url, headers=headers, timeout=TIMEOUT, stream=stream)
+        except (requests.ConnectionError, requests.Timeout) as err:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = RATE_LIMITER.on_failure(url)
+            METRICS.count("retry", url)
+            log.warning(f'연결 실패, {delay:.1f}초 후 재시도 "{url}": {err}')
+            continue
+
+        if resp.status_code in RETRYABLE_STATUS_CODES and attempt < MAX_RETRIES:
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            delay = RATE_LIMITER.on_failure(url, retry_after)
+            METRICS.count("retry", url)
+            log.warning(f'{resp.status_code} 응답, {delay:.1f}초 후 재시도 "{url}"')
+            resp.close()
+            continue
+
+        if not resp.ok:
+            raise Exception(f'다운로드 실패 "{url}": {resp.content.decode()}')
+
+        # 요청을 보낸 뒤 응답 헤더를 받기까지의 시간
+        METRICS.observe("ttfb", resp.elapsed.total_seconds(), url)
+        RATE_LIMITER.on_success(url, resp.elapsed.total_seconds())
+        return resp
+
+    raise Exception(f'다운로드 실패 "{url}": 재시도 횟수 초과')
 
 
 def download(url: str, headers: "dict[str, str]") -> bytes:
-    resp = requests.get(url, headers=headers)
-    if not resp.ok:
-        raise Exception(f'다운로드 실패 "{url}": {resp.content.decode()}')
-    return resp.content
+    with METRICS.timer("download", url):
+        return request(url, headers).content
+
+
+def download_to(url: str, path: str, headers: "dict[str, str]") -> Fetched:
+    """
+    응답 본문을 메모리에 모으지 않고 CHUNK_SIZE 단위로 바로 파일에 씁니다.
+    크기와 SHA-256은 청크가 지나가는 동안 함께 계산합니다. 임시 파일에 받은 뒤
+    이름을 바꾸므로 중간에 끊기면 path에는 아무것도 남지 않습니다.
+
+    본문을 읽는 시간(transfer), 전송량 제한으로 기다린 시간(throttle), 나머지
+    해시 계산과 파일 쓰기 시간(write)을 나누어 기록합니다.
+
+    여기서는 본문이 도중에 끊긴 경우만 다시 요청합니다. 연결 실패와 오류 응답은
+    request()와 세션이 이미 재시도하므로 그대로 전달합니다.
+    """
+
+    for attempt in range(MAX_RETRIES + 1):
+        digest = hashlib.sha256()
+        size = 0
+        transfer = throttle = 0.0
+
+        def chunks(resp: requests.Response) -> Iterator[bytes]:
+            nonlocal size, transfer, throttle
+            reading = time.perf_counter()
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                read = time.perf_counter()
+                transfer += read - reading
+                BANDWIDTH_LIMITER.consume(len(chunk))
+                throttle += time.perf_counter() - read
+                digest.update(chunk)
+                size += len(chunk)
+                yield chunk
+                reading = time.perf_counter()
+
+            # 압축되지 않은 본문은 Content-Length만큼 왔는지 확인
+            expected = resp.headers.get("Content-Length")
+            if expected and "Content-Encoding" not in resp.headers:
+                if size < int(expected):
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f"본문이 짧음: {size}/{expected} 바이트"
+                    )
+
+        started = time.perf_counter()
+        resp = request(url, headers, stream=True)
+        try:
+            with resp:
+                size_hint = int(resp.headers.get("Content-Length", 0))
+                saving = time.perf_counter()
+                fs.save(path, chunks(resp), FSYNC, size_hint)
+                saved = time.perf_counter()
+        except (
+            requests.exceptions.ChunkedEncodingError,
+            requests.exceptions.ContentDecodingError,
+            urllib3.exceptions.ProtocolError,
+        ) as err:
+            # 본문을 받는 도중 연결이 끊기거나 Content-Length보다 짧게 끝난 경우
+            if attempt == MAX_RETRIES:
+                raise
+            delay = RATE_LIMITER.on_failure(url)
+            METRICS.count("retry", url)
+            log.warning(f'전송 중단, {delay:.1f}초 후 재시도 "{url}": {err}')
+            continue
+
+        METRICS.observe("segment", saved - started, url)
+        METRICS.observe("transfer", transfer, url)
+        METRICS.observe("throttle", throttle, url)
+        METRICS.observe("write", saved - saving - transfer - throttle, url)
+        METRICS.add_bytes(size, saved - started, url)
+
+        return Fetched(size=size, sha256=digest.digest())
+
+    raise Exception(f'다운로드 실패 "{url}": 재시도 횟수 초과')
 
 
 if __name__ == "__main__":
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from utils import hash
+
+from m3u8dl.fetcher import Fetched
+
+# 요청마다 바뀌어 지문에서 빼는 쿼리 파라미터 (소문자). CloudFront, Akamai,
+# Wowza 등에서 쓰는 이름
+SIGNING_PARAMS = {
+    "token",
+    "__token__",
+    "expires",
+    "expire",
+    "exp",
+    "signature",
+    "sig",
+    "policy",
+    "key-pair-id",
+    "hdnts",
+    "hdnea",
+    "auth_key",
+    "wmsauthsign",
+    "hmac",
+}
+SIGNING_PARAM_PREFIXES = ("x-amz-", "x-goog-")
+
+MANIFEST_FILENAME = "manifest.jsonl"
+
+STATUS_DONE = "done"
+
+
+def job_id_of(playlist_url: str) -> str:
+    """
+    재생 목록 URL마다 고유한 작업 디렉토리 이름을 반환합니다.
+
+    서명 파라미터는 빼고 계산하므로 토큰만 바뀐 URL은 같은 작업으로 이어 받습니다.
+    """
+
+    return hashlib.sha256(strip_signing_params(playlist_url).encode()).hexdigest()[:16]
+
+
+def segment_fingerprint(segment_urls: Iterable[str]) -> str:
+    """
+    세그먼트 URL 목록의 지문을 반환합니다.
+
+    CDN 서명이나 만료 시각처럼 요청마다 바뀌는 쿼리 파라미터(SIGNING_PARAMS)만
+    빼므로, 같은 영상을 가리키는 다른 재생 목록 URL도 같은 지문을 갖습니다.
+    `seg.ts?n=12`처럼 세그먼트를 구분하는 나머지 쿼리는 그대로 사용합니다.
+    """
+
+    digest = hashlib.sha256()
+    for url in segment_urls:
+        digest.update(f"{strip_signing_params(url)}\n".encode())
+    return digest.hexdigest()
+
+
+def strip_signing_params(url: str) -> str:
+    """
+    url에서 서명, 토큰, 만료 시각 쿼리 파라미터를 뺀 URL을 반환합니다.
+
+    Example:
+        >>> strip_signing_params("https://lorem.com/seg.ts?n=1&Expires=99&Signature=x")
+        'https://lorem.com/seg.ts?n=1'
+    """
+
+    parts = urlsplit(url)
+    query = urlencode(
+        [
+            (name, value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not is_signing_param(name)
+        ]
+    )
+    # 쿼리가 없으면 이전 버전과 같은 지문
+    stripped = f"{parts.scheme}://{parts.netloc}{parts.path}"
+    if query:
+        stripped += f"?{query}"
+    return stripped
+
+
+def is_signing_param(name: str) -> bool:
+    """
+    name이 서명, 토큰, 만료 시각을 나타내는 쿼리 파라미터인지 확인합니다.
+
+    Example:
+        >>> is_signing_param("X-Amz-Signature")
+        True
+        >>> is_signing_param("n")
+        False
+    """
+
+    name = name.lower()
+    return name in SIGNING_PARAMS or name.startswith(SIGNING_PARAM_PREFIXES)
+
+
+@dataclass
+class SegmentRecord:
+    url: str
+    path: str
+    size: int
+    sha256: str
+    status: str
+
+
+class Manifest:
+    """
+    재생 목록 하나의 세그먼트 다운로드 상태를 디스크에 기록합니다.
+
+    기록은 한 줄에 하나씩 JSON으로 덧붙이므로 세그먼트가 끝날 때마다 파일
+    전체를 다시 쓰지 않습니다. 같은 경로가 여러 번 기록되면 마지막 줄이
+    유효합니다.
+
+    Args:
+        work_dir (str): 세그먼트와 매니페스트를 저장하는 작업 디렉토리.
+        playlist_url (str): 재생 목록 URL.
+    """
+
+    def __init__(self, work_dir: str, playlist_url: str) -> None:
+        self.path = os.path.join(work_dir, MANIFEST_FILENAME)
+        self.playlist_url = playlist_url
+        self.records: Dict[str, SegmentRecord] = {}
+
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.path):
+            self._load()
+        else:
+            self._append({"playlist": playlist_url})
+
+    def _load(self):
+        with open(self.path, "r") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 기록 도중 중단되어 잘린 마지막 줄
+                    continue
+
+                if "playlist" in entry:
+                    continue
+
+                record = SegmentRecord(**entry)
+                self.records[record.path] = record
+
+    def _append(self, entry: dict):
+        with open(self.path, "a") as file:
+            file.write(json.dumps(entry) + "\n")
+
+    def record(self, url: str, path: str, fetched: Fetched):
+        """
+        세그먼트 다운로드가 끝났음을 기록합니다.
+        """
+
+        record = SegmentRecord(
+            url=url,
+            path=path,
+            size=fetched.size,
+            sha256=fetched.sha256.hex(),
+            status=STATUS_DONE,
+        )
+
+        with self._lock:
+            self.records[path] = record
+            self._append(asdict(record))
+
+    def is_verified(self, url: str, path: str) -> bool:
+        """
+        세그먼트가 이미 받아져 있고, 파일의 크기와 체크섬이 기록과 같은지 확인합니다.
+
+        URL은 서명 파라미터를 빼고 비교하므로 토큰이 바뀌어도 이어 받을 수 있습니다.
+        """
+
+        record = self.records.get(path)
+        if not record or record.status != STATUS_DONE:
+            return False
+        if strip_signing_params(record.url) != strip_signing_params(url):
+            return False
+
+        try:
+            if os.path.getsize(path) != record.size:
+                return False
+        except OSError:
+            return False
+
+        return hash.calculate_sha256(path).hex() == record.sha256
@@ -0,0 +1,354 @@
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Sequence, Tuple
+from urllib.parse import urlparse
+
+from utils import fs
+
+# 초 단위 히스토그램 구간의 상한. 마지막 구간은 +Inf
+BUCKETS: Sequence[float] = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    300,
+)
+
+# 현재 스레드가 처리 중인 작업(재생 목록 URL)
+_job: ContextVar[str] = ContextVar("m3u8dl_job", default="")
+
+# (단계 또는 이름, 작업, 호스트)
+_Key = Tuple[str, str, str]
+
+
+class Histogram:
+    """
+    Prometheus와 같은 누적 구간으로 관측 값을 셉니다.
+
+    Args:
+        buckets (Sequence[float]): 오름차순 구간 상한.
+    """
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram"):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """
+        q 분위수를 구간 안에서 선형 보간하여 추정합니다.
+
+        Example:
+            >>> h = Histogram([1, 2])
+            >>> h.observe(1.5)
+            >>> h.quantile(0.5)
+            1.5
+        """
+
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                upper = min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class _Throughput:
+    def __init__(self) -> None:
+        self.bytes = 0
+        self.started = float("inf")
+        self.finished = 0.0
+
+    def add(self, nbytes: int, started: float, finished: float):
+        self.bytes += nbytes
+        self.started = min(self.started, started)
+        self.finished = max(self.finished, finished)
+
+    def merge(self, other: "_Throughput"):
+        self.add(other.bytes, other.started, other.finished)
+
+    def summary(self) -> dict:
+        seconds = max(0.0, self.finished - self.started)
+        return {
+            "bytes": self.bytes,
+            "seconds": seconds,
+            "mb_per_sec": self.bytes / 1024 / 1024 / seconds if seconds else 0.0,
+        }
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc if url else ""
+
+
+class Metrics:
+    """
+    단계별 소요 시간, 전송량, 횟수를 작업과 호스트별로 모읍니다.
+
+    작업은 bind()로 현재 스레드에 묶어 둔 값을 쓰므로, 연결 수립처럼 작업을
+    모르는 곳에서 잰 시간도 그 작업으로 집계됩니다. 여러 스레드에서 함께 쓸 수
+    있습니다.
+
+    Example:
+        >>> metrics = Metrics()
+        >>> with metrics.bind("https://lorem.com/a.m3u8"):
+        ...     with metrics.timer("hash"):
+        ...         calculate_sha256(path)
+        >>> metrics.summary()["stages"]["hash"]["count"]
+        1
+    """
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS) -> None:
+        self.buckets = buckets
+
+        self._lock = threading.Lock()
+        self._histograms: Dict[_Key, Histogram] = {}
+        self._throughputs: Dict[_Key, _Throughput] = {}
+        self._counters: Dict[_Key, int] = {}
+
+    @contextmanager
+    def bind(self, job: str) -> Iterator[None]:
+        """
+        블록 안에서 현재 스레드의 관측 값을 job으로 집계합니다.
+        """
+
+        token = _job.set(job)
+        try:
+            yield
+        finally:
+            _job.reset(token)
+
+    def current_job(self) -> str:
+        return _job.get()
+
+    def observe(self, stage: str, seconds: float, url: str = ""):
+        key = (stage, _job.get(), host_of(url))
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram(self.buckets)
+            self._histograms[key].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str, url: str = "") -> Iterator[None]:
+        """
+        블록이 끝나는 데 걸린 시간을 stage로 기록합니다. 예외가 나도 기록합니다.
+        """
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, url)
+
+    def add_bytes(self, nbytes: int, seconds: float, url: str = ""):
+        """
+        seconds 동안 받은 nbytes를 처리량에 더합니다.
+        """
+
+        finished = time.monotonic()
+        key = ("bytes", _job.get(), host_of(url))
+        with self._lock:
+            if key not in self._throughputs:
+                self._throughputs[key] = _Throughput()
+            self._throughputs[key].add(nbytes, finished - seconds, finished)
+
+    def count(self, name: str, url: str = "", value: int = 1):
+        key = (name, _job.get(), host_of(url))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def _group(self, by: int) -> dict:
+        histograms: Dict[str, Dict[str, Histogram]] = {}
+        throughputs: Dict[str, _Throughput] = {}
+        counters: Dict[str, Dict[str, int]] = {}
+
+        for key, histogram in self._histograms.items():
+            stages = histograms.setdefault(key[by], {})
+            if key[0] not in stages:
+                stages[key[0]] = Histogram(self.buckets)
+            stages[key[0]].merge(histogram)
+
+        for key, throughput in self._throughputs.items():
+            throughputs.setdefault(key[by], _Throughput()).merge(throughput)
+
+        for key, value in self._counters.items():
+            names = counters.setdefault(key[by], {})
+            names[key[0]] = names.get(key[0], 0) + value
+
+        groups = {}
+        for name in sorted(histograms.keys() | throughputs.keys() | counters.keys()):
+            groups[name] = {
+                **throughputs.get(name, _Throughput()).summary(),
+                "counters": counters.get(name, {}),
+                "stages": {
+                    stage: histogram.summary()
+                    for stage, histogram in sorted(histograms.get(name, {}).items())
+                },
+            }
+        return groups
+
+    def summary(self) -> dict:
+        """
+        전체 단계별 요약과 작업별, 호스트별 요약을 반환합니다.
+
+        단계별 요약에는 횟수, 합계, 평균, p50/p90/p99 추정값, 최댓값이 있고,
+        작업과 호스트에는 받은 바이트와 처리량(MB/s)이 더해집니다.
+        """
+
+        with self._lock:
+            stages: Dict[str, Histogram] = {}
+            for (stage, _, _), histogram in self._histograms.items():
+                if stage not in stages:
+                    stages[stage] = Histogram(self.buckets)
+                stages[stage].merge(histogram)
+
+            total = _Throughput()
+            for throughput in self._throughputs.values():
+                total.merge(throughput)
+
+            return {
+                **total.summary(),
+                "stages": {
+                    stage: histogram.summary()
+                    for stage, histogram in sorted(stages.items())
+                },
+                "jobs": self._group(1),
+                "hosts": self._group(2),
+            }
+
+    def prometheus(self) -> str:
+        """
+        Prometheus 텍스트 형식으로 모든 값을 반환합니다.
+        """
+
+        lines: List[str] = []
+
+        with self._lock:
+            lines += [
+                "# HELP m3u8dl_stage_seconds Time spent in each stage.",
+                "# TYPE m3u8dl_stage_seconds histogram",
+            ]
+            for (stage, job, host), histogram in sorted(self._histograms.items()):
+                labels = _labels(stage=stage, job=job, host=host)
+                bounds = [repr(float(bound)) for bound in histogram.buckets] + ["+Inf"]
+                cumulative = 0
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f'm3u8dl_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f"m3u8dl_stage_seconds_sum{{{labels}}} {histogram.sum}")
+                lines.append(
+                    f"m3u8dl_stage_seconds_count{{{labels}}} {histogram.count}"
+                )
+
+            lines += [
+                "# HELP m3u8dl_bytes_total Bytes of segments downloaded.",
+                "# TYPE m3u8dl_bytes_total counter",
+            ]
+            for (_, job, host), throughput in sorted(self._throughputs.items()):
+                labels = _labels(job=job, host=host)
+                lines.append(f"m3u8dl_bytes_total{{{labels}}} {throughput.bytes}")
+
+            lines += [
+                "# HELP m3u8dl_events_total Number of events such as retries.",
+                "# TYPE m3u8dl_events_total counter",
+            ]
+            for (event, job, host), value in sorted(self._counters.items()):
+                labels = _labels(event=event, job=job, host=host)
+                lines.append(f"m3u8dl_events_total{{{labels}}} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str):
+        content = json.dumps(self.summary(), indent=2, ensure_ascii=False)
+        fs.save(path, content.encode())
+
+    def write_prometheus(self, path: str):
+        fs.save(path, self.prometheus().encode())
+
+
+def _labels(**pairs: str) -> str:
+    """
+    비어 있지 않은 값만 `name="value"`로 이어 붙입니다.
+    """
+
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(
+        f'{name}="{escape(value)}"' for name, value in pairs.items() if value
+    )
+
+
+def serve(metrics: Metrics, port: int, host: str = "") -> ThreadingHTTPServer:
+    """
+    `/metrics`로 Prometheus 텍스트를 응답하는 서버를 데몬 스레드에서 띄웁니다.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+
+            body = metrics.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,204 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    `Retry-After` 헤더 값을 기다려야 하는 시간(초)으로 변환합니다.
+
+    Args:
+        value (str or None): 초 단위 정수 또는 HTTP 날짜 형식의 헤더 값.
+
+    Returns:
+        float or None: 기다려야 하는 시간(초). 값이 없거나 해석할 수 없으면 None.
+
+    Example:
+        >>> parse_retry_after("120")
+        120.0
+    """
+
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class _HostState:
+    def __init__(self, rate: float, now: float) -> None:
+        self.rate = rate
+        self.tokens = 1.0
+        self.updated = now
+        self.failures = 0
+
+
+class HostRateLimiter:
+    """
+    호스트별 토큰 버킷으로 요청 속도를 조절합니다.
+
+    응답이 빠르고 성공적이면 속도를 조금씩 올리고, 제한(429/503)이나 오류가
+    발생하면 속도를 절반으로 줄인 뒤 지터가 있는 지수 백오프만큼 해당 호스트의
+    요청을 멈춥니다. 서버가 `Retry-After`를 보냈다면 그 값을 따릅니다.
+
+    Args:
+        rate (float): 호스트별 초기 초당 요청 수.
+        min_rate (float): 초당 요청 수의 하한.
+        max_rate (float): 초당 요청 수의 상한.
+        increase (float): 성공할 때마다 곱할 증가율.
+        slow_response (float): 이 시간(초)보다 느린 응답은 속도를 올리지 않습니다.
+        max_backoff (float): 백오프 시간의 상한(초).
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        min_rate: float = 0.2,
+        max_rate: float = 50.0,
+        increase: float = 1.05,
+        slow_response: float = 2.0,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.slow_response = slow_response
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, _HostState] = {}
+
+    def _state_of(self, url: str, now: float) -> _HostState:
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = _HostState(self.rate, now)
+        return self._hosts[host]
+
+    def rate_of(self, url: str) -> float:
+        with self._lock:
+            return self._state_of(url, time.monotonic()).rate
+
+    def acquire(self, url: str) -> None:
+        """
+        해당 호스트에 요청을 보낼 수 있을 때까지 기다립니다.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            state = self._state_of(url, now)
+
+            # 백오프 중이면 updated가 미래 시각이므로 토큰을 채우지 않음
+            elapsed = now - state.updated
+            if elapsed > 0:
+                burst = max(1.0, state.rate)
+                state.tokens = min(burst, state.tokens + elapsed * state.rate)
+                state.updated = now
+
+            state.tokens -= 1
+            wait = max(0.0, state.updated - now) + max(0.0, -state.tokens) / state.rate
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_success(self, url: str, elapsed: float) -> None:
+        """
+        요청이 성공했음을 알립니다.
+
+        Args:
+            url (str): 요청한 URL.
+            elapsed (float): 응답 헤더를 받기까지 걸린 시간(초).
+        """
+
+        with self._lock:
+            state = self._state_of(url, time.monotonic())
+            state.failures = 0
+            if elapsed < self.slow_response:
+                state.rate = min(self.max_rate, state.rate * self.increase)
+
+    def on_failure(self, url: str, retry_after: Optional[float] = None) -> float:
+        """
+        요청이 제한되었거나 실패했음을 알리고, 해당 호스트를 잠시 멈춥니다.
+
+        Args:
+            url (str): 요청한 URL.
+            retry_after (float or None): 서버가 알려준 대기 시간(초).
+
+        Returns:
+            float: 해당 호스트의 요청을 멈추는 시간(초).
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            state = self._state_of(url, now)
+            state.failures += 1
+            state.rate = max(self.min_rate, state.rate / 2)
+
+            if retry_after is not None:
+                delay = min(self.max_backoff, retry_after)
+            else:
+                delay = self.backoff(state.failures)
+
+            state.tokens = min(state.tokens, 0.0)
+            state.updated = max(state.updated, now + delay)
+
+        return delay
+
+    def backoff(self, failures: int) -> float:
+        """
+        연속 실패 횟수에 따른 지수 백오프 시간(초)을 지터를 섞어 반환합니다.
+        """
+
+        ceiling = min(self.max_backoff, 2.0**failures)
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+class BandwidthLimiter:
+    """
+    모든 작업이 함께 쓰는 전송량(바이트/초)을 제한합니다.
+
+    Args:
+        rate (float): 초당 최대 바이트 수. 0이면 제한하지 않습니다.
+    """
+
+    def __init__(self, rate: float = 0) -> None:
+        self.rate = rate
+
+        self._lock = threading.Lock()
+        self._tokens = rate
+        self._updated = time.monotonic()
+
+    def consume(self, size: int) -> None:
+        """
+        size 바이트를 받았음을 알리고, 제한을 넘었으면 그만큼 기다립니다.
+        """
+
+        if self.rate <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._tokens = min(self.rate, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+            self._tokens -= size
+            wait = max(0.0, -self._tokens) / self.rate
+
+        if wait > 0:
+            time.sleep(wait)
@@ -0,0 +1,83 @@
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Optional
+
+log = logging.getLogger()
+
+
+@dataclass
+class JobResult:
+    url: str
+    output: Optional[str]
+    size: int
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return self.output is not None
+
+    @property
+    def throughput(self) -> float:
+        """
+        초당 받은 MB.
+        """
+
+        if self.seconds <= 0:
+            return 0.0
+        return self.size / 1024 / 1024 / self.seconds
+
+
+def run_jobs(
+    urls: List[str], run: Callable[[str], JobResult], jobs: int
+) -> List[JobResult]:
+    """
+    재생 목록 여러 개를 동시에 받습니다.
+
+    Args:
+        urls (List[str]): 재생 목록 URL 목록.
+        run (Callable[[str], JobResult]): 재생 목록 하나를 받는 함수.
+        jobs (int): 동시에 받을 재생 목록 수.
+
+    Returns:
+        List[JobResult]: 입력 순서대로 정렬된 작업 결과.
+    """
+
+    def run_safely(url: str) -> JobResult:
+        started = time.monotonic()
+        try:
+            return run(url)
+        except Exception as e:
+            log.error(f"job failed {url}: {e}")
+            return JobResult(url, None, 0, time.monotonic() - started)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        return list(executor.map(run_safely, urls))
+
+
+def write_report(results: List[JobResult], path: str):
+    """
+    작업별 결과와 처리량을 JSON 파일로 저장하고 요약을 로그로 남깁니다.
+    """
+
+    report = {
+        "jobs": [
+            {**asdict(result), "ok": result.ok, "mb_per_sec": result.throughput}
+            for result in results
+        ],
+        "succeeded": sum(1 for result in results if result.ok),
+        "failed": sum(1 for result in results if not result.ok),
+        "total_size": sum(result.size for result in results),
+    }
+
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+
+    for result in results:
+        status = "ok" if result.ok else "failed"
+        log.info(
+            f"{status}\t{result.throughput:.2f} MB/s\t{result.seconds:.1f}s\t{result.url}"
+        )
+    log.info(f"{report['succeeded']} succeeded, {report['failed']} failed → {path}")
@@ -0,0 +1,152 @@
+import json
+import os
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from m3u8dl.metrics import Metrics
+
+HEADERS_FILENAME = "headers.txt"
+
+
+class _TimedAdapter(HTTPAdapter):
+    """
+    새 연결을 맺는 데 걸린 시간을 "connect"(DNS 조회 포함)와 "tls" 단계로
+    기록하는 어댑터. 연결 풀에서 재사용한 연결은 기록하지 않습니다.
+    """
+
+    def __init__(self, metrics: Metrics, **kwargs) -> None:
+        self.metrics = metrics
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+
+        metrics = self.metrics
+
+        def url_of(conn: HTTPConnection) -> str:
+            # 요청 URL의 호스트와 같은 이름으로 집계되도록 기본 포트는 뺌
+            if conn.port in (None, conn.default_port):
+                return f"//{conn.host}"
+            return f"//{conn.host}:{conn.port}"
+
+        class TimedHTTPConnection(HTTPConnection):
+            def _new_conn(self):
+                started = time.perf_counter()
+                try:
+                    return super()._new_conn()
+                finally:
+                    self.connect_seconds = time.perf_counter() - started
+                    metrics.observe("connect", self.connect_seconds, url_of(self))
+
+        class TimedHTTPSConnection(HTTPSConnection):
+            _new_conn = TimedHTTPConnection._new_conn
+
+            def connect(self):
+                self.connect_seconds = 0.0
+                started = time.perf_counter()
+                super().connect()
+                seconds = time.perf_counter() - started - self.connect_seconds
+                metrics.observe("tls", seconds, url_of(self))
+
+        class TimedHTTPConnectionPool(HTTPConnectionPool):
+            ConnectionCls = TimedHTTPConnection
+
+        class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+            ConnectionCls = TimedHTTPSConnection
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+
+def create_session(
+    pool_size: int, retries: int = 2, metrics: Optional[Metrics] = None
+) -> requests.Session:
+    """
+    연결을 재사용하는 HTTP 세션을 생성합니다.
+
+    같은 호스트로 보내는 요청은 keep-alive 연결 풀을 공유하므로 세그먼트마다
+    TCP/TLS 연결을 새로 맺지 않습니다. 연결/읽기 오류는 연결 수준에서 짧게
+    재시도하고, 응답 코드에 따른 재시도는 호출하는 쪽에서 처리합니다.
+
+    Args:
+        pool_size (int): 호스트별로 유지할 최대 연결 수.
+        retries (int): 연결/읽기 오류 시 재시도 횟수.
+        metrics (Metrics or None): 있으면 새 연결을 맺는 시간을 기록합니다.
+
+    Returns:
+        requests.Session: 생성된 세션.
+    """
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=0,
+        backoff_factor=0.2,
+        allowed_methods=("GET", "HEAD"),
+        raise_on_status=False,
+    )
+    adapter_options = dict(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+        pool_block=True,
+    )
+    if metrics:
+        adapter = _TimedAdapter(metrics, **adapter_options)
+    else:
+        adapter = HTTPAdapter(**adapter_options)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def load_headers() -> Dict[str, str]:
+    """
+    요청에 사용할 HTTP 헤더를 설정 파일과 환경 변수에서 읽어옵니다.
+
+    `M3U8DL_HEADERS_FILE`(기본값 `headers.txt`) 파일의 `Name: Value` 형식 줄을
+    먼저 읽고, `M3U8DL_HEADERS` 환경 변수에 JSON 객체가 있으면 그 값으로
+    덮어씁니다.
+
+    Returns:
+        Dict[str, str]: 헤더 이름과 값.
+
+    Example:
+        >>> os.environ["M3U8DL_HEADERS"] = '{"Referer": "https://lorem.com/"}'
+        >>> load_headers()
+        {"Referer": "https://lorem.com/"}
+    """
+
+    headers: Dict[str, str] = {}
+
+    headers_file = os.environ.get("M3U8DL_HEADERS_FILE", HEADERS_FILENAME)
+    if os.path.isfile(headers_file):
+        with open(headers_file, "r") as file:
+            for line in file:
+                line = line.strip()
+
+                # 빈 줄과 주석은 무시
+                if not line or line.startswith("#"):
+                    continue
+
+                name, sep, value = line.partition(":")
+                if not sep:
+                    raise Exception(f'잘못된 헤더 "{line}" in {headers_file}')
+                headers[name.strip()] = value.strip()
+
+    if env := os.environ.get("M3U8DL_HEADERS"):
+        headers.update({str(k): str(v) for k, v in json.loads(env).items()})
+
+    return headers
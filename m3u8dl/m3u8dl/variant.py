@@ -0,0 +1,84 @@
+import logging
+from typing import Callable, List, Optional
+
+from m3u8dl.m3u8 import Variant
+
+log = logging.getLogger()
+
+POLICY_MAX_RESOLUTION = "max-resolution"
+POLICY_BANDWIDTH = "bandwidth"
+POLICY_FASTEST = "fastest"
+
+POLICIES = (POLICY_MAX_RESOLUTION, POLICY_BANDWIDTH, POLICY_FASTEST)
+
+
+def within_bandwidth(variants: List[Variant], max_bandwidth: int) -> List[Variant]:
+    """
+    대역폭 상한 이하인 변형만 남깁니다. 상한이 0이면 모두 남기고, 상한을
+    만족하는 변형이 없으면 대역폭이 가장 낮은 변형 하나를 남깁니다.
+    """
+
+    if max_bandwidth <= 0:
+        return list(variants)
+
+    if allowed := [v for v in variants if v.bandwidth <= max_bandwidth]:
+        return allowed
+
+    return [min(variants, key=lambda v: v.bandwidth)]
+
+
+def select_variant(
+    variants: List[Variant],
+    policy: str = POLICY_MAX_RESOLUTION,
+    max_bandwidth: int = 0,
+    probe: Optional[Callable[[Variant], float]] = None,
+) -> Variant:
+    """
+    마스터 재생 목록의 변형 중 하나를 정책에 따라 고릅니다.
+
+    Args:
+        variants (List[Variant]): 마스터 재생 목록의 변형 목록.
+        policy (str): 고르는 방법.
+            - `max-resolution`: 해상도가 가장 높은 변형. 같으면 대역폭이 높은 것.
+            - `bandwidth`: 대역폭이 가장 높은 변형.
+            - `fastest`: probe로 잰 첫 세그먼트 받기 시간이 가장 짧은 변형.
+        max_bandwidth (int): 고를 수 있는 최대 대역폭(bps). 0이면 제한하지 않습니다.
+        probe (Callable[[Variant], float] or None): 변형의 첫 세그먼트를 받는 데
+            걸린 시간(초)을 반환하는 함수. `fastest` 정책에 필요합니다.
+
+    Returns:
+        Variant: 고른 변형.
+    """
+
+    if not variants:
+        raise Exception("변형이 없는 마스터 재생 목록입니다")
+
+    candidates = within_bandwidth(variants, max_bandwidth)
+
+    if policy == POLICY_MAX_RESOLUTION:
+        return max(candidates, key=lambda v: (v.pixels, v.bandwidth))
+
+    if policy == POLICY_BANDWIDTH:
+        return max(candidates, key=lambda v: v.bandwidth)
+
+    if policy == POLICY_FASTEST:
+        if probe is None:
+            raise Exception(f"{POLICY_FASTEST} 정책에는 probe가 필요합니다")
+
+        timings = []
+        for candidate in candidates:
+            try:
+                elapsed = probe(candidate)
+            except Exception as e:
+                log.warning(f"probe failed {candidate.uri}: {e}")
+                continue
+
+            log.info(f"probe {candidate.uri}: {elapsed:.2f}s")
+            timings.append((elapsed, candidate))
+
+        if not timings:
+            raise Exception("모든 변형의 probe가 실패했습니다")
+
+        return min(timings, key=lambda timing: timing[0])[1]
+
+    raise Exception(f"알 수 없는 변형 선택 정책: {policy}")
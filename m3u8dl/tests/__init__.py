@@ -0,0 +1,4 @@
+import os
+
+# 테스트는 사용자의 해시 캐시를 쓰지 않음
+os.environ["UTILS_HASH_CACHE"] = ""
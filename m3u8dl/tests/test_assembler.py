@@ -0,0 +1,95 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+from m3u8dl.assembler import Assembler, is_native_available, segment_iv
+
+
+class AssemblerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.work_dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def save_segment(self, name: str, content: bytes) -> str:
+        path = os.path.join(self.work_dir, name)
+        with open(path, "wb") as file:
+            file.write(content)
+        return path
+
+    def test_segment_iv(self):
+        self.assertEqual(b"\x00" * 15 + b"\x07", segment_iv(None, 7))
+        self.assertEqual(b"\x00" * 15 + b"\x01", segment_iv("0x01", 7))
+        self.assertEqual(bytes(range(16)), segment_iv("0x" + bytes(range(16)).hex(), 0))
+
+    def test_out_of_order_segments_are_appended_in_order(self):
+        out_path = os.path.join(self.work_dir, "out.ts")
+        out = Assembler(out_path, [None] * 3)
+
+        out.add(2, self.save_segment("2.ts", b"c"))
+        out.add(0, self.save_segment("0.ts", b"a"))
+        out.add(1, self.save_segment("1.ts", b"b"))
+        out.close()
+
+        with open(out_path, "rb") as file:
+            self.assertEqual(b"abc", file.read())
+        self.assertEqual(hashlib.sha256(b"abc").digest(), out.sha256())
+
+    def test_extend_and_remove_segments(self):
+        out_path = os.path.join(self.work_dir, "out.ts")
+        out = Assembler(out_path, [None], remove_segments=True)
+
+        first = self.save_segment("0.ts", b"a")
+        out.add(0, first)
+        out.extend([None])
+        out.add(1, self.save_segment("1.ts", b"b"))
+        out.close()
+
+        with open(out_path, "rb") as file:
+            self.assertEqual(b"ab", file.read())
+        self.assertFalse(os.path.exists(first))
+
+    def test_missing_segment_raises(self):
+        out = Assembler(os.path.join(self.work_dir, "out.ts"), [None] * 2)
+        out.add(1, self.save_segment("1.ts", b"b"))
+
+        with self.assertRaises(Exception):
+            out.close()
+
+    def test_abort_does_not_check_missing_segments(self):
+        out_path = os.path.join(self.work_dir, "out.ts")
+        out = Assembler(out_path, [None] * 2)
+        out.add(0, self.save_segment("0.ts", b"a"))
+        out.abort()
+
+        with open(out_path, "rb") as file:
+            self.assertEqual(b"a", file.read())
+
+    @unittest.skipUnless(is_native_available(), "cryptography is not installed")
+    def test_decrypts_segments(self):
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        key = bytes(range(16))
+        plain = [b"first segment", b"second segment" * 100]
+
+        for i, content in enumerate(plain):
+            padder = padding.PKCS7(128).padder()
+            padded = padder.update(content) + padder.finalize()
+            iv = segment_iv(None, 10 + i)
+            encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+            self.save_segment(
+                f"{i}.ts", encryptor.update(padded) + encryptor.finalize()
+            )
+
+        out_path = os.path.join(self.work_dir, "out.ts")
+        out = Assembler(out_path, [(key, segment_iv(None, 10 + i)) for i in range(2)])
+        for i in range(2):
+            out.add(i, os.path.join(self.work_dir, f"{i}.ts"))
+        out.close()
+
+        with open(out_path, "rb") as file:
+            self.assertEqual(b"".join(plain), file.read())
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+
+from m3u8dl import main
+from m3u8dl.ratelimit import HostRateLimiter
+
+BODY = os.urandom(100000)
+
+
+class TruncatingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = 0
+
+    def do_GET(self):
+        TruncatingHandler.requests += 1
+
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+
+        # 첫 요청은 10바이트만 보내고 연결을 끊음
+        if TruncatingHandler.requests == 1:
+            self.wfile.write(BODY[:10])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DownloadToTests(unittest.TestCase):
+    def setUp(self):
+        TruncatingHandler.requests = 0
+        server = ThreadingHTTPServer(("127.0.0.1", 0), TruncatingHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f"http://127.0.0.1:{server.server_port}/0.ts"
+
+        limiter = HostRateLimiter(rate=100, max_rate=100, max_backoff=0.01)
+        patcher = mock.patch.object(main, "RATE_LIMITER", limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def test_truncated_body_is_retried(self):
+        path = os.path.join(self.dir.name, "0.ts")
+        fetched = main.download_to(self.url, path, headers={})
+
+        self.assertEqual(2, TruncatingHandler.requests)
+        self.assertEqual(len(BODY), fetched.size)
+        with open(path, "rb") as file:
+            self.assertEqual(BODY, file.read())
+
+    def test_connection_errors_are_not_retried_again(self):
+        # request()가 이미 재시도한 연결 실패는 그대로 전달함
+        failing = mock.Mock(side_effect=requests.ConnectionError("refused"))
+        path = os.path.join(self.dir.name, "0.ts")
+
+        with mock.patch.object(main, "request", failing):
+            with self.assertRaises(requests.ConnectionError):
+                main.download_to(self.url, path, headers={})
+
+        self.assertEqual(1, failing.call_count)
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from types import SimpleNamespace
+
+from m3u8dl.live import LivePlaylist
+
+
+def playlist_text(first: int, count: int, ended: bool = False) -> bytes:
+    lines = ["#EXTM3U", "#EXT-X-TARGETDURATION:4", f"#EXT-X-MEDIA-SEQUENCE:{first}"]
+    for sequence in range(first, first + count):
+        lines += ["#EXTINF:4.0,", f"{sequence}.ts"]
+    if ended:
+        lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines).encode()
+
+
+class LivePlaylistTests(unittest.TestCase):
+    def setUp(self):
+        self.responses = []
+        self.requests = []
+
+    def get(self, headers):
+        self.requests.append(headers)
+        return self.responses.pop(0)
+
+    def respond(self, content: bytes = b"", status_code=200, **headers):
+        self.responses.append(
+            SimpleNamespace(status_code=status_code, headers=headers, content=content)
+        )
+
+    def test_only_new_segments_are_returned(self):
+        follower = LivePlaylist(self.get)
+
+        self.respond(playlist_text(0, 3), ETag='"a"')
+        self.assertEqual([0, 1, 2], [s.sequence for s in follower.poll()])
+
+        # 앞쪽 세그먼트가 빠지고 뒤에 새 세그먼트가 붙은 경우
+        self.respond(playlist_text(2, 3), ETag='"b"')
+        self.assertEqual([3, 4], [s.sequence for s in follower.poll()])
+        self.assertEqual(4, follower.target_duration)
+        self.assertFalse(follower.ended)
+
+        self.respond(playlist_text(3, 2, ended=True))
+        self.assertEqual([], follower.poll())
+        self.assertTrue(follower.ended)
+
+    def test_conditional_request(self):
+        follower = LivePlaylist(self.get)
+
+        self.respond(playlist_text(0, 1), ETag='"a"', **{"Last-Modified": "x"})
+        follower.poll()
+        self.assertEqual({}, self.requests[0])
+
+        self.respond(status_code=304)
+        self.assertEqual([], follower.poll())
+        self.assertEqual(
+            {"If-None-Match": '"a"', "If-Modified-Since": "x"}, self.requests[1]
+        )
+        self.assertEqual('"a"', follower.etag)
+
+
+if __name__ == "__main__":
+    unittest.main()
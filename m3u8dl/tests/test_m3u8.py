@@ -0,0 +1,128 @@
+import unittest
+from datetime import timedelta
+
+from m3u8dl import m3u8
+
+PLAYLIST = """#EXTM3U
+#EXT-X-VERSION:4
+#EXT-X-TARGETDURATION:10
+#EXT-X-MEDIA-SEQUENCE:7
+#EXT-X-KEY:METHOD=AES-128,URI="/keys/1?a=1,b=2",IV=0x01
+#EXTINF:9.5,
+video.ts?token=abc
+#EXTINF:10.0,
+#EXT-X-BYTERANGE:1000@0
+media.ts
+#EXTINF:10.0,
+#EXT-X-BYTERANGE:500
+media.ts
+#EXT-X-DISCONTINUITY
+#EXT-X-KEY:METHOD=AES-128,URI="/keys/2"
+#EXTINF:4.0,
+https://cdn.lorem.com/last.ts
+#EXT-X-KEY:METHOD=NONE
+#EXTINF:1.0,
+plain.ts
+#EXT-X-ENDLIST
+"""
+
+
+class M3u8Tests(unittest.TestCase):
+    def test_parse_ext_x_key_info(self):
+        info = m3u8.parse_ext_x_key_info(
+            '#EXT-X-KEY:METHOD=AES-128,URI="https://lorem.com/key",IV=0x1234'
+        )
+        self.assertEqual(m3u8.EncryptionMethod.AES, info.method)
+        self.assertEqual("https://lorem.com/key", info.uri)
+        self.assertEqual("0x1234", info.iv)
+
+        self.assertEqual(
+            m3u8.EncryptionMethod.NONE,
+            m3u8.parse_ext_x_key_info("#EXT-X-KEY:METHOD=NONE").method,
+        )
+        self.assertIsNone(m3u8.parse_ext_x_key_info("#EXTINF:1.0,"))
+
+    def test_parse(self):
+        playlist = m3u8.parse(PLAYLIST.encode())
+
+        self.assertEqual(10, playlist.target_duration)
+        self.assertEqual(7, playlist.media_sequence)
+        self.assertTrue(playlist.ended)
+        self.assertFalse(playlist.is_live)
+        self.assertEqual(timedelta(seconds=34), playlist.playtime)
+
+        uris = [segment.uri for segment in playlist.segments]
+        self.assertEqual(
+            [
+                "video.ts?token=abc",
+                "media.ts",
+                "media.ts",
+                "https://cdn.lorem.com/last.ts",
+                "plain.ts",
+            ],
+            uris,
+        )
+        self.assertEqual([7, 8, 9, 10, 11], [s.sequence for s in playlist.segments])
+        self.assertEqual(
+            [False, False, False, True, False],
+            [s.discontinuity for s in playlist.segments],
+        )
+
+        # 오프셋이 생략된 범위는 이전 범위 끝에서 이어짐
+        first, second = playlist.segments[1:3]
+        self.assertEqual("bytes=0-999", first.byte_range.header())
+        self.assertEqual("bytes=1000-1499", second.byte_range.header())
+
+    def test_is_live(self):
+        header = "#EXTM3U\n#EXT-X-TARGETDURATION:4\n"
+        segment = "#EXTINF:4.0,\n0.ts\n"
+
+        self.assertTrue(m3u8.parse((header + segment).encode()).is_live)
+        event = header + "#EXT-X-PLAYLIST-TYPE:EVENT\n" + segment
+        self.assertTrue(m3u8.parse(event.encode()).is_live)
+        vod = header + "#EXT-X-PLAYLIST-TYPE:VOD\n" + segment
+        self.assertFalse(m3u8.parse(vod.encode()).is_live)
+
+    def test_rotating_keys(self):
+        playlist = m3u8.parse(PLAYLIST)
+
+        self.assertTrue(playlist.is_encrypted)
+        self.assertEqual(["/keys/1?a=1,b=2", "/keys/2"], [k.uri for k in playlist.keys])
+        self.assertEqual("/keys/1?a=1,b=2", playlist.segments[2].key.uri)
+        self.assertEqual("/keys/2", playlist.segments[3].key.uri)
+        self.assertIsNone(playlist.segments[3].key.iv)
+        self.assertIsNone(playlist.segments[4].key)
+
+    def test_only_identity_keys(self):
+        playlist = m3u8.parse(
+            "#EXTM3U\n"
+            '#EXT-X-KEY:METHOD=AES-128,URI="/keys/1"\n'
+            '#EXT-X-KEY:METHOD=SAMPLE-AES,URI="skd://1",'
+            'KEYFORMAT="com.apple.streamingkeydelivery"\n'
+            "#EXTINF:4.0,\n0.ts\n"
+            '#EXT-X-KEY:METHOD=AES-128,URI="/keys/2",KEYFORMAT="identity"\n'
+            '#EXT-X-KEY:METHOD=SAMPLE-AES,URI="data:text/plain;base64,AAAA",'
+            'KEYFORMAT="urn:uuid:edef8ba9-79d6-4ace-a3c8-27dcd51d21ed"\n'
+            "#EXTINF:4.0,\n1.ts\n"
+        )
+
+        self.assertEqual("/keys/1", playlist.segments[0].key.uri)
+        self.assertEqual("/keys/2", playlist.segments[1].key.uri)
+        self.assertEqual(m3u8.EncryptionMethod.AES, playlist.segments[1].key.method)
+
+    def test_dumps_uses_local_uris(self):
+        playlist = m3u8.parse(PLAYLIST)
+        local = m3u8.dumps(
+            playlist,
+            [f"{i}.ts" for i in range(len(playlist.segments))],
+            {"/keys/1?a=1,b=2": "0.key", "/keys/2": "1.key"},
+        )
+
+        reparsed = m3u8.parse(local)
+        self.assertEqual(playlist.media_sequence, reparsed.media_sequence)
+        self.assertEqual(
+            ["0.ts", "1.ts", "2.ts", "3.ts", "4.ts"], [s.uri for s in reparsed.segments]
+        )
+        self.assertEqual(["0.key", "1.key"], [k.uri for k in reparsed.keys])
+        self.assertEqual(playlist.playtime, reparsed.playtime)
+        self.assertIsNone(reparsed.segments[1].byte_range)
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+from m3u8dl.fetcher import Fetched
+from m3u8dl.manifest import Manifest, job_id_of, segment_fingerprint
+
+
+class ManifestTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.work_dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def save_segment(self, name: str, content: bytes) -> str:
+        path = os.path.join(self.work_dir, name)
+        with open(path, "wb") as file:
+            file.write(content)
+        return path
+
+    def test_verified_segments_survive_reload(self):
+        playlist_url = "https://lorem.com/ipsum.m3u8"
+        content = b"segment"
+        path = self.save_segment("seg1.ts", content)
+
+        manifest = Manifest(self.work_dir, playlist_url)
+        manifest.record(
+            "https://lorem.com/seg1.ts",
+            path,
+            Fetched(size=len(content), sha256=hashlib.sha256(content).digest()),
+        )
+
+        reloaded = Manifest(self.work_dir, playlist_url)
+        self.assertTrue(reloaded.is_verified("https://lorem.com/seg1.ts", path))
+        self.assertFalse(reloaded.is_verified("https://lorem.com/seg2.ts", path))
+
+    def test_corrupt_segment_is_not_verified(self):
+        content = b"segment"
+        path = self.save_segment("seg1.ts", content)
+
+        manifest = Manifest(self.work_dir, "https://lorem.com/ipsum.m3u8")
+        manifest.record(
+            "https://lorem.com/seg1.ts",
+            path,
+            Fetched(size=len(content), sha256=hashlib.sha256(content).digest()),
+        )
+
+        # 크기는 같지만 내용이 다른 경우
+        self.save_segment("seg1.ts", b"SEGMENT")
+        self.assertFalse(manifest.is_verified("https://lorem.com/seg1.ts", path))
+
+        os.remove(path)
+        self.assertFalse(manifest.is_verified("https://lorem.com/seg1.ts", path))
+
+    def test_rotated_tokens_resume(self):
+        content = b"segment"
+        path = self.save_segment("seg1.ts", content)
+
+        manifest = Manifest(self.work_dir, "https://lorem.com/ipsum.m3u8?token=a")
+        manifest.record(
+            "https://lorem.com/seg1.ts?n=1&Expires=1&Signature=a",
+            path,
+            Fetched(size=len(content), sha256=hashlib.sha256(content).digest()),
+        )
+
+        reloaded = Manifest(self.work_dir, "https://lorem.com/ipsum.m3u8?token=b")
+        self.assertTrue(
+            reloaded.is_verified(
+                "https://lorem.com/seg1.ts?n=1&Expires=2&Signature=b", path
+            )
+        )
+        self.assertFalse(
+            reloaded.is_verified(
+                "https://lorem.com/seg1.ts?n=2&Expires=2&Signature=b", path
+            )
+        )
+        self.assertEqual(
+            job_id_of("https://lorem.com/ipsum.m3u8?token=a"),
+            job_id_of("https://lorem.com/ipsum.m3u8?token=b"),
+        )
+
+    def test_segment_fingerprint_ignores_signing_params(self):
+        urls = ["https://lorem.com/seg1.ts", "https://lorem.com/seg2.ts"]
+        signed = [url + "?token=abc&Expires=1&X-Amz-Signature=f" for url in urls]
+
+        self.assertEqual(segment_fingerprint(urls), segment_fingerprint(signed))
+        self.assertNotEqual(segment_fingerprint(urls), segment_fingerprint(urls[:1]))
+
+    def test_segment_fingerprint_keeps_other_query(self):
+        first = [f"https://lorem.com/seg.ts?n={n}" for n in range(3)]
+        second = [f"https://lorem.com/seg.ts?n={n}" for n in range(3, 6)]
+        signed = [url + "&sig=abc" for url in first]
+
+        self.assertNotEqual(segment_fingerprint(first), segment_fingerprint(second))
+        self.assertEqual(segment_fingerprint(first), segment_fingerprint(signed))
@@ -0,0 +1,123 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from m3u8dl import session
+from m3u8dl.metrics import Histogram, Metrics
+
+
+class HistogramTests(unittest.TestCase):
+    def test_quantile_interpolates_within_bucket(self):
+        histogram = Histogram([1, 2, 4])
+        for value in (0.5, 1.5, 1.5, 3):
+            histogram.observe(value)
+
+        self.assertEqual(4, histogram.count)
+        self.assertEqual([1, 2, 1, 0], histogram.counts)
+        self.assertEqual(1.5, histogram.quantile(0.5))
+        self.assertEqual(3, histogram.quantile(1))
+        self.assertEqual(0.0, Histogram().quantile(0.5))
+
+    def test_merge(self):
+        a, b = Histogram([1]), Histogram([1])
+        a.observe(0.5)
+        b.observe(2)
+        a.merge(b)
+
+        self.assertEqual([1, 1], a.counts)
+        self.assertEqual(2.5, a.sum)
+        self.assertEqual(2, a.max)
+
+
+class MetricsTests(unittest.TestCase):
+    def test_summary_by_job_and_host(self):
+        metrics = Metrics()
+
+        with metrics.bind("job-a"):
+            metrics.observe("ttfb", 0.1, "https://a.example.com/1.ts")
+            metrics.observe("ttfb", 0.3, "https://b.example.com/1.ts")
+            metrics.add_bytes(1024 * 1024, 0.5, "https://a.example.com/1.ts")
+            metrics.count("retry", "https://b.example.com/1.ts")
+        with metrics.bind("job-b"):
+            metrics.observe("ttfb", 0.2, "https://a.example.com/2.ts")
+        metrics.observe("ffmpeg", 3)
+
+        summary = metrics.summary()
+        self.assertEqual(3, summary["stages"]["ttfb"]["count"])
+        self.assertEqual(1024 * 1024, summary["bytes"])
+
+        job_a = summary["jobs"]["job-a"]
+        self.assertEqual(2, job_a["stages"]["ttfb"]["count"])
+        self.assertEqual({"retry": 1}, job_a["counters"])
+        self.assertAlmostEqual(2.0, job_a["mb_per_sec"], places=1)
+
+        host_a = summary["hosts"]["a.example.com"]
+        self.assertEqual(2, host_a["stages"]["ttfb"]["count"])
+        self.assertNotIn("ffmpeg", host_a["stages"])
+        self.assertIn("ffmpeg", summary["jobs"][""]["stages"])
+
+    def test_bind_is_per_thread(self):
+        metrics = Metrics()
+
+        with metrics.bind("main"):
+            thread = threading.Thread(target=metrics.observe, args=("hash", 1))
+            thread.start()
+            thread.join()
+            self.assertEqual("main", metrics.current_job())
+        self.assertEqual("", metrics.current_job())
+
+        # 새 스레드는 bind()한 작업을 물려받지 않음
+        self.assertEqual([""], list(metrics.summary()["jobs"]))
+
+    def test_prometheus(self):
+        metrics = Metrics(buckets=[1])
+        with metrics.bind('say "hi"'):
+            metrics.observe("ttfb", 0.5, "http://a.example.com/1.ts")
+            metrics.add_bytes(10, 1, "http://a.example.com/1.ts")
+            metrics.count("retry")
+
+        text = metrics.prometheus()
+        labels = 'stage="ttfb",job="say \\"hi\\"",host="a.example.com"'
+        self.assertIn(f'm3u8dl_stage_seconds_bucket{{{labels},le="1.0"}} 1', text)
+        self.assertIn(f'm3u8dl_stage_seconds_bucket{{{labels},le="+Inf"}} 1', text)
+        self.assertIn(f"m3u8dl_stage_seconds_count{{{labels}}} 1", text)
+        self.assertIn(
+            'm3u8dl_bytes_total{job="say \\"hi\\"",host="a.example.com"} 10', text
+        )
+        self.assertIn('m3u8dl_events_total{event="retry",job="say \\"hi\\""} 1', text)
+
+
+class TimedSessionTests(unittest.TestCase):
+    def test_new_connections_are_timed(self):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        metrics = Metrics()
+        client = session.create_session(1, metrics=metrics)
+        url = f"http://127.0.0.1:{server.server_port}/"
+        for _ in range(3):
+            self.assertEqual(b"ok", client.get(url).content)
+
+        # keep-alive 연결을 재사용하므로 한 번만 연결함
+        host = f"127.0.0.1:{server.server_port}"
+        self.assertEqual(
+            1, metrics.summary()["hosts"][host]["stages"]["connect"]["count"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+from m3u8dl.ratelimit import HostRateLimiter, parse_retry_after
+
+
+class RateLimitTests(unittest.TestCase):
+    def test_parse_retry_after(self):
+        self.assertEqual(120.0, parse_retry_after("120"))
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+        later = datetime.now(timezone.utc) + timedelta(seconds=30)
+        seconds = parse_retry_after(format_datetime(later, usegmt=True))
+        self.assertIsNotNone(seconds)
+        self.assertTrue(25 <= seconds <= 30)
+
+    def test_rate_adapts_per_host(self):
+        limiter = HostRateLimiter(rate=4, min_rate=1, max_rate=5, increase=2)
+        url_a = "https://a.example.com/seg1.ts"
+        url_b = "https://b.example.com/seg1.ts"
+
+        limiter.on_success(url_a, 0.1)
+        self.assertEqual(5, limiter.rate_of(url_a))
+
+        delay = limiter.on_failure(url_b, retry_after=3)
+        self.assertEqual(3, delay)
+        self.assertEqual(2, limiter.rate_of(url_b))
+
+        limiter.on_failure(url_b)
+        limiter.on_failure(url_b)
+        self.assertEqual(1, limiter.rate_of(url_b))
+
+        # 느린 응답은 속도를 올리지 않음
+        limiter.on_success(url_b, 10)
+        self.assertEqual(1, limiter.rate_of(url_b))
+
+    def test_backoff_grows_with_failures(self):
+        limiter = HostRateLimiter(max_backoff=10)
+        for failures in range(1, 8):
+            ceiling = min(10, 2.0**failures)
+            delay = limiter.backoff(failures)
+            self.assertTrue(ceiling / 2 <= delay <= ceiling)
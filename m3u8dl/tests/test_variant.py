@@ -0,0 +1,68 @@
+import unittest
+
+from m3u8dl import m3u8
+from m3u8dl.variant import (
+    POLICY_BANDWIDTH,
+    POLICY_FASTEST,
+    POLICY_MAX_RESOLUTION,
+    select_variant,
+)
+
+MASTER = """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2"
+360p/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=2800000,RESOLUTION=1280x720
+720p/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=5000000,RESOLUTION=1920x1080
+1080p/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=6000000
+audio-heavy/index.m3u8
+"""
+
+
+class VariantTests(unittest.TestCase):
+    def setUp(self):
+        self.playlist = m3u8.parse(MASTER)
+
+    def test_parse_master(self):
+        self.assertTrue(self.playlist.is_master)
+        self.assertEqual([], self.playlist.segments)
+        self.assertEqual(4, len(self.playlist.variants))
+
+        first = self.playlist.variants[0]
+        self.assertEqual("360p/index.m3u8", first.uri)
+        self.assertEqual(800000, first.bandwidth)
+        self.assertEqual((640, 360), first.resolution)
+        self.assertEqual("avc1.4d401e,mp4a.40.2", first.codecs)
+        self.assertIsNone(self.playlist.variants[3].resolution)
+
+    def test_max_resolution(self):
+        selected = select_variant(self.playlist.variants, POLICY_MAX_RESOLUTION)
+        self.assertEqual("1080p/index.m3u8", selected.uri)
+
+        selected = select_variant(
+            self.playlist.variants, POLICY_MAX_RESOLUTION, max_bandwidth=3000000
+        )
+        self.assertEqual("720p/index.m3u8", selected.uri)
+
+    def test_bandwidth_cap(self):
+        selected = select_variant(self.playlist.variants, POLICY_BANDWIDTH)
+        self.assertEqual("audio-heavy/index.m3u8", selected.uri)
+
+        # 상한을 만족하는 변형이 없으면 가장 낮은 대역폭
+        selected = select_variant(
+            self.playlist.variants, POLICY_BANDWIDTH, max_bandwidth=100
+        )
+        self.assertEqual("360p/index.m3u8", selected.uri)
+
+    def test_fastest(self):
+        timings = {"360p": 0.5, "720p": 0.2, "1080p": 0.9}
+
+        def probe(variant: m3u8.Variant) -> float:
+            name = variant.uri.split("/")[0]
+            if name not in timings:
+                raise Exception("timeout")
+            return timings[name]
+
+        selected = select_variant(self.playlist.variants, POLICY_FASTEST, probe=probe)
+        self.assertEqual("720p/index.m3u8", selected.uri)
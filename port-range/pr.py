@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+PROC = "/proc"
+
+# (파일 이름, 표시할 프로토콜)
+SOCKET_TABLES = [
+    ("tcp", "TCP"),
+    ("tcp6", "TCP"),
+    ("udp", "UDP"),
+    ("udp6", "UDP"),
+]
+
+# include/net/tcp_states.h. 이름은 Get-NetTCPConnection의 State와 맞춤
+TCP_STATES = {
+    0x01: "Established",
+    0x02: "SynSent",
+    0x03: "SynReceived",
+    0x04: "FinWait1",
+    0x05: "FinWait2",
+    0x06: "TimeWait",
+    0x07: "Closed",
+    0x08: "CloseWait",
+    0x09: "LastAck",
+    0x0A: "Listen",
+    0x0B: "Closing",
+    0x0C: "NewSynRecv",
+}
+
+COLUMNS = ["Protocol", "LocalPort", "ProcessName", "Id", "Path", "State"]
+RIGHT_ALIGNED = {"LocalPort", "Id"}
+
+
+@dataclass(frozen=True)
+class Socket:
+    protocol: str
+    local_port: int
+    state: str
+    inode: int
+
+
+@dataclass(frozen=True)
+class Row:
+    protocol: str
+    local_port: int
+    process_name: str
+    pid: Optional[int]
+    path: str
+    state: str
+
+    def cells(self) -> List[str]:
+        return [
+            self.protocol,
+            str(self.local_port),
+            self.process_name,
+            "" if self.pid is None else str(self.pid),
+            self.path,
+            self.state,
+        ]
+
+
+def read_sockets(start_port: int, end_port: int, proc: str = PROC) -> Iterable[Socket]:
+    """
+    /proc/net/{tcp,tcp6,udp,udp6}에서 로컬 포트가 범위 안인 소켓을 읽습니다.
+
+    파일마다 한 번에 읽고, 포트가 범위 밖인 줄은 포트만 보고 버립니다.
+
+    Example:
+        >>> [s.local_port for s in read_sockets(8000, 9000)]
+        [8888, 8380]
+    """
+
+    for name, protocol in SOCKET_TABLES:
+        try:
+            with open(os.path.join(proc, "net", name), "rb") as file:
+                lines = file.read().splitlines()[1:]
+        except FileNotFoundError:
+            # IPv6를 끈 커널
+            continue
+
+        for line in lines:
+            # sl local_address rem_address st tx_queue:rx_queue tr:tm->when
+            # retrnsmt uid timeout inode ...
+            fields = line.split(None, 10)
+            port = int(fields[1].rsplit(b":", 1)[1], 16)
+            if not start_port <= port <= end_port:
+                continue
+
+            state = ""
+            if protocol == "TCP":
+                code = int(fields[3], 16)
+                state = TCP_STATES.get(code, str(code))
+
+            yield Socket(protocol, port, state, int(fields[9]))
+
+
+def _readlink(path: str) -> str:
+    try:
+        return os.readlink(path)
+    except OSError:
+        # 그 사이 종료된 프로세스, 또는 권한이 없는 프로세스
+        return ""
+
+
+def _pids(proc: str) -> List[int]:
+    return [int(name) for name in os.listdir(proc) if name.isdigit()]
+
+
+def map_inodes(
+    inodes: Set[int], proc: str = PROC, pids: Optional[Iterable[int]] = None
+) -> Dict[int, int]:
+    """
+    /proc/*/fd를 한 번 훑어 소켓 inode와 그 소켓을 연 PID를 짝짓습니다.
+
+    찾는 inode를 모두 찾으면 바로 멈추므로, 범위가 좁을수록 빨리 끝납니다.
+    여러 프로세스가 같은 소켓을 열고 있으면 PID가 가장 작은 것을 씁니다.
+
+    Args:
+        inodes (Set[int]): 찾을 소켓 inode.
+        proc (str): procfs 경로.
+        pids (Iterable[int] or None): 훑을 PID. 없으면 모든 프로세스.
+
+    Returns:
+        Dict[int, int]: inode에서 PID로의 매핑. 찾지 못한 inode는 빠집니다.
+    """
+
+    owners: Dict[int, int] = {}
+    remaining = set(inodes)
+    remaining.discard(0)
+
+    for pid in sorted(_pids(proc) if pids is None else pids):
+        if not remaining:
+            break
+
+        fd_dir = f"{proc}/{pid}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+
+        for fd in fds:
+            link = _readlink(f"{fd_dir}/{fd}")
+            # "socket:[12345]"
+            if not link.startswith("socket:["):
+                continue
+            inode = int(link[8:-1])
+            if inode in remaining:
+                owners[inode] = pid
+                remaining.discard(inode)
+
+    return owners
+
+
+def process_info(pid: int, proc: str = PROC) -> Tuple[str, str]:
+    """
+    프로세스 이름과 실행 파일 경로를 반환합니다. 모르면 빈 문자열.
+    """
+
+    try:
+        with open(f"{proc}/{pid}/comm") as file:
+            name = file.read().strip()
+    except OSError:
+        name = ""
+    return name, _readlink(f"{proc}/{pid}/exe")
+
+
+class PortScanner:
+    """
+    포트 범위의 소켓을 그 소켓을 연 프로세스와 함께 찾습니다.
+
+    이전 scan()에서 찾은 inode의 주인과 프로세스 정보를 기억해 두었다가, 그
+    프로세스가 살아 있으면 다시 찾지 않습니다. 주인을 찾지 못한 inode도 기억하므로
+    watch 모드에서는 새로 생긴 소켓만 /proc/*/fd에서 찾습니다.
+
+    Args:
+        start_port (int): 범위의 시작 포트.
+        end_port (int): 범위의 끝 포트 (포함).
+        proc (str): procfs 경로.
+    """
+
+    def __init__(self, start_port: int, end_port: int, proc: str = PROC) -> None:
+        self.start_port = start_port
+        self.end_port = end_port
+        self.proc = proc
+
+        # 주인을 찾지 못한 inode는 None
+        self._owners: Dict[int, Optional[int]] = {}
+        self._processes: Dict[int, Tuple[str, str]] = {}
+
+    def scan(self) -> List[Row]:
+        sockets = list(read_sockets(self.start_port, self.end_port, self.proc))
+        inodes = {s.inode for s in sockets}
+
+        alive = set(_pids(self.proc))
+        self._owners = {
+            inode: pid
+            for inode, pid in self._owners.items()
+            if inode in inodes and (pid is None or pid in alive)
+        }
+        self._processes = {
+            pid: info for pid, info in self._processes.items() if pid in alive
+        }
+
+        if missing := inodes - self._owners.keys():
+            found = map_inodes(missing, self.proc, alive)
+            self._owners.update({inode: found.get(inode) for inode in missing})
+
+        rows = []
+        for s in sockets:
+            pid = self._owners.get(s.inode)
+            name, path = "", ""
+            if pid is not None:
+                if pid not in self._processes:
+                    self._processes[pid] = process_info(pid, self.proc)
+                name, path = self._processes[pid]
+            rows.append(Row(s.protocol, s.local_port, name, pid, path, s.state))
+
+        rows.sort(key=lambda r: (r.protocol, r.local_port, r.pid or 0, r.state))
+        return rows
+
+
+def format_table(rows: List[Row]) -> str:
+    """
+    Format-Table처럼 열 이름과 밑줄, 행을 맞춰 출력할 문자열을 만듭니다.
+    """
+
+    table = [row.cells() for row in rows]
+    widths = [
+        max([len(column)] + [len(cells[i]) for cells in table])
+        for i, column in enumerate(COLUMNS)
+    ]
+
+    def line(cells: List[str]) -> str:
+        return " ".join(
+            cell.rjust(width) if column in RIGHT_ALIGNED else cell.ljust(width)
+            for column, cell, width in zip(COLUMNS, cells, widths)
+        ).rstrip()
+
+    lines = [line(COLUMNS), line(["-" * len(column) for column in COLUMNS])]
+    lines += [line(cells) for cells in table]
+    return "\n".join(lines)
+
+
+def watch(scanner: PortScanner, interval: float):
+    """
+    interval초마다 다시 찾습니다. 터미널이면 표를 다시 그리고, 아니면 생기거나
+    사라진 행만 `+`/`-`를 붙여 출력합니다.
+    """
+
+    previous: List[Row] = []
+    while True:
+        started = time.monotonic()
+        rows = scanner.scan()
+        elapsed = time.monotonic() - started
+
+        if sys.stdout.isatty():
+            sys.stdout.write("\x1b[H\x1b[2J")
+            print(time.strftime("%H:%M:%S"), f"({elapsed * 1000:.0f} ms)")
+            print(format_table(rows))
+        else:
+            before, after = set(previous), set(rows)
+            for row in rows:
+                if row not in before:
+                    print("+", *row.cells(), sep="\t")
+            for row in previous:
+                if row not in after:
+                    print("-", *row.cells(), sep="\t")
+        sys.stdout.flush()
+
+        previous = rows
+        time.sleep(max(0.0, interval - elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show TCP/UDP sockets whose local port is in a range and the processes that own them."
+    )
+    parser.add_argument("start_port", type=int)
+    parser.add_argument("end_port", type=int, nargs="?")
+    parser.add_argument(
+        "-w",
+        "--watch",
+        type=float,
+        nargs="?",
+        const=2.0,
+        metavar="SECONDS",
+        help="refresh every SECONDS (default: 2)",
+    )
+    args = parser.parse_args()
+
+    end_port = args.start_port if args.end_port is None else args.end_port
+    scanner = PortScanner(args.start_port, end_port)
+
+    if args.watch is None:
+        print(format_table(scanner.scan()))
+        return
+
+    try:
+        watch(scanner, args.watch)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+import pr
+
+HEADER = (
+    "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when"
+    " retrnsmt   uid  timeout inode\n"
+)
+
+
+def socket_line(local: str, state: int, inode: int) -> str:
+    return (
+        f"   0: {local} 00000000:0000 {state:02X} 00000000:00000000 00:00000000"
+        f" 00000000  1000        0 {inode} 1 0000000000000000 100 0 0 10 0\n"
+    )
+
+
+class PortScannerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.proc = self.tmp.name
+
+        # udp, udp6가 없는 것은 IPv6를 끈 커널처럼 건너뜀
+        os.makedirs(os.path.join(self.proc, "net"))
+        self.write(
+            "net/tcp",
+            HEADER
+            + socket_line("00000000:22B8", 0x0A, 1001)  # 8888, Listen
+            + socket_line("0100007F:0016", 0x0A, 1002)  # 22, 범위 밖
+            + socket_line("0100007F:2134", 0x01, 1004),  # 8500, 주인 없음
+        )
+        self.write(
+            "net/tcp6",
+            HEADER + socket_line("00000000000000000000000001000000:20BC", 0x01, 1003),
+        )
+
+        self.add_process(100, "python3", "/usr/bin/python3.11", [1001, 1002])
+        self.add_process(200, "nginx", "/usr/sbin/nginx", [1003])
+        # 권한이 없어 fd를 읽을 수 없는 프로세스
+        os.makedirs(os.path.join(self.proc, "300"))
+
+    def write(self, name: str, text: str):
+        with open(os.path.join(self.proc, name), "w") as file:
+            file.write(text)
+
+    def add_process(self, pid: int, comm: str, exe: str, inodes):
+        fd_dir = os.path.join(self.proc, str(pid), "fd")
+        os.makedirs(fd_dir)
+        self.write(f"{pid}/comm", comm + "\n")
+        os.symlink(exe, os.path.join(self.proc, str(pid), "exe"))
+        os.symlink("/dev/null", os.path.join(fd_dir, "0"))
+        for fd, inode in enumerate(inodes, start=3):
+            os.symlink(f"socket:[{inode}]", os.path.join(fd_dir, str(fd)))
+
+    def test_read_sockets_filters_range(self):
+        ports = [s.local_port for s in pr.read_sockets(8000, 9000, self.proc)]
+        self.assertEqual([8888, 8500, 8380], ports)
+
+        sockets = list(pr.read_sockets(22, 22, self.proc))
+        self.assertEqual([pr.Socket("TCP", 22, "Listen", 1002)], sockets)
+
+    def test_map_inodes(self):
+        self.assertEqual(
+            {1001: 100, 1003: 200},
+            pr.map_inodes({1001, 1003, 1004}, self.proc),
+        )
+
+    def test_scan_maps_ports_to_processes(self):
+        rows = pr.PortScanner(8000, 9000, self.proc).scan()
+
+        self.assertEqual(
+            [
+                pr.Row("TCP", 8380, "nginx", 200, "/usr/sbin/nginx", "Established"),
+                pr.Row("TCP", 8500, "", None, "", "Established"),
+                pr.Row("TCP", 8888, "python3", 100, "/usr/bin/python3.11", "Listen"),
+            ],
+            rows,
+        )
+
+    def test_single_port(self):
+        rows = pr.PortScanner(8888, 8888, self.proc).scan()
+
+        self.assertEqual([100], [row.pid for row in rows])
+        self.assertIn("8888 python3", pr.format_table(rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+utils.hash의 처리량을 측정합니다.
+
+    python benchmarks/hash_bench.py [파일 크기(MB)] [파일 수]
+
+4 KB씩 읽던 이전 구현, calculate_digests(), calculate_many()로 같은 파일들을
+해시하여 MB/s를 출력합니다. 마지막 줄은 해시 캐시에 기록된 뒤 stat()만으로
+찾는 경우입니다. 처음 읽을 때는 디스크 속도가 섞이므로 파일을 한 번
+읽어 페이지 캐시에 올린 뒤 측정합니다.
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+from utils import hash
+
+
+def legacy_sha256(file_path: str) -> bytes:
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(4096), b""):
+            sha256_hash.update(chunk)
+    return sha256_hash.digest()
+
+
+def measure(name: str, total_mb: float, run: Callable[[], object]):
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<32}{elapsed:8.3f}s{total_mb / elapsed:10.1f} MB/s")
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths: List[str] = []
+        for i in range(count):
+            path = os.path.join(tmp, f"{i}.bin")
+            with open(path, "wb") as file:
+                for _ in range(size_mb):
+                    file.write(os.urandom(1024 * 1024))
+            paths.append(path)
+
+        for path in paths:
+            legacy_sha256(path)
+
+        total_mb = size_mb * count
+        print(f"{count} files x {size_mb} MB")
+
+        measure(
+            "legacy sha256 (4 KB)", total_mb, lambda: [legacy_sha256(p) for p in paths]
+        )
+        measure(
+            "calculate_digests sha256",
+            total_mb,
+            lambda: [hash.calculate_digests(p, use_cache=False) for p in paths],
+        )
+        measure(
+            "calculate_digests sha256+md5",
+            total_mb,
+            lambda: [
+                hash.calculate_digests(p, ("sha256", "md5"), use_cache=False)
+                for p in paths
+            ],
+        )
+        measure(
+            "calculate_many sha256",
+            total_mb,
+            lambda: list(hash.calculate_many(paths, use_cache=False)),
+        )
+
+        for path in paths:
+            hash.calculate_sha256(path)
+        measure(
+            "calculate_sha256 (cached)",
+            total_mb,
+            lambda: [hash.calculate_sha256(p) for p in paths],
+        )
+
+
+if __name__ == "__main__":
+    main()
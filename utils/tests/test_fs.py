@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+
+from utils import fs
+
+
+class FsTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "root")
+
+        for name, size in [("a.ts", 3), ("b.key", 5), ("sub/c.ts", 7)]:
+            path = os.path.join(self.root, name)
+            fs.makedirs(os.path.dirname(path))
+            with open(path, "wb") as file:
+                file.write(b"x" * size)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_walk_with_filter(self):
+        names = sorted(e.name for e in fs.walk(self.root))
+        self.assertEqual(["a.ts", "b.key", "c.ts"], names)
+
+        ts = sorted(
+            e.name for e in fs.walk(self.root, lambda e: e.name.endswith(".ts"))
+        )
+        self.assertEqual(["a.ts", "c.ts"], ts)
+
+        top = sorted(e.name for e in fs.walk(self.root, recursive=False))
+        self.assertEqual(["a.ts", "b.key"], top)
+
+    def test_total_size(self):
+        self.assertEqual(15, fs.total_size(self.root))
+        self.assertEqual(10, fs.total_size(self.root, lambda e: e.name.endswith(".ts")))
+
+    def test_clear_dir_does_not_follow_links(self):
+        outside = os.path.join(self.tmp.name, "outside")
+        fs.makedirs(outside)
+        os.symlink(outside, os.path.join(self.root, "link"))
+
+        fs.clear_dir(self.root)
+
+        self.assertEqual([], os.listdir(self.root))
+        self.assertTrue(os.path.isdir(outside))
+
+    def test_remove_dir_in_background(self):
+        thread = fs.remove_dir(self.root, background=True)
+
+        # 지우는 동안에도 같은 경로를 다시 만들 수 있음
+        fs.makedirs(self.root)
+        self.assertEqual([], os.listdir(self.root))
+
+        thread.join()
+        self.assertEqual(["root"], os.listdir(self.tmp.name))
+
+    def test_remove_dir_sweeps_stale_trash(self):
+        # 이전 실행이 지우다 만 디렉토리. 이름이 다른 디렉토리의 것도 지움
+        stale = os.path.join(self.tmp.name, ".root.deleting-0123")
+        other = os.path.join(self.tmp.name, ".other.deleting-0123")
+        kept = [".keep", "plain.deleting-0123"]
+        for path in [stale, other] + [os.path.join(self.tmp.name, k) for k in kept]:
+            fs.makedirs(os.path.join(path, "sub"))
+            fs.save(os.path.join(path, "sub", "a.ts"), b"a")
+
+        fs.remove_dir(self.root, background=True).join()
+
+        self.assertEqual(kept, sorted(os.listdir(self.tmp.name)))
+
+    def test_save_rejects_unknown_fsync(self):
+        path = os.path.join(self.root, "out.bin")
+
+        with self.assertRaises(ValueError):
+            fs.save(path, b"abc", fsync="always")
+        self.assertFalse(os.path.exists(path))
+
+    def test_makedirs(self):
+        fs.makedirs(self.root)
+
+        with self.assertRaises(fs.CanNotCreateTempDir):
+            fs.makedirs(os.path.join(self.root, "a.ts"))
+
+    def test_save_bytes_and_chunks(self):
+        path = os.path.join(self.root, "out.bin")
+
+        self.assertEqual(3, fs.save(path, memoryview(b"abc"), fsync=fs.FSYNC_FULL))
+        with open(path, "rb") as file:
+            self.assertEqual(b"abc", file.read())
+
+        # 예상보다 적게 쓰면 미리 잡은 공간은 잘라냄
+        fs.save(path, iter([b"de", b"f"]), size_hint=1024)
+        with open(path, "rb") as file:
+            self.assertEqual(b"def", file.read())
+
+    def test_failed_save_keeps_previous_file(self):
+        path = os.path.join(self.root, "a.ts")
+
+        def chunks():
+            yield b"partial"
+            raise ConnectionError()
+
+        with self.assertRaises(ConnectionError):
+            fs.save_chunks(path, chunks())
+
+        with open(path, "rb") as file:
+            self.assertEqual(b"xxx", file.read())
+        self.assertEqual(["a.ts", "b.key", "sub"], sorted(os.listdir(self.root)))
+
+
+if __name__ == "__main__":
+    unittest.main()
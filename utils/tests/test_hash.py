@@ -0,0 +1,58 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+from utils import hash
+
+
+class HashTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.contents = [b"", b"a", os.urandom(hash.BUFFER_SIZE * 2 + 5)]
+        self.paths = []
+        for i, content in enumerate(self.contents):
+            path = os.path.join(self.tmp.name, f"{i}.bin")
+            with open(path, "wb") as file:
+                file.write(content)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_digests_in_one_pass(self):
+        for path, content in zip(self.paths, self.contents):
+            digests = hash.calculate_digests(path, ("sha256", "md5"))
+            self.assertEqual(hashlib.sha256(content).digest(), digests["sha256"])
+            self.assertEqual(hashlib.md5(content).digest(), digests["md5"])
+            self.assertEqual(digests["sha256"], hash.calculate_sha256(path))
+            self.assertEqual(digests["md5"], hash.calculate_md5(path))
+
+    def test_calculate_many_keeps_order(self):
+        results = list(hash.calculate_many(self.paths, workers=2))
+
+        self.assertEqual(self.paths, [path for path, _ in results])
+        for (_, digests), content in zip(results, self.contents):
+            self.assertEqual(hashlib.sha256(content).digest(), digests["sha256"])
+
+    def test_calculate_many_raises_for_missing_file(self):
+        with self.assertRaises(OSError):
+            list(hash.calculate_many([os.path.join(self.tmp.name, "missing")]))
+
+    def test_calculate_many_skips_errors(self):
+        missing = os.path.join(self.tmp.name, "missing")
+        errors = []
+
+        results = list(
+            hash.calculate_many(
+                [missing] + self.paths,
+                on_error=lambda path, err: errors.append(path),
+            )
+        )
+
+        self.assertEqual(self.paths, [path for path, _ in results])
+        self.assertEqual([missing], errors)
+
+
+if __name__ == "__main__":
+    unittest.main()
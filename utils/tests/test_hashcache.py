@@ -0,0 +1,78 @@
+import hashlib
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from utils import hash
+from utils.hashcache import HashCache
+
+
+class HashCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, "cache", "hashes.sqlite3")
+        self.file_path = os.path.join(self.tmp.name, "a.bin")
+        self.write(b"content")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, content: bytes, age: float = 60):
+        with open(self.file_path, "wb") as file:
+            file.write(content)
+        mtime = time.time() - age
+        os.utime(self.file_path, (mtime, mtime))
+
+    def test_get_after_put(self):
+        cache = HashCache(self.cache_path)
+        stat = os.stat(self.file_path)
+        cache.put(stat, {"sha256": b"digest"})
+
+        self.assertEqual(b"digest", HashCache(self.cache_path).get(stat, "sha256"))
+        self.assertIsNone(cache.get(stat, "md5"))
+
+    def test_recently_modified_file_misses(self):
+        # 수정 직후의 기록은 같은 수정 시각으로 다시 쓰였을 수 있으므로 쓰지 않음
+        self.write(b"content", age=0)
+        cache = HashCache(self.cache_path)
+        stat = os.stat(self.file_path)
+        cache.put(stat, {"sha256": b"digest"})
+
+        self.assertIsNone(cache.get(stat, "sha256"))
+
+    def test_changed_file_misses(self):
+        cache = HashCache(self.cache_path)
+        cache.put(os.stat(self.file_path), {"sha256": b"digest"})
+
+        self.write(b"changed content")
+        self.assertIsNone(cache.get(os.stat(self.file_path), "sha256"))
+
+    def test_unused_entries_are_evicted(self):
+        cache = HashCache(self.cache_path, max_age=-1)
+        stat = os.stat(self.file_path)
+        cache.put(stat, {"sha256": b"digest"})
+
+        cache.evict()
+        self.assertIsNone(cache.get(stat, "sha256"))
+
+    def test_calculate_digests_uses_cache(self):
+        with mock.patch.object(hash, "CACHE_PATH", self.cache_path):
+            expected = hashlib.sha256(b"content").digest()
+            self.assertEqual(expected, hash.calculate_sha256(self.file_path))
+
+            # 크기와 수정 시각이 같으면 내용을 다시 읽지 않음
+            stat = os.stat(self.file_path)
+            self.write(b"CONTENT")
+            os.utime(self.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            self.assertEqual(expected, hash.calculate_sha256(self.file_path))
+
+            self.assertNotEqual(
+                expected,
+                hash.calculate_digests(self.file_path, use_cache=False)["sha256"],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from utils.index import ContentIndex
+
+
+class ContentIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index_path = os.path.join(self.tmp.name, "index.jsonl")
+        self.file_path = os.path.join(self.tmp.name, "abc.ts")
+        with open(self.file_path, "wb") as file:
+            file.write(b"content")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_entries_are_found_after_reload(self):
+        index = ContentIndex(self.index_path)
+        index.add("abc", self.file_path, playlist="https://a/b.m3u8", fingerprint="f")
+
+        index = ContentIndex(self.index_path)
+        self.assertEqual(self.file_path, index.find_sha256("abc").path)
+        self.assertEqual(self.file_path, index.find_playlist("https://a/b.m3u8").path)
+        self.assertEqual(self.file_path, index.find_fingerprint("f").path)
+        self.assertIsNone(index.find_playlist("https://a/c.m3u8"))
+
+    def test_missing_or_changed_file_is_ignored(self):
+        index = ContentIndex(self.index_path)
+        index.add("abc", self.file_path)
+
+        with open(self.file_path, "ab") as file:
+            file.write(b"more")
+        self.assertIsNone(index.find_sha256("abc"))
+
+        os.remove(self.file_path)
+        self.assertIsNone(index.find_sha256("abc"))
+
+    def test_truncated_line_is_skipped(self):
+        index = ContentIndex(self.index_path)
+        index.add("abc", self.file_path)
+        with open(self.index_path, "a") as file:
+            file.write('{"sha256": "de')
+
+        self.assertIsNotNone(ContentIndex(self.index_path).find_sha256("abc"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,23 @@
+import contextlib
+import fnmatch
 import os
+import threading
+import uuid
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Set, Union
+
+# save()와 atomic_writer()의 fsync 정책
+# - FSYNC_NONE: 운영체제에 맡김. 프로그램이 죽어도 파일은 온전하거나 없음
+# - FSYNC_FILE: 이름을 바꾸기 전에 파일 내용을 디스크에 씀
+# - FSYNC_FULL: 이름을 바꾼 뒤 디렉토리까지 디스크에 씀. 전원이 꺼져도 남음
+FSYNC_NONE = "none"
+FSYNC_FILE = "file"
+FSYNC_FULL = "full"
+FSYNC_POLICIES = (FSYNC_NONE, FSYNC_FILE, FSYNC_FULL)
+
+# 이 프로세스에서 백그라운드로 지우는 중인 디렉토리
+_removing: Set[str] = set()
+_removing_lock = threading.Lock()
+
 
 class AppException(Exception):
     pass
@@ -9,11 +28,75 @@ class CanNotCreateTempDir(AppException):
 
 
 def mkdir_if_not_exist(tmpdir: str):
-    if os.path.exists(tmpdir):
+    try:
+        os.mkdir(tmpdir)
+    except FileExistsError:
         if not os.path.isdir(tmpdir):
             raise CanNotCreateTempDir(f'file "{tmpdir}" is alreay exists ant it is not dir')
-    else:
-        os.mkdir(tmpdir)
+
+def makedirs(path: str):
+    """
+    상위 디렉토리까지 만듭니다. 이미 있으면 아무것도 하지 않습니다.
+
+    존재 여부를 먼저 확인하지 않고 만들어 보기 때문에, 여러 스레드나 프로세스가
+    동시에 같은 디렉토리를 만들어도 실패하지 않습니다.
+    """
+
+    try:
+        os.makedirs(path, exist_ok=True)
+    except FileExistsError:
+        raise CanNotCreateTempDir(f'file "{path}" is alreay exists ant it is not dir')
+
+def walk(
+    path: str,
+    predicate: Optional[Callable[[os.DirEntry], bool]] = None,
+    recursive: bool = True,
+) -> Iterator[os.DirEntry]:
+    """
+    디렉토리 아래의 파일을 os.scandir()로 훑어 DirEntry로 돌려줍니다.
+
+    DirEntry는 디렉토리를 읽을 때 함께 받은 파일 종류를 기억하므로, 파일마다
+    isfile()/isdir()로 stat()을 다시 부르지 않습니다. 심볼릭 링크는 따라가지
+    않습니다.
+
+    Args:
+        path (str): 훑을 디렉토리.
+        predicate (Callable or None): 돌려줄 파일을 고르는 함수.
+        recursive (bool): 하위 디렉토리도 훑을지 여부.
+
+    Example:
+        >>> [e.name for e in walk("_tmp", lambda e: e.name.endswith(".ts"))]
+        ["00000.ts", "00001.ts"]
+    """
+
+    stack = [path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif predicate is None or predicate(entry):
+                    yield entry
+
+def total_size(
+    path: str, predicate: Optional[Callable[[os.DirEntry], bool]] = None
+) -> int:
+    """
+    디렉토리 아래 파일 크기의 합을 반환합니다.
+    """
+
+    return sum(entry.stat(follow_symlinks=False).st_size for entry in walk(path, predicate))
+
+def _clear(path: str):
+    with os.scandir(path) as entries:
+        for entry in entries:
+            # 디렉터리이면 재귀적으로 삭제, 디렉터리를 가리키는 링크는 링크만 삭제
+            if entry.is_dir(follow_symlinks=False):
+                _clear(entry.path)
+                os.rmdir(entry.path)
+            else:
+                os.remove(entry.path)
 
 def clear_dir(path: str):
     if not os.path.exists(path):
@@ -22,17 +105,150 @@ def clear_dir(path: str):
     if not os.path.isdir(path):
         raise Exception(f'디렉토리 비우기 실패: "{path}" is not directory')
 
-    for file_name in os.listdir(path):
-        file_path = os.path.join(path, file_name)
+    _clear(path)
+
+def remove_dir(path: str, background: bool = False) -> Optional[threading.Thread]:
+    """
+    디렉토리를 내용과 함께 지웁니다.
+
+    background가 True이면 디렉토리를 같은 위치의 임시 이름으로 바꾼 뒤 별도의
+    스레드에서 지우므로, 호출한 쪽은 파일 수와 관계없이 바로 다음 작업을 할 수
+    있고 같은 경로를 곧바로 다시 만들 수 있습니다. 프로그램은 삭제가 끝날 때까지
+    종료되지 않습니다. 같은 위치에서 이전 실행이 지우다 만 임시 디렉토리
+    (`.*.deleting-*`)도 이름과 관계없이 함께 지웁니다.
+
+    Returns:
+        threading.Thread or None: 삭제 중인 스레드. background가 아니면 None.
+    """
 
-        # 파일이면 삭제
-        if os.path.isfile(file_path):
-            os.remove(file_path)
+    if not background:
+        clear_dir(path)
+        os.rmdir(path)
+        return None
+
+    parent, name = os.path.split(os.path.normpath(path))
+    os.rename(path, os.path.join(parent, f".{name}.deleting-{uuid.uuid4().hex}"))
+
+    # 방금 옮긴 디렉토리와, 다른 스레드가 지우고 있지 않은 이전 임시 디렉토리
+    with _removing_lock:
+        with os.scandir(parent or ".") as entries:
+            trashes = [
+                os.path.join(parent, entry.name)
+                for entry in entries
+                if fnmatch.fnmatchcase(entry.name, ".*.deleting-*")
+                and entry.is_dir(follow_symlinks=False)
+                and os.path.join(parent, entry.name) not in _removing
+            ]
+        _removing.update(trashes)
+
+    thread = threading.Thread(
+        target=_remove_trashes, args=(trashes,), name=f"remove {path}"
+    )
+    thread.start()
+    return thread
+
+def _remove_trashes(trashes: List[str]):
+    for trash in trashes:
+        try:
+            remove_dir(trash)
+        except Exception:
+            # 다른 프로세스가 먼저 지웠으면 무시
+            if os.path.exists(trash):
+                raise
+        finally:
+            with _removing_lock:
+                _removing.discard(trash)
+
+@contextlib.contextmanager
+def atomic_writer(
+    file_name: str, fsync: str = FSYNC_NONE, size_hint: int = 0
+) -> Iterator[BinaryIO]:
+    """
+    같은 디렉토리의 임시 파일에 쓰고, 블록이 예외 없이 끝나면 file_name으로
+    이름을 바꿉니다. 따라서 file_name에는 이전 내용이나 새 내용 중 하나만 온전히
+    남고, 쓰다 만 파일이 생기지 않습니다. 예외가 발생하면 임시 파일을 지웁니다.
+
+    Args:
+        file_name (str): 저장할 파일 경로.
+        fsync (str): FSYNC_NONE, FSYNC_FILE, FSYNC_FULL 중 하나.
+        size_hint (int): 예상 크기. 0보다 크면 posix_fallocate()로 미리 공간을
+            잡아 조각나지 않게 합니다. 실제로 쓴 크기에 맞춰 잘라냅니다.
+
+    Example:
+        >>> with atomic_writer("out.ts", fsync=FSYNC_FILE) as file:
+        ...     file.write(b"...")
+    """
+
+    if fsync not in FSYNC_POLICIES:
+        raise ValueError(f"알 수 없는 fsync 정책: {fsync!r}")
+
+    directory, name = os.path.split(os.path.abspath(file_name))
+    tmp_name = os.path.join(directory, f".{name}.{uuid.uuid4().hex}.tmp")
+
+    # mkstemp()와 달리 umask에 따른 일반 파일 권한으로 만듦
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    fd = os.open(tmp_name, flags, 0o666)
+
+    try:
+        with open(fd, "wb") as file:
+            if size_hint > 0 and hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(fd, 0, size_hint)
+                except OSError:
+                    # 지원하지 않는 파일 시스템
+                    pass
+
+            yield file
+
+            file.flush()
+            if size_hint > 0:
+                file.truncate(file.tell())
+            if fsync in (FSYNC_FILE, FSYNC_FULL):
+                os.fsync(fd)
+
+        os.replace(tmp_name, file_name)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_name)
+        raise
+
+    if fsync == FSYNC_FULL and hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def save(
+    file_name: str,
+    content: Union[bytes, bytearray, memoryview, Iterable[bytes]],
+    fsync: str = FSYNC_NONE,
+    size_hint: int = 0,
+) -> int:
+    """
+    내용을 atomic_writer()로 저장합니다.
+
+    Args:
+        file_name (str): 저장할 파일 경로.
+        content: 저장할 내용. bytes나 memoryview는 복사하지 않고 그대로 쓰고,
+            청크를 내는 이터레이터는 받는 대로 씁니다.
+        fsync (str): FSYNC_NONE, FSYNC_FILE, FSYNC_FULL 중 하나.
+        size_hint (int): 예상 크기. 미리 공간을 잡을 때 사용합니다.
+
+    Returns:
+        int: 쓴 바이트 수.
+    """
+
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        chunks: Iterable[bytes] = [content]
+    else:
+        chunks = content
 
-        # 디렉터리이면 재귀적으로 삭제
-        elif os.path.isdir(file_path):
-            clear_dir(file_path)
-            os.rmdir(file_path)
+    size = 0
+    with atomic_writer(file_name, fsync, size_hint) as file:
+        for chunk in chunks:
+            size += file.write(chunk)
+    return size
 
-def save(file_name: str, content: bytes):
-    open(file_name, "wb").write(content)
\ No newline at end of file
+def save_chunks(file_name: str, chunks: Iterable[bytes], fsync: str = FSYNC_NONE) -> int:
+    return save(file_name, chunks, fsync)
@@ -1,7 +1,178 @@
 import hashlib
-from typing import Final
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Callable,
+    Dict,
+    Final,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
-_BLOCK_SIZE: Final = 4096
+from utils.hashcache import HashCache, file_key
+
+# 한 번에 읽는 크기. hashlib은 2047바이트보다 큰 입력을 해시하는 동안 GIL을 놓으므로
+# 큰 버퍼를 쓰면 여러 스레드가 동시에 해시할 수 있음
+BUFFER_SIZE: Final = 1024 * 1024
+
+# 파일 식별자로 해시 값을 기억하는 캐시. 빈 문자열이면 사용하지 않음
+CACHE_PATH = os.environ.get(
+    "UTILS_HASH_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "utils", "hashes.sqlite3"),
+)
+
+_caches: Dict[str, Optional[HashCache]] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache() -> Optional[HashCache]:
+    """
+    CACHE_PATH의 해시 캐시를 반환합니다. 사용하지 않거나 열 수 없으면 None.
+    """
+
+    if not CACHE_PATH:
+        return None
+
+    with _caches_lock:
+        if CACHE_PATH not in _caches:
+            try:
+                _caches[CACHE_PATH] = HashCache(CACHE_PATH)
+            except (OSError, sqlite3.Error):
+                _caches[CACHE_PATH] = None
+        return _caches[CACHE_PATH]
+
+
+def _cached_digests(
+    cache: HashCache, stat: os.stat_result, algorithms: Sequence[str]
+) -> Optional[Dict[str, bytes]]:
+    digests = {}
+    try:
+        for name in algorithms:
+            digest = cache.get(stat, name)
+            if digest is None:
+                return None
+            digests[name] = digest
+    except sqlite3.Error:
+        return None
+    return digests
+
+
+def remember(file_path: str, digests: Dict[str, bytes]):
+    """
+    이미 알고 있는 파일의 해시 값을 캐시에 기록합니다.
+
+    파일을 쓰면서 해시 값을 함께 계산한 경우, 나중에 다시 읽지 않아도 되도록
+    파일을 닫은 뒤에 호출합니다.
+    """
+
+    if cache := get_cache():
+        try:
+            cache.put(os.stat(file_path), digests)
+        except sqlite3.Error:
+            pass
+
+
+def calculate_digests(
+    file_path: str,
+    algorithms: Sequence[str] = ("sha256",),
+    buffer_size: int = BUFFER_SIZE,
+    use_cache: bool = True,
+) -> Dict[str, bytes]:
+    """
+    파일을 한 번만 읽어 여러 해시 값을 함께 계산합니다.
+
+    재사용하는 버퍼에 readinto()로 읽어 청크마다 새 bytes 객체를 만들지 않습니다.
+    장치, inode, 크기, 수정 시각이 같은 파일의 해시 값이 캐시에 있으면 읽지
+    않고 돌려줍니다.
+
+    Args:
+        file_path (str): 해시 값을 계산할 파일 경로.
+        algorithms (Sequence[str]): hashlib 알고리즘 이름 (예: "sha256", "md5").
+        buffer_size (int): 한 번에 읽는 크기.
+        use_cache (bool): 해시 캐시를 사용할지 여부.
+
+    Returns:
+        Dict[str, bytes]: 알고리즘 이름과 해시 값.
+
+    Example:
+        >>> calculate_digests("video.ts", ("sha256", "md5"))
+        {"sha256": b"...", "md5": b"..."}
+    """
+
+    cache = get_cache() if use_cache else None
+
+    with open(file_path, "rb", buffering=0) as file:
+        stat = os.fstat(file.fileno())
+        if cache and (cached := _cached_digests(cache, stat, algorithms)):
+            return cached
+
+        hashes = [hashlib.new(name) for name in algorithms]
+        buffer = bytearray(buffer_size)
+        view = memoryview(buffer)
+
+        while size := file.readinto(buffer):
+            chunk = view[:size]
+            for h in hashes:
+                h.update(chunk)
+
+        digests = {name: h.digest() for name, h in zip(algorithms, hashes)}
+
+        # 읽는 도중에 파일이 바뀌었다면 기록하지 않음
+        if cache and file_key(os.fstat(file.fileno())) == file_key(stat):
+            try:
+                cache.put(stat, digests)
+            except sqlite3.Error:
+                pass
+
+    return digests
+
+
+def calculate_many(
+    file_paths: Iterable[str],
+    algorithms: Sequence[str] = ("sha256",),
+    workers: Optional[int] = None,
+    use_cache: bool = True,
+    on_error: Optional[Callable[[str, OSError], None]] = None,
+) -> Iterator[Tuple[str, Dict[str, bytes]]]:
+    """
+    여러 파일의 해시 값을 스레드 풀에서 동시에 계산합니다.
+
+    Args:
+        file_paths (Iterable[str]): 해시 값을 계산할 파일 경로들.
+        algorithms (Sequence[str]): hashlib 알고리즘 이름.
+        workers (int or None): 스레드 수. None이면 CPU 수.
+        use_cache (bool): 해시 캐시를 사용할지 여부.
+        on_error (Callable[[str, OSError], None] or None): 읽을 수 없는 파일의
+            경로와 오류를 받는 함수. 있으면 그 파일은 건너뛰고 계속합니다.
+            작업 스레드에서 호출됩니다.
+
+    Returns:
+        Iterator[Tuple[str, Dict[str, bytes]]]: 주어진 순서대로 (파일 경로, 해시 값).
+            on_error가 없을 때 읽을 수 없는 파일이 있으면 그 차례에 OSError가
+            발생합니다.
+    """
+
+    paths = list(file_paths)
+    workers = workers or os.cpu_count() or 1
+
+    def calculate(path: str) -> Optional[Dict[str, bytes]]:
+        try:
+            return calculate_digests(path, algorithms, use_cache=use_cache)
+        except OSError as err:
+            if on_error is None:
+                raise
+            on_error(path, err)
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(workers, max(1, len(paths)))) as executor:
+        for path, digests in zip(paths, executor.map(calculate, paths)):
+            if digests is not None:
+                yield path, digests
 
 
 def calculate_sha256(file_path: str) -> bytes:
@@ -15,15 +186,8 @@ def calculate_sha256(file_path: str) -> bytes:
         bytes: 계산된 SHA-256 해시 값을 bytes로 반환합니다.
 
     """
-    sha256_hash = hashlib.sha256()
-
-    with open(file_path, "rb") as file:
-        # 파일을 작은 청크로 나누어 해시 계산
-        for chunk in iter(lambda: file.read(_BLOCK_SIZE), b""):
-            sha256_hash.update(chunk)
 
-    # 해시 값을 bytes로 반환
-    return sha256_hash.digest()
+    return calculate_digests(file_path, ("sha256",))["sha256"]
 
 
 def calculate_md5(file_path: str) -> bytes:
@@ -37,12 +201,5 @@ def calculate_md5(file_path: str) -> bytes:
         bytes: 계산된 MD5 해시 값을 bytes로 반환합니다.
 
     """
-    md5_hash = hashlib.md5()
-
-    with open(file_path, "rb") as file:
-        # 파일을 작은 청크로 나누어 해시 계산
-        for chunk in iter(lambda: file.read(_BLOCK_SIZE), b""):
-            md5_hash.update(chunk)
 
-    # 해시 값을 bytes로 반환
-    return md5_hash.digest()
+    return calculate_digests(file_path, ("md5",))["md5"]
@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+# 이 기간 동안 조회되지 않은 기록은 지움
+MAX_AGE: float = 90 * 24 * 60 * 60
+
+# 조회할 때마다 쓰지 않도록 마지막 사용 시각은 이 간격보다 오래되었을 때만 갱신
+_TOUCH_INTERVAL = 24 * 60 * 60
+
+# 기록한 시각과 수정 시각이 이 간격보다 가까운 기록은 믿지 않음 (git의 racy-git 처리).
+# 같은 시각 단위 안에서 크기를 바꾸지 않고 다시 쓴 파일은 stat() 결과가 같기 때문
+RACY_WINDOW: float = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    dev INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    algorithm TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (dev, inode, size, mtime_ns, algorithm)
+) WITHOUT ROWID
+"""
+
+
+def file_key(stat: os.stat_result) -> tuple:
+    """
+    파일 내용이 바뀌지 않았다고 볼 수 있는 식별자 (장치, inode, 크기, 수정 시각).
+    """
+
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class HashCache:
+    """
+    파일 식별자로 해시 값을 기억하는 SQLite 캐시.
+
+    파일을 다시 읽지 않고 stat() 결과만으로 해시 값을 찾습니다. 내용이 바뀌면
+    크기나 수정 시각이 바뀌므로 예전 기록은 더 이상 맞지 않고, MAX_AGE 동안
+    조회되지 않은 기록은 캐시를 열 때 지웁니다. 수정 직후에 기록한 값은 그 뒤에
+    같은 수정 시각으로 내용이 바뀌었을 수 있으므로 없는 것으로 봅니다. 여러 스레드와 프로세스가 같은
+    파일을 함께 쓸 수 있습니다.
+
+    Args:
+        path (str): SQLite 파일 경로.
+        max_age (float): 기록을 남겨두는 기간(초).
+    """
+
+    def __init__(self, path: str, max_age: float = MAX_AGE) -> None:
+        self.path = path
+        self.max_age = max_age
+
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+        self.evict()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, stat: os.stat_result, algorithm: str) -> Optional[bytes]:
+        key = file_key(stat)
+
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT digest, used_at FROM digests WHERE dev = ? AND inode = ?"
+            " AND size = ? AND mtime_ns = ? AND algorithm = ?",
+            (*key, algorithm),
+        ).fetchone()
+        if row is None:
+            return None
+
+        digest, used_at = row
+        # used_at은 기록하거나 조회에 성공한 시각이므로 수정 시각과 가까우면
+        # 기록한 뒤에 내용이 바뀌었는지 알 수 없음
+        if key[3] / 1e9 > used_at - RACY_WINDOW:
+            return None
+
+        now = time.time()
+        if now - used_at > _TOUCH_INTERVAL:
+            with conn:
+                conn.execute(
+                    "UPDATE digests SET used_at = ? WHERE dev = ? AND inode = ?"
+                    " AND size = ? AND mtime_ns = ? AND algorithm = ?",
+                    (now, *key, algorithm),
+                )
+
+        return digest
+
+    def put(self, stat: os.stat_result, digests: Dict[str, bytes]):
+        key = file_key(stat)
+        now = time.time()
+
+        conn = self._connect()
+        with conn:
+            # 같은 inode의 예전 내용에 대한 기록은 더 이상 쓸모가 없음
+            conn.execute(
+                "DELETE FROM digests WHERE dev = ? AND inode = ?"
+                " AND (size != ? OR mtime_ns != ?)",
+                key,
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(*key, name, digest, now) for name, digest in digests.items()],
+            )
+
+    def evict(self):
+        """
+        max_age 동안 조회되지 않은 기록을 지웁니다.
+        """
+
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "DELETE FROM digests WHERE used_at < ?", (time.time() - self.max_age,)
+            )
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class IndexEntry:
+    sha256: str
+    path: str
+    size: int
+    playlist: Optional[str] = None
+    fingerprint: Optional[str] = None
+
+
+class ContentIndex:
+    """
+    내용의 SHA-256으로 이름 붙인 파일을 재생 목록 URL, 세그먼트 지문과 함께
+    기록하여, 이미 받은 내용을 다시 받기 전에 찾을 수 있게 합니다.
+
+    기록은 한 줄에 하나씩 JSON으로 덧붙이므로 여러 프로그램이 같은 파일에
+    기록할 수 있습니다. 찾을 때는 파일이 아직 있고 크기가 같은지만 확인하며,
+    옮겨지거나 지워진 파일의 기록은 무시합니다.
+
+    Args:
+        path (str): 인덱스 파일 경로.
+
+    Example:
+        >>> index = ContentIndex("index.jsonl")
+        >>> index.add("ab12...", "ab12....ts", playlist="https://example.com/a.m3u8")
+        >>> index.find_playlist("https://example.com/a.m3u8").path
+        "/home/user/ab12....ts"
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._by_sha256: Dict[str, IndexEntry] = {}
+        self._by_playlist: Dict[str, IndexEntry] = {}
+        self._by_fingerprint: Dict[str, IndexEntry] = {}
+
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, "r") as file:
+            for line in file:
+                try:
+                    entry = IndexEntry(**json.loads(line))
+                except (json.JSONDecodeError, TypeError):
+                    # 기록 도중 중단되어 잘린 줄
+                    continue
+
+                self._put(entry)
+
+    def _put(self, entry: IndexEntry):
+        self._by_sha256[entry.sha256] = entry
+        if entry.playlist:
+            self._by_playlist[entry.playlist] = entry
+        if entry.fingerprint:
+            self._by_fingerprint[entry.fingerprint] = entry
+
+    def add(
+        self,
+        sha256: str,
+        path: str,
+        playlist: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+    ) -> IndexEntry:
+        """
+        저장된 파일을 인덱스에 기록합니다.
+
+        Args:
+            sha256 (str): 파일 내용의 SHA-256 (16진수 문자열).
+            path (str): 파일 경로. 절대 경로로 바꾸어 기록합니다.
+            playlist (str or None): 파일을 받은 재생 목록 URL.
+            fingerprint (str or None): 재생 목록의 세그먼트 지문.
+
+        Returns:
+            IndexEntry: 기록한 항목.
+        """
+
+        entry = IndexEntry(
+            sha256=sha256,
+            path=os.path.abspath(path),
+            size=os.path.getsize(path),
+            playlist=playlist,
+            fingerprint=fingerprint,
+        )
+
+        with self._lock:
+            self._put(entry)
+            with open(self.path, "a") as file:
+                file.write(json.dumps(asdict(entry)) + "\n")
+
+        return entry
+
+    def add_many(self, files: List[Tuple[str, str]]):
+        """
+        여러 파일을 한 번에 기록합니다.
+
+        Args:
+            files (List[Tuple[str, str]]): (SHA-256, 파일 경로) 목록.
+        """
+
+        entries = [
+            IndexEntry(
+                sha256=sha256, path=os.path.abspath(path), size=os.path.getsize(path)
+            )
+            for sha256, path in files
+        ]
+
+        with self._lock:
+            for entry in entries:
+                self._put(entry)
+            with open(self.path, "a") as file:
+                file.writelines(json.dumps(asdict(entry)) + "\n" for entry in entries)
+
+    def _existing(self, entry: Optional[IndexEntry]) -> Optional[IndexEntry]:
+        if entry is None:
+            return None
+
+        try:
+            if os.path.getsize(entry.path) != entry.size:
+                return None
+        except OSError:
+            return None
+
+        return entry
+
+    def find_sha256(self, sha256: str) -> Optional[IndexEntry]:
+        with self._lock:
+            return self._existing(self._by_sha256.get(sha256))
+
+    def find_playlist(self, playlist: str) -> Optional[IndexEntry]:
+        with self._lock:
+            return self._existing(self._by_playlist.get(playlist))
+
+    def find_fingerprint(self, fingerprint: str) -> Optional[IndexEntry]:
+        with self._lock:
+            return self._existing(self._by_fingerprint.get(fingerprint))